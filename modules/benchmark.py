@@ -0,0 +1,78 @@
+"""
+Micro-benchmarks for some of the emulator's hot paths.
+
+These are meant to be run by developers to check whether a change made things faster or slower,
+and need an existing profile (with a ROM) to work:
+
+    python -m modules.benchmark <profile name> [iterations]
+
+The profile's save state and save game are not modified.
+"""
+
+import atexit
+import sys
+import time
+
+from modules import exceptions  # Import base module first to avoid a circular import.
+from modules.console import console
+from modules.context import context
+from modules.game import set_rom
+from modules.profiles import load_profile_by_name, profile_directory_exists
+
+
+def _measure(function: callable, iterations: int) -> float:
+    """
+    :return: Average time per call in microseconds
+    """
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter_ns() - start) / iterations / 1000
+
+
+def benchmark_save_states(iterations: int) -> dict[str, float]:
+    """
+    Compares the 'serialised' save state path (`get_save_state()`/`load_save_state()`, which goes
+    through an mGBA VFile) with the in-memory snapshot pool.
+    """
+    emulator = context.emulator
+
+    def vfile_round_trip():
+        emulator.load_save_state(emulator.get_save_state())
+
+    def snapshot_round_trip():
+        handle = emulator.take_snapshot()
+        emulator.restore_snapshot(handle)
+        emulator.release_snapshot(handle)
+
+    return {
+        "get_save_state() + load_save_state()": _measure(vfile_round_trip, iterations),
+        "take_snapshot() + restore_snapshot()": _measure(snapshot_round_trip, iterations),
+        "peek_frame()": _measure(lambda: emulator.peek_frame(lambda: None), iterations),
+    }
+
+
+def run_benchmarks(profile_name: str, iterations: int) -> None:
+    from modules.libmgba import LibmgbaEmulator
+
+    profile = load_profile_by_name(profile_name)
+    context.profile = profile
+    context.config.load(profile.path, strict=False)
+    set_rom(profile.rom)
+    context.emulator = LibmgbaEmulator(profile, lambda: None)
+
+    # The emulator would otherwise overwrite the profile's current state when this script exits.
+    atexit.unregister(context.emulator.shutdown)
+    context.emulator.set_throttle(False)
+
+    console.print(f"Running each benchmark [cyan]{iterations:,}[/] times...")
+    for name, microseconds in benchmark_save_states(iterations).items():
+        console.print(f"  {name:<40} [bold]{microseconds:>10,.1f} µs[/]")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or not profile_directory_exists(sys.argv[1]):
+        console.print("Usage: python -m modules.benchmark <profile name> [iterations]")
+        sys.exit(1)
+
+    run_benchmarks(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
@@ -173,6 +173,7 @@ class Logging(BaseConfig):
     save_pk3: LoggingSavePK3 = Field(default_factory=lambda: LoggingSavePK3())
     import_pk3: bool = False
     log_encounters: bool = False
+    log_encounters_format: Literal["csv", "parquet"] = "csv"
 
 
 class LoggingConsole(BaseConfig):
@@ -1,6 +1,50 @@
-import os
+import atexit
+import csv
+import importlib.util
+import threading
+import time
+from abc import ABC, abstractmethod
 from pathlib import Path
-import pandas as pd
+
+from modules.console import console
+
+# Columns of the (flattened) `Pokemon.to_legacy_dict()` that are not written to the encounter log.
+excluded_columns = {
+    "EVs_attack",
+    "EVs_defence",
+    "EVs_hp",
+    "EVs_spAttack",
+    "EVs_spDefense",
+    "EVs_speed",
+    "markings_circle",
+    "markings_heart",
+    "markings_square",
+    "markings_triangle",
+    "moves_0_effect",
+    "moves_1_effect",
+    "moves_2_effect",
+    "moves_3_effect",
+    "pokerus_days",
+    "pokerus_strain",
+    "status_badPoison",
+    "status_burn",
+    "status_freeze",
+    "status_paralysis",
+    "status_poison",
+    "status_sleep",
+    "condition_beauty",
+    "condition_cool",
+    "condition_cute",
+    "condition_feel",
+    "condition_smart",
+    "condition_tough",
+}
+
+# Encounters are not written to disk one by one, but in batches. A batch is written as soon as it
+# contains `batch_size` rows, or once the first row in it is `batch_max_age` seconds old. Shiny
+# encounters are written immediately.
+batch_size = 50
+batch_max_age = 10.0
 
 
 def flatten_data(data: dict) -> dict:
@@ -22,52 +66,185 @@ def flatten_data(data: dict) -> dict:
     return out
 
 
-def log_encounter_to_csv(total_stats: dict, pokemon_dict: dict, stats_dir_path: Path) -> bool:
+class EncounterLogWriter(ABC):
+    """
+    Base class for writing the encounter log of a single phase. This keeps the rows in memory
+    until a batch is complete, and leaves the actual writing to its subclasses.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.columns: list[str] | None = None
+        self._rows: list[dict] = []
+        # Incomplete batches are flushed from a timer thread, so the rows need to be protected.
+        self._lock = threading.RLock()
+        self._flush_timer: threading.Timer | None = None
+
+    def write(self, row: dict, flush_immediately: bool = False) -> None:
+        """
+        :param row: Flattened encounter data
+        :param flush_immediately: Whether to write this row (and the rest of the batch) right away
+        """
+        with self._lock:
+            if self.columns is None:
+                self.columns = sorted(column for column in row if column not in excluded_columns)
+
+            self._rows.append(row)
+            if flush_immediately or len(self._rows) >= batch_size:
+                self.flush()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(batch_max_age, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._rows:
+                self._write_rows(self._rows)
+                self._rows = []
+
+    def close(self) -> None:
+        self.flush()
+
+    @abstractmethod
+    def _write_rows(self, rows: list[dict]) -> None:
+        pass
+
+
+class CsvEncounterLogWriter(EncounterLogWriter):
+    def __init__(self, path: Path):
+        super().__init__(path.with_suffix(".csv"))
+        self._file = None
+        self._writer: csv.DictWriter | None = None
+
+    def _write_rows(self, rows: list[dict]) -> None:
+        if self._file is None:
+            # When continuing an existing log, stick with the columns of that file so that the
+            # rows still line up with its header.
+            if self.path.is_file() and self.path.stat().st_size > 0:
+                with open(self.path, "r", newline="", encoding="utf-8") as existing_file:
+                    self.columns = next(csv.reader(existing_file))
+                write_header = False
+            else:
+                write_header = True
+
+            self._file = open(self.path, "a", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction="ignore")
+            if write_header:
+                self._writer.writeheader()
+
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            super().close()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class ParquetEncounterLogWriter(EncounterLogWriter):
+    """
+    Parquet files cannot be appended to once they have been closed. So rather than a single
+    file, each phase gets a directory (i.e. a Parquet dataset) containing one file per session.
+    """
+
+    def __init__(self, path: Path):
+        super().__init__(path.parent / path.name / f"{time.strftime('%Y-%m-%d_%H-%M-%S')}.parquet")
+        self._writer = None
+
+    def _write_rows(self, rows: list[dict]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            fields = []
+            for column in self.columns:
+                value = next((row[column] for row in rows if row.get(column) is not None), None)
+                if isinstance(value, bool):
+                    field_type = pa.bool_()
+                elif isinstance(value, int):
+                    field_type = pa.int64()
+                elif isinstance(value, float):
+                    field_type = pa.float64()
+                else:
+                    field_type = pa.string()
+                fields.append(pa.field(column, field_type))
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(self.path, pa.schema(fields))
+
+        columns = {column: [row.get(column) for row in rows] for column in self.columns}
+        table = pa.Table.from_pydict(columns).cast(self._writer.schema, safe=False)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        with self._lock:
+            super().close()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+encounter_log_writers = {
+    "csv": CsvEncounterLogWriter,
+    "parquet": ParquetEncounterLogWriter,
+}
+
+_current_writer: EncounterLogWriter | None = None
+_current_writer_key: tuple[str, Path] | None = None
+
+
+def close_encounter_log() -> None:
+    """
+    Writes out any encounters that are still being held in memory and closes the log file. This
+    needs to be called when the bot shuts down, as Parquet files are unreadable until they have
+    been closed.
+    """
+    global _current_writer, _current_writer_key
+
+    if _current_writer is not None:
+        _current_writer.close()
+        _current_writer = None
+        _current_writer_key = None
+
+
+atexit.register(close_encounter_log)
+
+
+def log_encounter_to_file(
+    total_stats: dict, pokemon_dict: dict, stats_dir_path: Path, file_format: str = "csv"
+) -> bool:
+    """
+    Adds an encounter to the encounter log of the current phase (in the `stats/encounters/` directory.)
+
+    :param total_stats: The bot's total stats, used to determine the current phase
+    :param pokemon_dict: The encountered Pokémon, as returned by `Pokemon.to_legacy_dict()`
+    :param stats_dir_path: Path to the profile's `stats/` directory
+    :param file_format: Format of the log file, one of the keys of `encounter_log_writers`
+    :return: Whether the encounter could be logged
+    """
+    global _current_writer, _current_writer_key
+
     try:
-        # Log all encounters to a CSV file per phase
-        csv_path = stats_dir_path / "encounters"
-        os.makedirs(csv_path, exist_ok=True)
-        csv_file = csv_path / f"Phase {total_stats['totals'].get('shiny_encounters', 0)} Encounters.csv"
-        pd_pokemon = (
-            pd.DataFrame.from_dict(flatten_data(pokemon_dict), orient="index")
-            .drop(
-                [
-                    "EVs_attack",
-                    "EVs_defence",
-                    "EVs_hp",
-                    "EVs_spAttack",
-                    "EVs_spDefense",
-                    "EVs_speed",
-                    "markings_circle",
-                    "markings_heart",
-                    "markings_square",
-                    "markings_triangle",
-                    "moves_0_effect",
-                    "moves_1_effect",
-                    "moves_2_effect",
-                    "moves_3_effect",
-                    "pokerus_days",
-                    "pokerus_strain",
-                    "status_badPoison",
-                    "status_burn",
-                    "status_freeze",
-                    "status_paralysis",
-                    "status_poison",
-                    "status_sleep",
-                    "condition_beauty",
-                    "condition_cool",
-                    "condition_cute",
-                    "condition_feel",
-                    "condition_smart",
-                    "condition_tough",
-                ],
-                errors="ignore",
-            )
-            .sort_index()
-            .transpose()
-        )
-        header = False if os.path.exists(csv_file) else True
-        pd_pokemon.to_csv(csv_file, mode="a", encoding="utf-8", index=False, header=header)
+        # Log all encounters to a separate file per phase
+        path = stats_dir_path / "encounters" / f"Phase {total_stats['totals'].get('shiny_encounters', 0)} Encounters"
+        if _current_writer_key != (file_format, path):
+            close_encounter_log()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            writer_class = encounter_log_writers[file_format]
+            if writer_class is ParquetEncounterLogWriter and importlib.util.find_spec("pyarrow") is None:
+                console.print("[red]Writing Parquet files requires the `pyarrow` package, logging to CSV instead.[/]")
+                writer_class = CsvEncounterLogWriter
+            _current_writer = writer_class(path)
+            _current_writer_key = (file_format, path)
+
+        # Shinies end the phase (and often the hunt), so they should not wait around in memory.
+        _current_writer.write(flatten_data(pokemon_dict), flush_immediately=bool(pokemon_dict.get("shiny")))
         return True
     except:
         return False
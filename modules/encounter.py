@@ -8,12 +8,16 @@ from modules.runtime import get_sprites_path
 from modules.stats import total_stats
 
 
-def encounter_pokemon(pokemon: Pokemon) -> None:
+def encounter_pokemon(pokemon: Pokemon, battle_has_started: bool = True) -> None:
     """
     Call when a Pokémon is encountered, decides whether to battle, flee or catch.
-    Expects the player's state to be MISC_MENU (battle started, no longer in the overworld).
+    Usually expects the player's state to be MISC_MENU (battle started, no longer in the overworld).
     It also calls the function to save the pokemon as a pk file if required in the config.
 
+    :param pokemon: The Pokémon that has been encountered
+    :param battle_has_started: False if this is called as soon as the opponent has been generated,
+                               before the battle has been set up. In that case `gBattleTypeFlags` is
+                               not up-to-date yet, so roaming Pokémon cannot be detected.
     :return:
     """
     if context.config.logging.save_pk3.all:
@@ -47,7 +51,7 @@ def encounter_pokemon(pokemon: Pokemon) -> None:
     state_tag = ""
     alert_title = None
     alert_message = None
-    battle_type_flags = get_battle_type_flags()
+    battle_type_flags = get_battle_type_flags() if battle_has_started else BattleTypeFlag(0)
 
     # TODO temporary until auto-catch is ready
     if pokemon.is_shiny or custom_found or BattleTypeFlag.ROAMER in battle_type_flags:
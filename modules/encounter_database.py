@@ -0,0 +1,215 @@
+"""
+SQLite database containing the encounters that the bot has logged (`stats/encounters.db`.)
+
+Shiny encounters are always stored, all other encounters only if `log_encounters` is enabled
+in `logging.yml`.
+
+Each encounter is stored with the log entry created by `TotalStats.get_log_obj()`, as well as
+a couple of indexed columns (species, shiny value, IVs, nature, ...) so that it can be queried
+efficiently even after millions of encounters.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+# Mapping of query parameters to the column they filter on, and the operator used to compare.
+_filters = {
+    "species": ("species", "="),
+    "nature": ("nature", "="),
+    "phase": ("phase", "="),
+    "is_shiny": ("is_shiny", "="),
+    "min_iv_sum": ("iv_sum", ">="),
+    "max_iv_sum": ("iv_sum", "<="),
+    "min_shiny_value": ("shiny_value", ">="),
+    "max_shiny_value": ("shiny_value", "<="),
+    "since": ("time_encountered", ">="),
+    "until": ("time_encountered", "<="),
+}
+
+_sortable_columns = ["id", "time_encountered", "shiny_value", "iv_sum", "level"]
+
+_schema = """
+    CREATE TABLE IF NOT EXISTS encounters (
+        id INTEGER PRIMARY KEY,
+        time_encountered REAL NOT NULL,
+        phase INTEGER NOT NULL,
+        species TEXT NOT NULL,
+        personality_value INTEGER NOT NULL,
+        shiny_value INTEGER NOT NULL,
+        is_shiny INTEGER NOT NULL,
+        iv_sum INTEGER NOT NULL,
+        iv_hp INTEGER NOT NULL,
+        iv_attack INTEGER NOT NULL,
+        iv_defence INTEGER NOT NULL,
+        iv_speed INTEGER NOT NULL,
+        iv_special_attack INTEGER NOT NULL,
+        iv_special_defence INTEGER NOT NULL,
+        nature TEXT NOT NULL,
+        level INTEGER NOT NULL,
+        log_entry TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS encounters_species ON encounters (species, phase);
+    CREATE INDEX IF NOT EXISTS encounters_shiny_value ON encounters (shiny_value);
+    CREATE INDEX IF NOT EXISTS encounters_iv_sum ON encounters (iv_sum);
+    CREATE INDEX IF NOT EXISTS encounters_nature ON encounters (nature);
+    CREATE INDEX IF NOT EXISTS encounters_time ON encounters (time_encountered);
+    CREATE INDEX IF NOT EXISTS encounters_shinies ON encounters (is_shiny) WHERE is_shiny = 1;
+"""
+
+
+def _get_row(log_entry: dict) -> tuple:
+    pokemon = log_entry["pokemon"]
+    ivs = pokemon["IVs"]
+    return (
+        log_entry["time_encountered"],
+        log_entry["snapshot_stats"]["total_shiny_encounters"],
+        pokemon["name"],
+        pokemon["pid"],
+        pokemon["shinyValue"],
+        1 if pokemon["shiny"] else 0,
+        pokemon["IVSum"],
+        ivs["hp"],
+        ivs["attack"],
+        ivs["defense"],
+        ivs["speed"],
+        ivs["spAttack"],
+        ivs["spDefense"],
+        pokemon["nature"],
+        pokemon["level"],
+        json.dumps(log_entry),
+    )
+
+
+class EncounterDatabase:
+    def __init__(self, database_file: Path):
+        self.database_file = database_file
+        # SQLite connections cannot be shared between threads, and this is being used both by the
+        # main thread (logging encounters) and by the HTTP server's threads (querying them.)
+        self._connections = threading.local()
+
+        self.is_new_database = not database_file.exists()
+        self._get_connection().executescript(_schema)
+
+    def _get_connection(self) -> sqlite3.Connection:
+        connection = getattr(self._connections, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.database_file)
+            connection.row_factory = sqlite3.Row
+            # Write-ahead logging allows the HTTP server to read while the bot is writing, and with
+            # `synchronous = NORMAL` a commit does not need to wait for the disk.
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            self._connections.connection = connection
+        return connection
+
+    def add_encounter(self, log_entry: dict) -> None:
+        """
+        :param log_entry: An encounter log entry as created by `TotalStats.get_log_obj()`
+        """
+        self.add_encounters([log_entry])
+
+    def add_encounters(self, log_entries: list[dict], skip_invalid_entries: bool = False) -> int:
+        """
+        :param log_entries: A list of encounter log entries as created by `TotalStats.get_log_obj()`
+        :param skip_invalid_entries: Whether entries that are missing some data (e.g. because they have
+                                     been written by an older version of the bot) should be skipped
+                                     rather than raising an exception
+        :return: Number of entries that have been skipped
+        """
+        rows = []
+        for log_entry in log_entries:
+            try:
+                rows.append(_get_row(log_entry))
+            except (KeyError, TypeError):
+                if not skip_invalid_entries:
+                    raise
+
+        connection = self._get_connection()
+        with connection:
+            connection.executemany(
+                """
+                INSERT INTO encounters (
+                    time_encountered, phase, species, personality_value, shiny_value, is_shiny,
+                    iv_sum, iv_hp, iv_attack, iv_defence, iv_speed, iv_special_attack, iv_special_defence,
+                    nature, level, log_entry
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+        return len(log_entries) - len(rows)
+
+    def _build_where_clause(self, filters: dict) -> tuple[str, list]:
+        conditions = []
+        parameters = []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            if name not in _filters:
+                raise ValueError(f"Unknown filter: `{name}`")
+            column, operator = _filters[name]
+            conditions.append(f"{column} {operator} ?")
+            parameters.append(int(value) if isinstance(value, bool) else value)
+
+        if len(conditions) == 0:
+            return "", parameters
+        return "WHERE " + " AND ".join(conditions), parameters
+
+    def query_encounters(
+        self, limit: int = 10, offset: int = 0, order_by: str = "id", descending: bool = True, **filters
+    ) -> list[dict]:
+        """
+        Returns encounter log entries matching all the given filters.
+
+        Example: `query_encounters(species="Ralts", min_iv_sum=186)` returns all 31-IV Ralts.
+
+        :param limit: Maximum number of entries to return
+        :param offset: Number of matching entries to skip (for paging)
+        :param order_by: Column to sort by (one of `id`, `time_encountered`, `shiny_value`, `iv_sum`, `level`)
+        :param descending: Whether to sort in descending order (i.e. newest/highest first)
+        :param filters: Any of `species`, `nature`, `phase`, `is_shiny`, `min_iv_sum`, `max_iv_sum`,
+                        `min_shiny_value`, `max_shiny_value`, `since` and `until` (Unix timestamps)
+        :return: List of encounter log entries in the format of `TotalStats.get_log_obj()`
+        """
+        if order_by not in _sortable_columns:
+            raise ValueError(f"Cannot sort by `{order_by}`, must be one of: {', '.join(_sortable_columns)}")
+
+        where, parameters = self._build_where_clause(filters)
+        cursor = self._get_connection().execute(
+            f"SELECT log_entry FROM encounters {where} "
+            f"ORDER BY {order_by} {'DESC' if descending else 'ASC'}, id {'DESC' if descending else 'ASC'} "
+            f"LIMIT ? OFFSET ?",
+            [*parameters, limit, offset],
+        )
+        return [json.loads(row["log_entry"]) for row in cursor]
+
+    def count_encounters(self, **filters) -> int:
+        """
+        :param filters: Same as for `query_encounters()`
+        :return: Number of encounters matching the given filters
+        """
+        where, parameters = self._build_where_clause(filters)
+        return self._get_connection().execute(f"SELECT COUNT(*) FROM encounters {where}", parameters).fetchone()[0]
+
+    def get_lowest_shiny_value_per_species(self, phase: int | None = None) -> dict[str, int]:
+        """
+        :param phase: Only consider encounters of this phase (= number of shinies encountered before)
+        :return: The lowest shiny value that has been encountered for each species, by species name
+        """
+        where, parameters = self._build_where_clause({"phase": phase})
+        cursor = self._get_connection().execute(
+            f"SELECT species, MIN(shiny_value) FROM encounters {where} GROUP BY species", parameters
+        )
+        return {species: shiny_value for species, shiny_value in cursor}
+
+    def get_highest_iv_sum_per_species(self, phase: int | None = None) -> dict[str, int]:
+        """
+        :param phase: Only consider encounters of this phase (= number of shinies encountered before)
+        :return: The highest IV sum that has been encountered for each species, by species name
+        """
+        where, parameters = self._build_where_clause({"phase": phase})
+        cursor = self._get_connection().execute(
+            f"SELECT species, MAX(iv_sum) FROM encounters {where} GROUP BY species", parameters
+        )
+        return {species: iv_sum for species, iv_sum in cursor}
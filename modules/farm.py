@@ -0,0 +1,330 @@
+"""
+Headless 'farm' runner that hunts on several profiles at once, using one process per profile.
+
+Each worker process loads its own `LibmgbaEmulator` and runs the normal `main_loop()`, just
+without any Tk window. Workers report their performance back to the supervisor process, which
+renders a combined status table and restarts workers that have crashed.
+"""
+
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from dataclasses import dataclass, field
+
+from rich.live import Live
+from rich.table import Table
+
+from modules.console import console
+
+# How often (in seconds) workers send a status update to the supervisor.
+status_report_interval = 1.0
+
+# How long (in seconds) to wait before restarting a crashed worker. This grows with every
+# consecutive crash (up to `max_restart_delay`) so that a profile that crashes on startup
+# does not eat up a whole CPU core restarting over and over again.
+restart_delay = 5.0
+max_restart_delay = 300.0
+
+# How long (in seconds) to wait for workers to save their state after the farm has been stopped.
+shutdown_timeout = 30.0
+
+
+@dataclass
+class FarmSettings:
+    profile_names: list[str]
+    bot_mode: str = "Manual"
+    emulation_speed: int = 0
+    no_video: bool = True
+
+
+class _WorkerReporter:
+    """
+    This is used as the emulator's frame callback inside a worker process. It replaces the
+    GUI's `EmulatorScreen.update()` and sends a status update to the supervisor once per
+    `status_report_interval`.
+    """
+
+    def __init__(self, profile_name: str, status_queue: multiprocessing.Queue, stop_event):
+        self._profile_name = profile_name
+        self._status_queue = status_queue
+        self._stop_event = stop_event
+        self._stop_requested = False
+        self._next_report_time = 0.0
+
+    def on_frame(self) -> None:
+        if self._stop_requested:
+            # Keep raising `SystemExit` until it reaches the main loop, in case a bot mode
+            # swallowed the first one.
+            sys.exit(0)
+
+        now = time.time()
+        if now < self._next_report_time:
+            return
+        self._next_report_time = now + status_report_interval
+
+        if self._stop_event.is_set():
+            self._stop_requested = True
+            sys.exit(0)
+
+        from modules.context import context
+        from modules.stats import total_stats
+
+        try:
+            self._status_queue.put_nowait(
+                {
+                    "profile": self._profile_name,
+                    "pid": os.getpid(),
+                    "bot_mode": context.bot_mode,
+                    "fps": context.emulator.get_current_fps(),
+                    "frame_count": context.emulator.get_frame_count(),
+                    "encounters": total_stats.get_session_encounters(),
+                    "encounter_rate": total_stats.get_encounter_rate(),
+                    "time": now,
+                }
+            )
+        except Exception:
+            # The supervisor might already be gone, in which case there is nobody to report to.
+            pass
+
+
+def _run_worker(profile_name: str, settings: FarmSettings, status_queue: multiprocessing.Queue, stop_event) -> None:
+    """
+    Entry point of a worker process. Loads a single profile and runs the bot's main loop on it.
+
+    This needs to be a module-level function so that it can be pickled on platforms that use the
+    `spawn` start method (i.e. Windows.)
+    """
+    # Ctrl+C is handled by the supervisor, which will then ask all workers to shut down gracefully
+    # (so that they can store their current state.)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from modules.context import context
+    from modules.game import set_rom
+    from modules.libmgba import LibmgbaEmulator
+    from modules.main import main_loop
+    from modules.profiles import load_profile_by_name
+
+    profile = load_profile_by_name(profile_name)
+
+    # Workers all share the supervisor's terminal, so their console output would just mess up
+    # the status table. Instead, each worker logs into a file inside its profile directory.
+    log_file = open(profile.path / "farm.log", "a", encoding="utf-8", buffering=1)
+    sys.stdout = log_file
+    sys.stderr = log_file
+    console.file = log_file
+
+    context.profile = profile
+    context.config.load(profile.path, strict=False)
+    # The HTTP server and Discord threads are not daemon threads, so they would keep the worker process
+    # alive after the main loop has exited (and all workers would try to bind the same port anyway.)
+    obs_config = context.config.obs
+    context.config.obs = obs_config.model_copy(
+        update={"http_server": obs_config.http_server.model_copy(update={"enable": False})}
+    )
+    context.config.discord = context.config.discord.model_copy(update={"rich_presence": False})
+    set_rom(profile.rom)
+
+    reporter = _WorkerReporter(profile_name, status_queue, stop_event)
+    context.emulator = LibmgbaEmulator(profile, reporter.on_frame)
+    context.audio = False
+    context.video = not settings.no_video
+    context.emulation_speed = settings.emulation_speed
+    context.bot_mode = settings.bot_mode
+
+    try:
+        main_loop()
+    finally:
+        from modules.csv import close_encounter_log
+
+        close_encounter_log()
+        # `multiprocessing` ends worker processes with `os._exit()`, so the emulator's `atexit` handler
+        # would never get to save the current state.
+        context.emulator.shutdown()
+
+
+@dataclass
+class FarmWorker:
+    profile_name: str
+    process: multiprocessing.Process | None = None
+    restarts: int = 0
+    consecutive_crashes: int = 0
+    last_exit_code: int | None = None
+    restart_at: float | None = None
+    started_at: float = 0.0
+    status: dict = field(default_factory=dict)
+
+    @property
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    @property
+    def state(self) -> str:
+        if self.is_running:
+            return "Running"
+        elif self.restart_at is not None:
+            return f"Restarting in {max(0, int(self.restart_at - time.time()))}s"
+        elif self.last_exit_code == 0:
+            return "Stopped"
+        else:
+            return "Crashed"
+
+
+class FarmSupervisor:
+    def __init__(self, settings: FarmSettings):
+        self._settings = settings
+        self._context = multiprocessing.get_context("spawn")
+        self._status_queue = self._context.Queue()
+        self._stop_event = self._context.Event()
+        self.workers: list[FarmWorker] = [FarmWorker(name) for name in settings.profile_names]
+
+    def _start_worker(self, worker: FarmWorker) -> None:
+        worker.process = self._context.Process(
+            target=_run_worker,
+            args=(worker.profile_name, self._settings, self._status_queue, self._stop_event),
+            name=f"pokebot-farm-{worker.profile_name}",
+        )
+        worker.process.start()
+        worker.started_at = time.time()
+        worker.restart_at = None
+        worker.status = {}
+
+    def _collect_status_updates(self) -> None:
+        while not self._status_queue.empty():
+            try:
+                update = self._status_queue.get_nowait()
+            except Exception:
+                break
+            for worker in self.workers:
+                if worker.profile_name == update["profile"]:
+                    worker.status = update
+                    break
+
+    def _check_workers(self) -> None:
+        now = time.time()
+        for worker in self.workers:
+            if worker.is_running:
+                # Only count a worker as having recovered once it has been running for a while.
+                if worker.consecutive_crashes > 0 and now - worker.started_at > max_restart_delay:
+                    worker.consecutive_crashes = 0
+                continue
+
+            if worker.restart_at is not None:
+                if now >= worker.restart_at:
+                    worker.restarts += 1
+                    self._start_worker(worker)
+                continue
+
+            if worker.process is not None and worker.last_exit_code is None:
+                worker.last_exit_code = worker.process.exitcode
+                worker.process = None
+                if worker.last_exit_code != 0:
+                    worker.consecutive_crashes += 1
+                    delay = min(max_restart_delay, restart_delay * 2 ** (worker.consecutive_crashes - 1))
+                    worker.restart_at = now + delay
+                    worker.last_exit_code = None
+
+    def render(self) -> Table:
+        table = Table(title=f"Farm ({len(self.workers)} profiles)", expand=False)
+        table.add_column("Profile")
+        table.add_column("PID", justify="right")
+        table.add_column("State")
+        table.add_column("Mode")
+        table.add_column("FPS", justify="right")
+        table.add_column("Encounters", justify="right")
+        table.add_column("Enc./h", justify="right")
+        table.add_column("Restarts", justify="right")
+
+        total_fps = 0
+        total_encounters = 0
+        total_encounter_rate = 0
+        for worker in self.workers:
+            status = worker.status if worker.is_running else {}
+            total_fps += status.get("fps", 0)
+            total_encounters += status.get("encounters", 0)
+            total_encounter_rate += status.get("encounter_rate", 0)
+            table.add_row(
+                worker.profile_name,
+                str(worker.process.pid) if worker.is_running else "-",
+                worker.state,
+                status.get("bot_mode", "-"),
+                f"{status.get('fps', 0):,}",
+                f"{status.get('encounters', 0):,}",
+                f"{status.get('encounter_rate', 0):,}",
+                f"{worker.restarts:,}",
+            )
+
+        table.add_section()
+        table.add_row(
+            "[bold]Total[/]",
+            "",
+            f"{sum(1 for w in self.workers if w.is_running)}/{len(self.workers)} running",
+            "",
+            f"[bold]{total_fps:,}[/]",
+            f"[bold]{total_encounters:,}[/]",
+            f"[bold]{total_encounter_rate:,}[/]",
+            f"{sum(w.restarts for w in self.workers):,}",
+        )
+        return table
+
+    def run(self) -> None:
+        cpu_count = os.cpu_count() or 1
+        if len(self.workers) > cpu_count:
+            console.print(
+                f"[yellow]Running {len(self.workers)} profiles on {cpu_count} CPU cores. "
+                f"Workers will have to share cores, so each of them will run slower.[/]"
+            )
+
+        for worker in self.workers:
+            self._start_worker(worker)
+
+        try:
+            with Live(self.render(), console=console, refresh_per_second=1) as live:
+                while any(w.is_running or w.restart_at is not None for w in self.workers):
+                    self._collect_status_updates()
+                    self._check_workers()
+                    live.update(self.render())
+                    time.sleep(status_report_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        """
+        Asks all workers to stop (which makes them store their current emulator state) and
+        waits for them to exit. Workers that do not react in time will be killed.
+        """
+        console.print("[yellow]Stopping all farm workers...[/]")
+        self._stop_event.set()
+        deadline = time.time() + shutdown_timeout
+        for worker in self.workers:
+            worker.restart_at = None
+            if worker.process is not None:
+                worker.process.join(max(0.0, deadline - time.time()))
+                if worker.process.is_alive():
+                    console.print(f"[red]Worker for profile `{worker.profile_name}` did not stop, killing it.[/]")
+                    worker.process.terminate()
+                    worker.process.join()
+
+
+def run_farm(settings: FarmSettings) -> None:
+    """
+    Runs all profiles in `settings.profile_names` in parallel, each in its own process, until
+    the user presses Ctrl+C.
+
+    :param settings: Which profiles to run, and with what bot mode/emulation speed
+    """
+    from modules.profiles import profile_directory_exists
+
+    missing_profiles = [name for name in settings.profile_names if not profile_directory_exists(name)]
+    if missing_profiles:
+        console.print(f"[bold red]Profile(s) not found:[/] [red]{', '.join(missing_profiles)}[/]")
+        sys.exit(1)
+
+    if len(set(settings.profile_names)) != len(settings.profile_names):
+        console.print("[bold red]Each profile can only be run by a single farm worker.[/]")
+        sys.exit(1)
+
+    FarmSupervisor(settings).run()
@@ -1,9 +1,9 @@
-import json
 import os
 from pathlib import Path
 
 from modules.context import context
 from modules.pokemon import Pokemon
+from modules.rng_state_history import RngStateHistory
 
 
 def read_file(file: Path) -> str | None:
@@ -74,20 +74,18 @@ def save_pk3(pokemon: Pokemon) -> None:
         binary_file.write(pokemon.data)
 
 
-def get_rng_state_history() -> list:
-    default = []
-    try:
-        file = read_file(context.profile.path / "soft_reset_frames.json")
-        data = json.loads(file) if file else default
-        return data
-    except SystemExit:
-        raise
-    except:
-        return default
+_rng_state_history: RngStateHistory | None = None
 
 
-def save_rng_state_history(data: list) -> bool:
-    if write_file(context.profile.path / "soft_reset_frames.json", json.dumps(data)):
-        return True
-    else:
-        return False
+def get_rng_state_history() -> RngStateHistory:
+    """
+    :return: The profile's history of RNG states that have already been used for soft resets
+    """
+    global _rng_state_history
+
+    history_file = context.profile.path / "soft_reset_frames.bin"
+    if _rng_state_history is None or _rng_state_history.file != history_file:
+        if _rng_state_history is not None:
+            _rng_state_history.close()
+        _rng_state_history = RngStateHistory(history_file, context.profile.path / "soft_reset_frames.json")
+    return _rng_state_history
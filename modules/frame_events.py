@@ -0,0 +1,133 @@
+"""
+Publish/subscribe mechanism for changes to the game's state.
+
+At the end of every emulated frame, this checks whether anything that has been subscribed to
+has changed, and if so notifies the subscribers. Changes are only looked for while there is at
+least one subscriber for an event, so nothing gets read from memory if nobody is listening.
+
+Subscribers are called from the main (emulator) thread, directly after the frame has been
+emulated. So they can safely read from the emulator, but they should return quickly as the
+emulation is paused while they run. Subscribers that live in another thread (such as the HTTP
+server) should just hand the data over using a queue.
+"""
+
+from enum import Enum, auto
+from threading import Lock
+
+from modules.context import context
+from modules.memory import GameState, get_game_state, read_symbol
+from modules.player import get_player_avatar
+from modules.pokemon import get_opponent, get_party
+
+
+class FrameEvent(Enum):
+    # Called after every frame, without any arguments.
+    Frame = auto()
+    # Called with the new `GameState`.
+    GameStateChanged = auto()
+    # Called with the new party (list of `Pokemon`.)
+    PartyChanged = auto()
+    # Called with the new opponent `Pokemon`, or with `None` once a battle has ended.
+    OpponentChanged = auto()
+    # Called with the `PlayerAvatar` after the player has entered a different map.
+    MapChanged = auto()
+    # Called with the `PlayerAvatar` after the player has moved to a different tile.
+    MapTileChanged = auto()
+
+
+# Used as the 'previous value' of an event that has not been checked yet, so that subscribers do
+# not get notified about a 'change' during the first frame after subscribing.
+_unknown = object()
+
+_subscribers: dict[FrameEvent, tuple[callable, ...]] = {event: () for event in FrameEvent}
+_subscribers_lock = Lock()
+_previous_values: dict[FrameEvent, object] = {event: _unknown for event in FrameEvent}
+_is_registered: bool = False
+
+
+def subscribe(event: FrameEvent, callback: callable) -> callable:
+    """
+    Registers a function to be called whenever `event` happens. This can be called from
+    any thread.
+
+    :param event: The event to subscribe to
+    :param callback: Function to call, see `FrameEvent` for the arguments it receives
+    :return: A function that removes this subscription again
+    """
+    global _is_registered
+
+    with _subscribers_lock:
+        # The tuple is replaced rather than modified so that the main thread can keep iterating
+        # over the old one without needing to acquire the lock.
+        _subscribers[event] = (*_subscribers[event], callback)
+        if not _is_registered:
+            context.emulator.add_frame_listener(_dispatch_frame_events)
+            _is_registered = True
+
+    def unsubscribe() -> None:
+        with _subscribers_lock:
+            subscribers = list(_subscribers[event])
+            if callback in subscribers:
+                subscribers.remove(callback)
+            _subscribers[event] = tuple(subscribers)
+
+    return unsubscribe
+
+
+def _has_changed(event: FrameEvent, new_value: object) -> bool:
+    previous_value = _previous_values[event]
+    _previous_values[event] = new_value
+    return previous_value is not _unknown and previous_value != new_value
+
+
+def _publish(event: FrameEvent, *args) -> None:
+    for callback in _subscribers[event]:
+        callback(*args)
+
+
+def _dispatch_frame_events() -> None:
+    # Forget the previous values of events nobody is listening to anymore, so that a future
+    # subscriber does not get notified about a change that happened long ago.
+    for event in FrameEvent:
+        if not _subscribers[event]:
+            _previous_values[event] = _unknown
+
+    _publish(FrameEvent.Frame)
+
+    needs_game_state = (
+        _subscribers[FrameEvent.GameStateChanged]
+        or _subscribers[FrameEvent.OpponentChanged]
+        or _subscribers[FrameEvent.MapChanged]
+        or _subscribers[FrameEvent.MapTileChanged]
+    )
+    if not needs_game_state and not _subscribers[FrameEvent.PartyChanged]:
+        return
+
+    if _subscribers[FrameEvent.PartyChanged]:
+        # Comparing the raw party data is a lot cheaper than decoding it every frame.
+        party_data = read_symbol("gPlayerPartyCount", size=1) + read_symbol("gPlayerParty")
+        if _has_changed(FrameEvent.PartyChanged, party_data):
+            _publish(FrameEvent.PartyChanged, get_party())
+
+    if not needs_game_state:
+        return
+
+    game_state = get_game_state()
+    if _subscribers[FrameEvent.GameStateChanged] and _has_changed(FrameEvent.GameStateChanged, game_state):
+        _publish(FrameEvent.GameStateChanged, game_state)
+
+    if _subscribers[FrameEvent.OpponentChanged]:
+        opponent_data = read_symbol("gEnemyParty", size=100) if game_state == GameState.BATTLE else None
+        if _has_changed(FrameEvent.OpponentChanged, opponent_data):
+            _publish(FrameEvent.OpponentChanged, get_opponent() if opponent_data is not None else None)
+
+    if game_state == GameState.OVERWORLD and (
+        _subscribers[FrameEvent.MapChanged] or _subscribers[FrameEvent.MapTileChanged]
+    ):
+        player_avatar = get_player_avatar()
+        if _subscribers[FrameEvent.MapChanged]:
+            if _has_changed(FrameEvent.MapChanged, player_avatar.map_group_and_number):
+                _publish(FrameEvent.MapChanged, player_avatar)
+        if _subscribers[FrameEvent.MapTileChanged]:
+            if _has_changed(FrameEvent.MapTileChanged, player_avatar.local_coordinates):
+                _publish(FrameEvent.MapTileChanged, player_avatar)
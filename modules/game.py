@@ -1,22 +1,74 @@
+import hashlib
 import json
+import os
+from functools import lru_cache
+from pathlib import Path
 from typing import Literal
 
 from modules.roms import ROM, ROMLanguage
-from modules.runtime import get_data_path
-
-_symbols: dict[str, tuple[int, int]] = {}
-_reverse_symbols: dict[int, tuple[str, str, int]] = {}
+from modules.runtime import get_cache_path, get_data_path
+from modules.symbol_table import (
+    SymbolTable,
+    ReverseSymbolTable,
+    compile_symbols,
+    open_compiled_symbols,
+    CompiledSymbols,
+)
+
+_symbols: SymbolTable = SymbolTable()
+_reverse_symbols: ReverseSymbolTable = ReverseSymbolTable()
 _event_flags: dict[str, tuple[int, int]] = {}
 _character_table_international: list[str] = []
 _character_table_japanese: list[str] = []
 _current_character_table: list[str] = []
+_rom_change_handlers: list[callable] = []
 
 
-def _load_symbols(symbols_file: str, language: ROMLanguage) -> None:
-    global _symbols, _reverse_symbols
+def _get_symbols_source_files(symbols_file: str) -> list[Path]:
+    files = [get_data_path() / "symbols" / symbols_file, get_data_path() / "symbols" / "patches" / symbols_file]
+    language_patch_path = get_data_path() / "symbols" / "patches" / "language" / symbols_file.replace(".sym", ".json")
+    if language_patch_path.is_file():
+        files.append(language_patch_path)
+    return files
+
 
-    _symbols.clear()
-    _reverse_symbols.clear()
+def _load_symbols(symbols_file: str, language: ROMLanguage) -> None:
+    """
+    Loads the symbol table for a game. Parsing the `.sym` files takes a while, so the result is
+    stored in a compiled format in the cache directory (see `modules/symbol_table.py`) and will
+    be used for as long as the source files do not change.
+    """
+    sha1 = hashlib.sha1(str(language).encode("utf-8"))
+    for file in _get_symbols_source_files(symbols_file):
+        sha1.update(file.read_bytes())
+    source_hash = sha1.digest()
+
+    cache_file = get_cache_path() / "symbols" / f"{symbols_file}.{language}.bin"
+    compiled_symbols = open_compiled_symbols(cache_file, source_hash)
+    if compiled_symbols is None:
+        symbols, reverse_symbols = _parse_symbols(symbols_file, language)
+        compiled_data = compile_symbols(symbols, reverse_symbols, source_hash)
+        compiled_symbols = CompiledSymbols(compiled_data)
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            # Several bot processes might be doing this at the same time (see `modules/farm.py`.)
+            temporary_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+            temporary_file.write_bytes(compiled_data)
+            temporary_file.replace(cache_file)
+        except OSError:
+            # Not being able to write the cache only means that the next start will be slower.
+            pass
+
+    _symbols.set_compiled_symbols(compiled_symbols)
+    _reverse_symbols.set_compiled_symbols(compiled_symbols)
+    _find_containing_symbol.cache_clear()
+
+
+def _parse_symbols(
+    symbols_file: str, language: ROMLanguage
+) -> tuple[dict[str, tuple[int, int]], dict[int, tuple[str, str, int]]]:
+    symbols = {}
+    reverse_symbols = {}
     for d in [get_data_path() / "symbols", get_data_path() / "symbols" / "patches"]:
         for s in open(d / symbols_file).readlines():
             address, _, length, label = s.split(" ")
@@ -25,9 +77,9 @@ def _load_symbols(symbols_file: str, language: ROMLanguage) -> None:
             length = int(length, 16)
             label = label.strip()
 
-            _symbols[label.upper()] = (address, length)
-            if address not in _reverse_symbols or _reverse_symbols[address][2] == 0 and length > 0:
-                _reverse_symbols[address] = (label.upper(), label, length)
+            symbols[label.upper()] = (address, length)
+            if address not in reverse_symbols or reverse_symbols[address][2] == 0 and length > 0:
+                reverse_symbols[address] = (label.upper(), label, length)
 
     language_code = str(language)
     language_patch_file = symbols_file.replace(".sym", ".json")
@@ -37,13 +89,15 @@ def _load_symbols(symbols_file: str, language: ROMLanguage) -> None:
             language_patches = json.load(file)
         for item in language_patches:
             if language_code in language_patches[item]:
-                _symbols[item.upper()] = (int(language_patches[item][language_code], 16), _symbols[item.upper()][1])
-                _reverse_symbols[int(language_patches[item][language_code], 16)] = (
+                symbols[item.upper()] = (int(language_patches[item][language_code], 16), symbols[item.upper()][1])
+                reverse_symbols[int(language_patches[item][language_code], 16)] = (
                     item.upper(),
                     item,
-                    _symbols[item.upper()][1],
+                    symbols[item.upper()][1],
                 )
 
+    return symbols, reverse_symbols
+
 
 def _load_event_flags(flags_file: str) -> None:  # TODO Japanese ROMs not working
     global _event_flags
@@ -131,7 +185,7 @@ def _prepare_character_tables() -> None:
 
 
 def set_rom(rom: ROM) -> None:
-    global _symbols, _current_character_table
+    global _current_character_table
 
     match rom.game_code:
         case "AXV":
@@ -196,14 +250,27 @@ def set_rom(rom: ROM) -> None:
     else:
         _current_character_table = _character_table_international
 
+    for handler in _rom_change_handlers:
+        handler()
+
+
+def on_rom_change(handler: callable) -> None:
+    """
+    Registers a function that will be called whenever a (different) ROM has been loaded, after its
+    symbols have been loaded. This can be used to precompute data that depends on symbol addresses.
+
+    :param handler: Function that takes no arguments
+    """
+    _rom_change_handlers.append(handler)
+
 
 def get_symbol(symbol_name: str) -> tuple[int, int]:
     canonical_name = symbol_name.strip().upper()
-    if canonical_name not in _symbols:
+    try:
+        return _symbols[canonical_name]
+    except KeyError:
         raise RuntimeError(f"Unknown symbol: {symbol_name}!")
 
-    return _symbols[canonical_name]
-
 
 def get_symbol_name(address: int, pretty_name: bool = False) -> str:
     """
@@ -216,6 +283,37 @@ def get_symbol_name(address: int, pretty_name: bool = False) -> str:
     return _reverse_symbols.get(address, ("", ""))[0 if not pretty_name else 1]
 
 
+@lru_cache(maxsize=512)
+def _find_containing_symbol(address: int) -> tuple[str, str, int] | None:
+    result = _reverse_symbols.find_containing_symbol(address)
+    if result is None:
+        return None
+    start_address, (name, pretty_name, _) = result
+    return name, pretty_name, address - start_address
+
+
+def get_symbol_name_with_offset(address: int, pretty_name: bool = False) -> str:
+    """
+    Like `get_symbol_name()`, but also works for addresses that point _into_ a symbol rather than
+    to its start (such as a pointer to some element of an array, or into a script.)
+
+    :param address: Any memory address
+    :param pretty_name: Whether to return the name in its original spelling rather than upper-case
+    :return: The symbol name, followed by `+0x...` if the address is not at the start of the symbol,
+             or a hex representation of the address if it is not part of any symbol
+    """
+    result = _find_containing_symbol(address)
+    if result is None:
+        return hex(address)
+
+    name, original_name, offset = result
+    symbol = original_name if pretty_name else name
+    if offset == 0:
+        return symbol
+    else:
+        return f"{symbol}+{hex(offset)}"
+
+
 def get_event_flag_offset(flag_name: str) -> tuple[int, int]:
     return _event_flags[flag_name]
 
@@ -92,6 +92,9 @@ class PokebotGui:
         As a lazy workaround, this function calls the shutdown callbacks directly and then calls
         `os._exit()` which will definitely terminate the process.
         """
+        from modules.csv import close_encounter_log
+
+        close_encounter_log()
         if context.emulator:
             context.emulator.shutdown()
             context.emulator = None
@@ -140,6 +143,7 @@ class PokebotGui:
             context.audio = not self._startup_settings.no_audio
             context.video = not self._startup_settings.no_video
             context.emulation_speed = self._startup_settings.emulation_speed
+            context.emulator.set_render_interval(self._startup_settings.render_interval)
             context.debug = self._startup_settings.debug
             context.bot_mode = self._startup_settings.bot_mode
 
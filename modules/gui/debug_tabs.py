@@ -14,7 +14,7 @@ from modules.map import get_map_data_for_current_position, get_map_data, get_map
 from modules.memory import (
     get_symbol,
     read_symbol,
-    get_symbol_name,
+    get_symbol_name_with_offset,
     game_has_started,
     unpack_uint16,
     unpack_uint32,
@@ -284,12 +284,8 @@ class TasksTab(DebugTab):
         cb1_addr = max(0, unpack_uint32(callback1) - 1)
         cb2_addr = max(0, unpack_uint32(callback2) - 1)
 
-        cb1_symbol = get_symbol_name(cb1_addr, pretty_name=True)
-        if cb1_symbol == "":
-            cb1_symbol = hex(cb1_addr)
-        cb2_symbol = get_symbol_name(cb1_addr, pretty_name=True)
-        if cb2_symbol == "":
-            cb2_symbol = hex(cb2_addr)
+        cb1_symbol = get_symbol_name_with_offset(cb1_addr, pretty_name=True)
+        cb2_symbol = get_symbol_name_with_offset(cb2_addr, pretty_name=True)
 
         self._cb1_label.config(text=cb1_symbol)
         self._cb2_label.config(text=cb2_symbol)
@@ -55,7 +55,7 @@ class PerformanceTracker:
     def time_since_last_render(self) -> int:
         return time.time_ns() - self.last_render_time
 
-    def track_frame(self) -> None:
+    def track_frame(self, number_of_frames: int = 1) -> None:
         now = time.time_ns()
         self.time_spent_total += now - self.last_frame_time
         self.last_frame_time = now
@@ -72,12 +72,107 @@ class PerformanceTracker:
             self.time_spent_total = 0
             self.time_spent_emulating = 0
 
-        self.frame_counter += 1
+        self.frame_counter += number_of_frames
 
     def time_since_last_frame(self) -> int:
         return time.time_ns() - self.last_frame_time
 
 
+class FramePacer:
+    """
+    Waits between frames so that the emulation runs at a given speed, for when the emulator is
+    throttled but its speed is not already being limited by audio playback.
+
+    Rather than sleeping for a fixed amount of time after each frame, this keeps track of when each
+    frame is due according to a monotonic clock. The OS is free to sleep for longer than requested,
+    but any time overslept for one frame is made up for by sleeping less for the next one, so the
+    overall rate does not drift. If the emulation falls behind by more than `max_lag_ns` (e.g.
+    because the bot was busy), the schedule is reset rather than catching up with a burst of frames.
+    """
+
+    # A GBA frame takes 280,896 CPU cycles at 16.78 MHz, i.e. the GBA runs at ~59.73 FPS.
+    frame_duration_ns: int = 280_896 * 1_000_000_000 // 16_777_216
+    max_lag_ns: int = 100_000_000
+
+    def __init__(self):
+        self._next_frame_time: int | None = None
+
+    def reset(self) -> None:
+        self._next_frame_time = None
+
+    def wait_for_next_frame(self, speed_factor: float) -> None:
+        now = time.perf_counter_ns()
+        if self._next_frame_time is None or now - self._next_frame_time > self.max_lag_ns:
+            self._next_frame_time = now
+        self._next_frame_time += int(self.frame_duration_ns / speed_factor)
+
+        remaining_time = self._next_frame_time - now
+        if remaining_time > 0:
+            time.sleep(remaining_time / 1_000_000_000)
+
+
+class SnapshotPool:
+    """
+    A pool of pre-allocated native buffers that hold raw emulator states.
+
+    Unlike `get_save_state()`/`load_save_state()`, taking and restoring a snapshot does not go
+    through an mGBA `VFile` and does not allocate any memory (unless all buffers are in use, in
+    which case the pool grows by one buffer.) Snapshots are identified by a handle, which is just
+    the index of the buffer that holds it.
+
+    Snapshots only live in memory and are not meant to be persisted: they do not contain any
+    metadata that a save state file would have.
+    """
+
+    def __init__(self, core: mgba.core.Core, initial_size: int = 4):
+        self._native_core = core._core
+        self._state_size: int = self._native_core.stateSize(self._native_core)
+        self._buffers: list = []
+        self._free_handles: list[int] = []
+        for _ in range(initial_size):
+            self._allocate_buffer()
+
+    def _allocate_buffer(self) -> None:
+        self._buffers.append(ffi.new("unsigned char[]", self._state_size))
+        self._free_handles.append(len(self._buffers) - 1)
+
+    def take(self) -> int:
+        """
+        Stores the current emulator state in a free buffer.
+        :return: Handle of the snapshot, to be used with `restore()` and `release()`
+        """
+        if not self._free_handles:
+            self._allocate_buffer()
+        handle = self._free_handles.pop()
+        if not self._native_core.saveState(self._native_core, self._buffers[handle]):
+            self._free_handles.append(handle)
+            raise RuntimeError("Could not take a snapshot of the emulator state.")
+        return handle
+
+    def restore(self, handle: int) -> None:
+        """
+        Resets the emulator to the state stored in a snapshot. The snapshot stays valid and
+        can be restored again.
+        :param handle: Handle of the snapshot as returned by `take()`
+        """
+        if not self._native_core.loadState(self._native_core, self._buffers[handle]):
+            raise RuntimeError("Could not restore a snapshot of the emulator state.")
+
+    def release(self, handle: int) -> None:
+        """
+        Marks a snapshot's buffer as free, so it can be re-used by the next `take()`.
+        :param handle: Handle of the snapshot as returned by `take()`
+        """
+        self._free_handles.append(handle)
+
+    def get_data(self, handle: int) -> bytes:
+        """
+        :param handle: Handle of the snapshot as returned by `take()`
+        :return: A copy of the raw state data of a snapshot
+        """
+        return ffi.buffer(self._buffers[handle], self._state_size)[:]
+
+
 class LibmgbaEmulator:
     """
     This class wraps libmgba and handles the actual emulation of a game, and exposes some of the
@@ -90,6 +185,9 @@ class LibmgbaEmulator:
     _speed_factor: float = 1
     # How often a frame should be drawn to the screen (can be less frequent than the emulation rate)
     _target_seconds_per_render = 1 / 60
+    # Only every n-th frame is actually rendered by mGBA, see `set_render_interval()`
+    _render_interval: int = 1
+    _renderer_active: bool = True
 
     _audio_stream: sounddevice.RawOutputStream | None = None
 
@@ -115,9 +213,17 @@ class LibmgbaEmulator:
         self._core.load_save(self._save)
 
         self._screen = mgba.image.Image(*self._core.desired_video_dimensions())
+        # Frames that are not supposed to be rendered are drawn into this buffer instead, so that
+        # `_screen` always contains the last frame that has actually been rendered.
+        self._discarded_screen = mgba.image.Image(*self._core.desired_video_dimensions())
         self._core.set_video_buffer(self._screen)
         self._core.reset()
 
+        # This is incremented every time the emulator's memory might have changed (i.e. after every
+        # emulated frame, memory write or state load), so that callers can tell whether data they have
+        # read before is still up-to-date. See `get_memory_version()`.
+        self._memory_version = 0
+
         # Whenever the emulator closes, it stores the current state in `current_state.ss1`.
         # Load this file if it exists, to continue exactly where we left off.
         self._current_state_path = profile.path / "current_state.ss1"
@@ -126,9 +232,15 @@ class LibmgbaEmulator:
                 self.load_save_state(state_file.read())
 
         self._memory: mgba.gba.GBAMemory = self._core.memory
+        self._snapshots = SnapshotPool(self._core)
+
         self._on_frame_callback = on_frame_callback
+        self._frame_listeners: list[callable] = []
         self._performance_tracker = PerformanceTracker()
 
+        self._frame_pacer = FramePacer()
+        # Re-used for every frame's audio data, so that playing audio does not allocate a new buffer each time.
+        self._audio_buffer = bytearray(0)
         self._gba_audio = self._core.get_audio_channels()
         self._reset_audio()
 
@@ -173,6 +285,20 @@ class LibmgbaEmulator:
 
     def reset(self) -> None:
         self._core.reset()
+        self._memory_version += 1
+
+    def add_frame_listener(self, listener: callable) -> None:
+        """
+        Registers a function that is called (without any arguments) at the end of every call to
+        `run_single_frame()` and `run_frames()`, from the thread that is running the emulation.
+
+        :param listener: Function to call after each frame
+        """
+        self._frame_listeners.append(listener)
+
+    def remove_frame_listener(self, listener: callable) -> None:
+        if listener in self._frame_listeners:
+            self._frame_listeners.remove(listener)
 
     def create_save_state(self, suffix: str = "") -> None:
         states_directory = self._profile.path / "states"
@@ -214,6 +340,9 @@ class LibmgbaEmulator:
         """
         console.print("[yellow]Shutting down...[/]")
 
+        # This might be called explicitly before the `atexit` handler would run, and there is no
+        # point in saving the same state twice.
+        atexit.unregister(self.shutdown)
         self.create_save_state()
 
     def backup_current_save_game(self) -> None:
@@ -237,6 +366,16 @@ class LibmgbaEmulator:
         """
         return self._core.frame_counter
 
+    def get_memory_version(self) -> int:
+        """
+        Unlike the frame count, this also changes when memory has been written to or a save
+        state/snapshot has been loaded. So memory that has been read while this had a particular
+        value will stay valid until it changes.
+
+        :return: A number that changes whenever the emulator's memory might have been modified
+        """
+        return self._memory_version
+
     def get_image_dimensions(self) -> tuple[int, int]:
         """
         :return: The screen resolution (width, height) of the GBA
@@ -282,16 +421,52 @@ class LibmgbaEmulator:
         :param video_enabled: Whether video output is enabled or not.
         """
         self._video_enabled = video_enabled
+        self._set_renderer_active(video_enabled)
+
+    def get_render_interval(self) -> int:
+        return self._render_interval
+
+    def set_render_interval(self, render_interval: int) -> None:
+        """
+        Sets how often frames are rendered while video is enabled. With an interval of 3, only
+        every 3rd frame is rendered and the others skip rendering like they would with video
+        disabled.
 
-        self._core._native.video.renderer.disableBG[0] = not video_enabled
-        self._core._native.video.renderer.disableBG[1] = not video_enabled
-        self._core._native.video.renderer.disableBG[2] = not video_enabled
-        self._core._native.video.renderer.disableBG[3] = not video_enabled
-        self._core._native.video.renderer.disableOBJ = not video_enabled
+        The screen image (i.e. the GUI, screenshots and the video stream) always shows the most
+        recent frame that has been rendered, so it lags behind by up to `render_interval - 1` frames.
 
-        self._core._native.video.renderer.disableWIN[0] = not video_enabled
-        self._core._native.video.renderer.disableWIN[1] = not video_enabled
-        self._core._native.video.renderer.disableOBJWIN = not video_enabled
+        :param render_interval: Render every n-th frame (1 means all frames are rendered)
+        """
+        if render_interval < 1:
+            raise RuntimeError(f"Render interval must be at least 1, got {render_interval}.")
+
+        self._render_interval = render_interval
+        if render_interval == 1 and self._video_enabled:
+            self._set_renderer_active(True)
+
+    def _set_renderer_active(self, active: bool) -> None:
+        self._renderer_active = active
+
+        self._core._native.video.renderer.disableBG[0] = not active
+        self._core._native.video.renderer.disableBG[1] = not active
+        self._core._native.video.renderer.disableBG[2] = not active
+        self._core._native.video.renderer.disableBG[3] = not active
+        self._core._native.video.renderer.disableOBJ = not active
+
+        self._core._native.video.renderer.disableWIN[0] = not active
+        self._core._native.video.renderer.disableWIN[1] = not active
+        self._core._native.video.renderer.disableOBJWIN = not active
+
+        self._core.set_video_buffer(self._screen if active else self._discarded_screen)
+
+    def _prepare_renderer_for_next_frame(self) -> None:
+        """
+        Enables or disables rendering for the upcoming frame, according to the render interval.
+        """
+        if self._render_interval > 1 and self._video_enabled:
+            should_render = (self._core.frame_counter + 1) % self._render_interval == 0
+            if should_render != self._renderer_active:
+                self._set_renderer_active(should_render)
 
     def get_audio_enabled(self) -> bool:
         return self._audio_enabled
@@ -311,6 +486,7 @@ class LibmgbaEmulator:
         """
         was_throttled = self._throttled
         self._throttled = is_throttled
+        self._frame_pacer.reset()
 
         try:
             if is_throttled and not was_throttled:
@@ -333,6 +509,7 @@ class LibmgbaEmulator:
 
     def set_speed_factor(self, speed_factor: float) -> None:
         self._speed_factor = speed_factor
+        self._frame_pacer.reset()
 
         if self._audio_stream is not None:
             self._gba_audio.set_rate(self._audio_stream.samplerate // speed_factor)
@@ -353,40 +530,111 @@ class LibmgbaEmulator:
         vfile.write(state, len(state))
         vfile.seek(0, whence=0)
         self._core.load_state(vfile)
+        self._memory_version += 1
 
-    def read_bytes(self, address: int, length: int = 1) -> bytes:
+    def take_snapshot(self) -> int:
         """
-        Reads a block of memory from an arbitrary address on the system
-        bus. That means that you need to specify the full memory address
-        rather than an offset relative to the start of a given memory
-        area.
+        Takes an in-memory snapshot of the current emulator state. This is a lot cheaper than
+        `get_save_state()`, but the snapshot can only be restored by this emulator instance
+        and needs to be released with `release_snapshot()` once it is not needed anymore.
+        :return: Handle of the snapshot
+        """
+        return self._snapshots.take()
 
-        This is helpful if you are working with the symbol table or
-        pointers.
+    def restore_snapshot(self, handle: int) -> None:
+        """
+        Resets the emulator to a snapshot taken by `take_snapshot()`.
+        :param handle: Handle of the snapshot
+        """
+        self._snapshots.restore(handle)
+        self._memory_version += 1
 
-        :param address: Full memory address to read from
-        :param length: Number of bytes to read
-        :return: Data read from that memory location
+    def release_snapshot(self, handle: int) -> None:
+        """
+        Frees up the buffer used by a snapshot, which invalidates the handle.
+        :param handle: Handle of the snapshot
+        """
+        self._snapshots.release(handle)
+
+    def _get_memory_pointer(self, address: int, length: int) -> "ffi.CData":
+        """
+        Translates an address on the system bus into a pointer to the native memory
+        region that libmgba uses to back it.
+
+        :param address: Full memory address
+        :param length: Number of bytes that will be accessed, used for bounds checking
+        :return: A `char*` pointing at that address
         """
         bank = address >> 0x18
-        result = bytearray(length)
         if bank == 0x2:
             offset = address & 0x3FFFF
             if offset + length > 0x3FFFF:
                 raise RuntimeError("Illegal range: EWRAM only extends from 0x02000000 to 0x0203FFFF")
-            ffi.memmove(result, ffi.cast("char*", self._core._native.memory.wram) + offset, length)
+            return ffi.cast("char*", self._core._native.memory.wram) + offset
         elif bank == 0x3:
             offset = address & 0x7FFF
             if offset + length > 0x7FFF:
                 raise RuntimeError("Illegal range: IWRAM only extends from 0x03000000 to 0x03007FFF")
-            ffi.memmove(result, ffi.cast("char*", self._core._native.memory.iwram) + offset, length)
+            return ffi.cast("char*", self._core._native.memory.iwram) + offset
         elif bank >= 0x8:
             offset = address - 0x08000000
-            ffi.memmove(result, ffi.cast("char*", self._core._native.memory.rom) + offset, length)
+            return ffi.cast("char*", self._core._native.memory.rom) + offset
         else:
             raise RuntimeError(f"Invalid memory address for reading: {hex(address)}")
+
+    def read_bytes(self, address: int, length: int = 1) -> bytes:
+        """
+        Reads a block of memory from an arbitrary address on the system
+        bus. That means that you need to specify the full memory address
+        rather than an offset relative to the start of a given memory
+        area.
+
+        This is helpful if you are working with the symbol table or
+        pointers.
+
+        :param address: Full memory address to read from
+        :param length: Number of bytes to read
+        :return: Data read from that memory location
+        """
+        result = bytearray(length)
+        ffi.memmove(result, self._get_memory_pointer(address, length), length)
         return result
 
+    def get_memory_view(self, address: int, length: int) -> memoryview:
+        """
+        Returns a read-only view of a block of emulator memory, without copying it.
+
+        Note that this view is _live_, i.e. its contents will change as the emulation continues.
+        So it should only be used for data that is consumed right away (or for comparing memory
+        against a previously read copy), and `bytes(view)` has to be used to keep a copy around.
+
+        :param address: Full memory address of the block
+        :param length: Size of the block in bytes
+        :return: Read-only view of that memory
+        """
+        return memoryview(ffi.buffer(self._get_memory_pointer(address, length), length)).toreadonly()
+
+    def create_memory_watcher(self, address: int, length: int) -> callable:
+        """
+        Creates a function that reports whether a block of memory differs from what it
+        contained at the time this watcher was created.
+
+        This is meant to be used as a stop condition for `run_frames()`, as it does not
+        allocate anything or go through the symbol table when it is called: It compares a
+        live view of the memory with a copy taken when the watcher was created.
+
+        :param address: Full memory address of the block to watch
+        :param length: Number of bytes to watch
+        :return: A function returning True once the memory has changed
+        """
+        view = memoryview(ffi.buffer(self._get_memory_pointer(address, length), length))
+        initial_value = bytes(view)
+
+        def has_changed() -> bool:
+            return view != initial_value
+
+        return has_changed
+
     def write_bytes(self, address: int, data: bytes) -> bool:
         """
         Writes to an arbitrary address on the system bus.
@@ -398,22 +646,14 @@ class LibmgbaEmulator:
         :param data: Data to write
         """
         bank = address >> 0x18
-        length = len(data)
-        if bank == 0x2:
-            offset = address & 0x3FFFF
-            if offset + length > 0x3FFFF:
-                raise RuntimeError("Illegal range: EWRAM only extends from 0x02000000 to 0x0203FFFF")
-            ffi.memmove(ffi.cast("char*", self._core._native.memory.wram) + offset, data, length)
-            return True
-        elif bank == 0x3:
-            offset = address & 0x7FFF
-            if offset + length > 0x7FFF:
-                raise RuntimeError("Illegal range: IWRAM only extends from 0x03000000 to 0x03007FFF")
-            ffi.memmove(ffi.cast("char*", self._core._native.memory.iwram) + offset, data, length)
-            return True
-        else:
+        if bank not in (0x2, 0x3):
             raise RuntimeError(f"Invalid memory address for writing: {hex(address)}")
 
+        length = len(data)
+        ffi.memmove(self._get_memory_pointer(address, length), data, length)
+        self._memory_version += 1
+        return True
+
     def get_inputs(self) -> int:
         """
         :return: A bitfield with all the buttons that are currently being pressed
@@ -451,7 +691,7 @@ class LibmgbaEmulator:
         return self._screen.to_pil()
 
     def get_screenshot(self) -> PIL.Image.Image:
-        current_state = None
+        snapshot = None
         if not self._video_enabled:
             # If video has been disabled, it's not possible to receive the current screen content
             # because mGBA never rendered it at all.
@@ -461,13 +701,14 @@ class LibmgbaEmulator:
             # So the screenshot will be 1 frame late, but the emulation will resume from the same
             # state.
             self.set_video_enabled(True)
-            current_state = self.get_save_state()
+            snapshot = self.take_snapshot()
             self._core.run_frame()
 
         screenshot = self.get_current_screen_image().convert("RGB")
 
-        if current_state is not None:
-            self.load_save_state(current_state)
+        if snapshot is not None:
+            self.restore_snapshot(snapshot)
+            self.release_snapshot(snapshot)
             self.set_video_enabled(False)
 
         return screenshot
@@ -499,59 +740,137 @@ class LibmgbaEmulator:
         :param frames_to_advance: Optional number of frames to advance (defaults to 1)
         :return: The return value of the callback function
         """
-        original_emulator_state = self.get_save_state()
-        for i in range(frames_to_advance):
-            self._core.run_frame()
-        result = callback()
-        self.load_save_state(original_emulator_state)
-        return result
+        snapshot = self.take_snapshot()
+        try:
+            for i in range(frames_to_advance):
+                self._core.run_frame()
+                self._memory_version += 1
+            return callback()
+        finally:
+            self.restore_snapshot(snapshot)
+            self.release_snapshot(snapshot)
 
     def run_single_frame(self) -> None:
         """
         Runs the emulation for a single frame, and then waits if necessary to hit the target FPS rate.
         """
         self.set_inputs(self._pressed_inputs | self._held_inputs)
+        self._prepare_renderer_for_next_frame()
 
         begin = time.time_ns()
         self._core.run_frame()
+        self._memory_version += 1
         self._performance_tracker.time_spent_emulating += time.time_ns() - begin
 
         begin = time.time_ns()
         self._prev_pressed_inputs = self._pressed_inputs
         self._pressed_inputs = 0
         self._on_frame_callback()
+        for listener in self._frame_listeners:
+            listener()
 
-        # Limiting FPS is achieved by using a blocking API for audio playback -- meaning we give it
-        # the audio data for one frame and the `write()` call will only return once it processed the
-        # data, effectively halting the bot until it's time for a new frame.
+        # While audio is being played, limiting FPS is achieved by using a blocking API for audio playback --
+        # meaning we give it the audio data for one frame and the `write()` call will only return once it
+        # processed the data, effectively halting the bot until it's time for a new frame. That way, the
+        # audio never stutters.
         #
         # Using speeds other than 1× is achieved by changing the GBA's sample rate. If the GBA only
         # produces half the amount of samples per frame, then the audio system will play them in half
         # the time of a frame, effectively giving us a 2× speed.
         #
-        # This all depends on audio actually _working_, though. So in case audio could, for whatever
-        # reason, not be initialised, we fall back to a sleep-based throttling mechanism. This is less
-        # reliable, though, as the OS does not guarantee `sleep()` to return after the specified amount
-        # of time. It just will sleep for _at least_ that time.
+        # If audio is muted (or could not be initialised), the `FramePacer` waits for the next frame
+        # instead. While unthrottled, neither happens and the audio buffer is not touched at all.
         if self._throttled:
-            if self._audio_stream:
-                samples_available = self._gba_audio.available
-                audio_data = bytearray(samples_available * 4)
-                try:
-                    if self._audio_enabled:
-                        ffi.memmove(audio_data, self._gba_audio.read(samples_available), len(audio_data))
-                        self._audio_stream.write(audio_data)
-                    else:
-                        self._gba_audio.clear()
-                        self._audio_stream.write(audio_data)
-                except sounddevice.PortAudioError as error:
-                    console.print(f"[bold red]Error while playing audio:[/] [red]{str(error)}[/]")
-                    self._reset_audio()
+            if self._audio_stream is not None and self._audio_enabled:
+                self._play_audio()
             else:
-                target_frame_duration = (1 / 60) / self._speed_factor
-                time_since_last_frame = self._performance_tracker.time_since_last_frame() / 1_000_000_000
-                if time_since_last_frame < target_frame_duration:
-                    time.sleep(target_frame_duration - time_since_last_frame)
+                if self._audio_stream is not None:
+                    # Discard the audio that has been produced so far, so it does not get played once
+                    # audio is enabled again.
+                    self._gba_audio.clear()
+                self._frame_pacer.wait_for_next_frame(self._speed_factor)
 
         self._performance_tracker.time_spent_total -= time.time_ns() - begin
         self._performance_tracker.track_frame()
+
+    def _play_audio(self) -> None:
+        samples_available = self._gba_audio.available
+        length = samples_available * 4
+        if len(self._audio_buffer) < length:
+            self._audio_buffer = bytearray(length)
+        audio_data = memoryview(self._audio_buffer)[:length]
+
+        try:
+            ffi.memmove(audio_data, self._gba_audio.read(samples_available), length)
+            self._audio_stream.write(audio_data)
+        except sounddevice.PortAudioError as error:
+            console.print(f"[bold red]Error while playing audio:[/] [red]{str(error)}[/]")
+            self._reset_audio()
+
+    def run_frames(self, frames: int, inputs: int | None = None, stop_when: callable = None) -> int:
+        """
+        Runs the emulation for a number of frames, or until `stop_when()` returns True.
+
+        While the emulation is unthrottled, this runs all frames in a tight loop: The frame
+        callback (i.e. the GUI update) is only called once at the end, and no audio or frame
+        timing work is done in between. If the emulator is throttled, this will just call
+        `run_single_frame()` repeatedly, so the emulation speed is still respected.
+
+        Since `stop_when()` is called after every single frame, it should be cheap -- such as
+        a watcher created with `create_memory_watcher()`.
+
+        :param frames: Maximum number of frames to emulate
+        :param inputs: Button bitfield to hold during all of these frames; if this is None, buttons
+                       pressed with `press_button()` are pressed during the first frame only and
+                       buttons held with `hold_button()` are held during all frames
+        :param stop_when: Optional function that is called after each frame; if it returns True,
+                          the emulation stops right after that frame
+        :return: Number of frames that have actually been emulated
+        """
+        if frames <= 0:
+            return 0
+
+        if self._throttled:
+            for frames_run in range(1, frames + 1):
+                if inputs is not None:
+                    self._pressed_inputs = inputs
+                self.run_single_frame()
+                if stop_when is not None and stop_when():
+                    return frames_run
+            return frames
+
+        if inputs is None:
+            self.set_inputs(self._pressed_inputs | self._held_inputs)
+            subsequent_inputs = self._held_inputs
+        else:
+            self.set_inputs(inputs)
+            subsequent_inputs = inputs
+        self._prev_pressed_inputs = self._pressed_inputs
+        self._pressed_inputs = 0
+
+        run_frame = self._core.run_frame
+        prepare_renderer = (
+            self._prepare_renderer_for_next_frame if self._render_interval > 1 and self._video_enabled else None
+        )
+        frames_run = 0
+        begin = time.time_ns()
+        while frames_run < frames:
+            if prepare_renderer is not None:
+                prepare_renderer()
+            run_frame()
+            frames_run += 1
+            self._memory_version += 1
+            if frames_run == 1:
+                self.set_inputs(subsequent_inputs)
+            if stop_when is not None and stop_when():
+                break
+        self._performance_tracker.time_spent_emulating += time.time_ns() - begin
+
+        begin = time.time_ns()
+        self._on_frame_callback()
+        for listener in self._frame_listeners:
+            listener()
+        self._performance_tracker.time_spent_total -= time.time_ns() - begin
+        self._performance_tracker.track_frame(frames_run)
+
+        return frames_run
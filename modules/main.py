@@ -1,6 +1,7 @@
 import queue
 import sys
-from threading import Thread
+from concurrent.futures import Future
+from threading import Lock, Thread
 
 from modules.battle import BattleHandler, check_lead_can_battle, RotatePokemon
 from modules.console import console
@@ -9,13 +10,50 @@ from modules.memory import get_game_state, GameState
 from modules.menuing import MenuWrapper, CheckForPickup, should_check_for_pickup
 from modules.pokemon import opponent_changed, get_opponent
 
-
 # Contains a queue of tasks that should be run the next time a frame completes.
 # This is currently used by the HTTP server component (which runs in a separate thread) to trigger things
 # such as extracting the current party, which need to be done from the main thread.
 # Each entry here will be executed exactly once and then removed from the queue.
 work_queue: queue.Queue[callable] = queue.Queue()
 
+# Work items that have been queued by `run_in_main_thread()` but not run yet, by callback.
+_pending_work: dict[callable, Future] = {}
+_pending_work_lock = Lock()
+
+
+def run_in_main_thread(callback: callable) -> Future:
+    """
+    Queues a function to be run by the main thread the next time a frame completes, and returns
+    a future that resolves to its return value (or exception.)
+
+    If the same function has already been queued and has not run yet, no second work item is
+    queued and the existing future is returned instead. That way, any number of concurrent
+    HTTP requests for (say) the party only lead to the party being read once.
+
+    :param callback: Function to run (without any arguments) on the main thread
+    :return: Future for the result of `callback()`
+    """
+    with _pending_work_lock:
+        if callback in _pending_work:
+            return _pending_work[callback]
+
+        future = Future()
+        _pending_work[callback] = future
+
+    def run_work_item():
+        with _pending_work_lock:
+            del _pending_work[callback]
+
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(callback())
+        except Exception as exception:
+            future.set_exception(exception)
+
+    work_queue.put_nowait(run_work_item)
+    return future
+
 
 def main_loop() -> None:
     """
@@ -1,11 +1,13 @@
 import string
 import struct
-from functools import cached_property
+from functools import cached_property, lru_cache
 from typing import Literal
 
+import numpy
+
 from modules.context import context
-from modules.game import decode_string
-from modules.memory import unpack_uint16, unpack_uint32, read_symbol, get_symbol_name
+from modules.game import decode_string, on_rom_change
+from modules.memory import unpack_uint16, unpack_uint32, read_symbol, get_symbol_name_with_offset
 from modules.pokemon import get_item_by_index, Item
 
 
@@ -558,11 +560,7 @@ class MapCoordEvent:
 
     @property
     def script_symbol(self) -> str:
-        symbol = get_symbol_name(self.script_pointer, pretty_name=True)
-        if symbol == "":
-            return hex(self.script_pointer)
-        else:
-            return symbol
+        return get_symbol_name_with_offset(self.script_pointer, pretty_name=True)
 
     def to_dict(self) -> dict:
         return {
@@ -625,11 +623,7 @@ class MapBgEvent:
     @property
     def script_symbol(self) -> str:
         """This only has meaning if `kind` is 'Script'."""
-        symbol = get_symbol_name(self.script_pointer, pretty_name=True)
-        if symbol == "":
-            return hex(self.script_pointer)
-        else:
-            return symbol
+        return get_symbol_name_with_offset(self.script_pointer, pretty_name=True)
 
     @property
     def hidden_item(self) -> Item:
@@ -666,6 +660,109 @@ class MapBgEvent:
         return data
 
 
+class MapTileGrid:
+    """
+    Metatile data (attributes, collision, elevation) for all tiles of a map layout.
+
+    Looking up a single tile requires reading the map grid, the tileset and its attributes
+    table. Doing that for each tile individually adds up quickly, so this reads the whole map
+    grid and both tilesets' attribute tables at once and decodes them with NumPy.
+
+    Use `get_map_tile_grid()` to get an instance, as these are cached by layout.
+    """
+
+    mapgrid_metatile_id_mask = 0x3FF
+
+    def __init__(self, map_layout: bytes):
+        self.width = unpack_uint32(map_layout[0:4])
+        self.height = unpack_uint32(map_layout[4:8])
+        border_pointer = unpack_uint32(map_layout[8:12])
+        map_data_pointer = unpack_uint32(map_layout[12:16])
+        primary_tileset_pointer = unpack_uint32(map_layout[16:20])
+        secondary_tileset_pointer = unpack_uint32(map_layout[20:24])
+
+        if context.rom.game_title in ["POKEMON FIRE", "POKEMON LEAF"]:
+            self.metatiles_in_primary = 640
+            metatiles_in_secondary = 1024
+            attributes_dtype = "<u4"
+            metatiles_attributes_offset = 0x14
+        else:
+            self.metatiles_in_primary = 512
+            metatiles_in_secondary = 1024
+            attributes_dtype = "<u2"
+            metatiles_attributes_offset = 0x10
+
+        # Map grid blocks, indexed by [y, x]
+        self.blocks = numpy.frombuffer(
+            context.emulator.read_bytes(map_data_pointer, self.width * self.height * 2), dtype="<u2"
+        ).reshape(self.height, self.width)
+        self.border_blocks = numpy.frombuffer(context.emulator.read_bytes(border_pointer, 8), dtype="<u2")
+
+        # Attributes of all metatiles in the primary and secondary tileset, indexed by metatile ID
+        attribute_size = numpy.dtype(attributes_dtype).itemsize
+        attribute_tables = []
+        for tileset_pointer, count in (
+            (primary_tileset_pointer, self.metatiles_in_primary),
+            (secondary_tileset_pointer, metatiles_in_secondary - self.metatiles_in_primary),
+        ):
+            if tileset_pointer == 0:
+                attribute_tables.append(numpy.zeros(count, dtype=attributes_dtype))
+                continue
+            attributes_pointer = unpack_uint32(
+                context.emulator.read_bytes(tileset_pointer + metatiles_attributes_offset, 4)
+            )
+            attribute_tables.append(
+                numpy.frombuffer(
+                    context.emulator.read_bytes(attributes_pointer, count * attribute_size), attributes_dtype
+                )
+            )
+        self.metatile_attributes = numpy.concatenate(attribute_tables).astype(numpy.uint32)
+
+        self.collision = (self.blocks & 0x0C00) >> 10
+        self.elevation = (self.blocks & 0xF000) >> 12
+        metatiles = self.blocks & self.mapgrid_metatile_id_mask
+
+        # Blocks with an ID of 0x3FF are replaced by the map's border (see `get_metatile_attributes()`),
+        # so they are only marked as such here.
+        self.is_border = metatiles == self.mapgrid_metatile_id_mask
+        self.attributes = self.metatile_attributes[numpy.minimum(metatiles, len(self.metatile_attributes) - 1)]
+
+    def get_metatile_attributes(self, x: int, y: int) -> tuple[int, int, int]:
+        """
+        :param x: Local X coordinate of the tile
+        :param y: Local Y coordinate of the tile
+        :return: Metatile Attributes, Collision, Elevation
+        """
+        if 0 <= x < self.width and 0 <= y < self.height and not self.is_border[y, x]:
+            return int(self.attributes[y, x]), int(self.collision[y, x]), int(self.elevation[y, x])
+
+        # Tiles outside the map (and tiles explicitly marked as such) use the 2×2 border blocks.
+        i = (x + 1) & 1
+        i += ((y + 1) & 1) * 2
+        map_grid_block = int(self.border_blocks[i]) | 0xC00
+        metatile = map_grid_block & self.mapgrid_metatile_id_mask
+        collision = (map_grid_block & 0x0C00) >> 10
+        elevation = (map_grid_block & 0xF000) >> 12
+        return int(self.metatile_attributes[metatile]), collision, elevation
+
+    @cached_property
+    def tile_bit_attributes(self) -> bytes:
+        return read_symbol("sTileBitAttributes")
+
+
+@lru_cache(maxsize=64)
+def get_map_tile_grid(map_layout_pointer: int) -> MapTileGrid:
+    """
+    :param map_layout_pointer: Address of the map layout
+    :return: The (cached) tile grid of that layout
+    """
+    return MapTileGrid(context.emulator.read_bytes(map_layout_pointer, 24))
+
+
+# Layout pointers are only meaningful within the same ROM.
+on_rom_change(get_map_tile_grid.cache_clear)
+
+
 class MapLocation:
     def __init__(self, map_header: bytes, map_group: int, map_number: int, local_position: tuple[int, int]):
         self._map_header = map_header
@@ -674,70 +771,19 @@ class MapLocation:
         self.local_position = local_position
 
     @cached_property
-    def _map_layout(self) -> bytes:
-        map_layout_pointer = unpack_uint32(self._map_header[0:4])
-        return context.emulator.read_bytes(map_layout_pointer, 24)
+    def _tile_grid(self) -> MapTileGrid:
+        return get_map_tile_grid(unpack_uint32(self._map_header[0:4]))
 
     @cached_property
     def _metatile_attributes(self) -> tuple[int, int, int]:
         """
         :return: Metatile Attributes, Collision, Elevation
         """
-        mapgrid_metatile_id_mask = 0x3FF
-
-        x, y = self.local_position
-        width, height = self.map_size
-
-        map_grid_block = mapgrid_metatile_id_mask
-        if 0 <= x < width and 0 <= y < height:
-            offset = (x * 2) + (width * y * 2)
-            map_data_pointer = unpack_uint32(self._map_layout[12:16])
-            map_grid_block = unpack_uint16(context.emulator.read_bytes(map_data_pointer + offset, 2))
-
-        if (map_grid_block & mapgrid_metatile_id_mask) == mapgrid_metatile_id_mask:
-            i = (x + 1) & 1
-            i += ((y + 1) & 1) * 2
-            border_pointer = unpack_uint32(self._map_layout[8:12])
-            map_grid_block = unpack_uint16(context.emulator.read_bytes(border_pointer + i * 2, 2)) | 0xC00
-
-        metatile = map_grid_block & 0x03FF
-        collision = (map_grid_block & 0x0C00) >> 10
-        elevation = (map_grid_block & 0xF000) >> 12
-
-        if context.rom.game_title in ["POKEMON FIRE", "POKEMON LEAF"]:
-            metatiles_in_primary = 640
-            metatiles_in_secondary = 1024
-            metatiles_attributes_size = 4
-            metatiles_attributes_offset = 0x14
-        else:
-            metatiles_in_primary = 512
-            metatiles_in_secondary = 1024
-            metatiles_attributes_size = 2
-            metatiles_attributes_offset = 0x10
-
-        attributes_pointer = None
-        attribute_offset = None
-        if metatile < metatiles_in_primary:
-            primary_tileset_pointer = unpack_uint32(self._map_layout[16:20])
-            apd = context.emulator.read_bytes(primary_tileset_pointer + metatiles_attributes_offset, 4)
-            attributes_pointer = unpack_uint32(apd)
-            attribute_offset = metatile * metatiles_attributes_size
-        elif metatile < metatiles_in_secondary:
-            secondary_tileset_pointer = unpack_uint32(self._map_layout[20:24])
-            apd = context.emulator.read_bytes(secondary_tileset_pointer + metatiles_attributes_offset, 4)
-            attributes_pointer = unpack_uint32(apd)
-            attribute_offset = (metatile - metatiles_in_primary) * metatiles_attributes_size
-
-        if metatiles_attributes_size == 4:
-            attribute = unpack_uint32(context.emulator.read_bytes(attributes_pointer + attribute_offset, 4))
-        else:
-            attribute = unpack_uint16(context.emulator.read_bytes(attributes_pointer + attribute_offset, 2))
-
-        return attribute, collision, elevation
+        return self._tile_grid.get_metatile_attributes(*self.local_position)
 
     @cached_property
     def _tile_behaviour(self) -> int:
-        return read_symbol("sTileBitAttributes", self._metatile_attributes[0] & 0x3FF, 1)[0]
+        return self._tile_grid.tile_bit_attributes[self._metatile_attributes[0] & 0x3FF]
 
     @cached_property
     def _event_list(self) -> bytes | None:
@@ -769,7 +815,7 @@ class MapLocation:
 
     @property
     def map_size(self) -> tuple[int, int]:
-        return unpack_uint32(self._map_layout[0:4]), unpack_uint32(self._map_layout[4:8])
+        return self._tile_grid.width, self._tile_grid.height
 
     @property
     def map_type(self) -> str:
@@ -961,10 +1007,14 @@ class MapLocation:
     def all_tiles(self) -> list[list["MapLocation"]]:
         result = []
 
+        tile_grid = self._tile_grid
         for x in range(self.map_size[0]):
             row = []
             for y in range(self.map_size[1]):
-                row.append(MapLocation(self._map_header, self.map_group, self.map_number, (x, y)))
+                tile = MapLocation(self._map_header, self.map_group, self.map_number, (x, y))
+                # Saves each tile from having to look up the (cached) grid again.
+                tile._tile_grid = tile_grid
+                row.append(tile)
             result.append(row)
 
         return result
@@ -1524,11 +1574,7 @@ class ObjectEventTemplate:
 
     @property
     def script_symbol(self) -> str:
-        symbol = get_symbol_name(self.script_pointer, pretty_name=True)
-        if symbol == "":
-            return hex(self.script_pointer)
-        else:
-            return symbol
+        return get_symbol_name_with_offset(self.script_pointer, pretty_name=True)
 
     @property
     def flag_id(self) -> int:
@@ -2,7 +2,13 @@ import struct
 from enum import IntEnum, auto
 
 from modules.context import context
-from modules.game import get_symbol, get_symbol_name, get_event_flag_offset, _event_flags
+from modules.game import (
+    get_symbol,
+    get_symbol_name_with_offset,
+    get_event_flag_offset,
+    on_rom_change,
+    _event_flags,
+)
 from modules.state_cache import state_cache
 
 
@@ -22,6 +28,13 @@ def pack_uint32(int: int) -> bytes:
     return struct.pack("<I", int)
 
 
+# Symbols tend to be read several times per frame (by the main loop, the current bot mode, the
+# HTTP server, ...), so `read_symbol()` keeps the results for as long as the emulator's memory
+# has not changed, i.e. usually until the next frame is emulated.
+_read_cache: dict[tuple[str, int, int], bytes] = {}
+_read_cache_memory_version: int = -1
+
+
 def read_symbol(name: str, offset: int = 0x0, size: int = 0x0) -> bytes:
     """
     This function uses the symbol tables from the Pokémon decompilation projects found here: https://github.com/pret
@@ -45,16 +58,48 @@ def read_symbol(name: str, offset: int = 0x0, size: int = 0x0) -> bytes:
     :param size: (optional) override the size to read n bytes
     :return: (bytes)
     """
+    global _read_cache_memory_version
+
+    memory_version = context.emulator.get_memory_version()
+    if memory_version != _read_cache_memory_version:
+        _read_cache.clear()
+        _read_cache_memory_version = memory_version
+
+    cache_key = (name, offset, size)
+    if cache_key in _read_cache:
+        return _read_cache[cache_key]
+
     try:
         addr, length = get_symbol(name)
         if size <= 0:
             size = length
 
-        return context.emulator.read_bytes(addr + offset, size)
+        # This is converted to an immutable `bytes` object so that a caller can't accidentally
+        # modify the cached copy.
+        data = bytes(context.emulator.read_bytes(addr + offset, size))
+        _read_cache[cache_key] = data
+        return data
     except SystemExit:
         raise
 
 
+def get_symbol_view(name: str, offset: int = 0x0, size: int = 0x0) -> memoryview:
+    """
+    Like `read_symbol()`, but returns a read-only _live_ view of the emulator's memory
+    rather than a copy. See `LibmgbaEmulator.get_memory_view()` for caveats.
+
+    :param name: name of the symbol to read
+    :param offset: (optional) add n bytes to the address of symbol
+    :param size: (optional) override the size to read n bytes
+    :return: (memoryview)
+    """
+    addr, length = get_symbol(name)
+    if size <= 0:
+        size = length
+
+    return context.emulator.get_memory_view(addr + offset, size)
+
+
 def write_symbol(name: str, data: bytes, offset: int = 0x0) -> bool:
     try:
         addr, length = get_symbol(name)
@@ -69,6 +114,26 @@ def write_symbol(name: str, data: bytes, offset: int = 0x0) -> bool:
         raise
 
 
+def create_symbol_watcher(name: str, offset: int = 0x0, size: int = 0x0) -> callable:
+    """
+    Creates a function that returns True once the memory of a symbol differs from what it
+    contained when the watcher was created. This is cheap enough to be used as a stop
+    condition for `LibmgbaEmulator.run_frames()`.
+
+    Example: `create_symbol_watcher("gMain", 4, 4)` watches for a change of `gMain.callback2`.
+
+    :param name: name of the symbol to watch
+    :param offset: (optional) add n bytes to the address of symbol
+    :param size: (optional) override the number of bytes to watch
+    :return: A function that reports whether the symbol's memory has changed
+    """
+    addr, length = get_symbol(name)
+    if size <= 0:
+        size = length
+
+    return context.emulator.create_memory_watcher(addr + offset, size)
+
+
 def get_save_block(num: int = 1, offset: int = 0, size: int = 0) -> bytes:
     """
     The Generation III save file is broken up into two game save blocks, this function will return sections from these
@@ -140,10 +205,82 @@ class GameState(IntEnum):
     QUEST_LOG = auto()
 
 
+# Names of the `gMain.callback2` functions that indicate a particular game state. Not all of these
+# exist in every game, and any callback that is not listed here results in `GameState.UNKNOWN`.
+_game_state_callbacks: dict[GameState, list[str]] = {
+    GameState.QUEST_LOG: [
+        "CB2_SETUPOVERWORLDFORQLPLAYBACKWITHWARPEXIT",
+        "CB2_SETUPOVERWORLDFORQLPLAYBACK",
+        "CB2_LOADMAPFORQLPLAYBACK",
+        "CB2_ENTERFIELDFROMQUESTLOG",
+    ],
+    GameState.OVERWORLD: ["CB2_OVERWORLD"],
+    GameState.BATTLE: ["BATTLEMAINCB2"],
+    GameState.BAG_MENU: ["CB2_BAGMENURUN", "SUB_80A3118"],
+    GameState.PARTY_MENU: ["CB2_UPDATEPARTYMENU", "CB2_PARTYMENUMAIN"],
+    GameState.BATTLE_STARTING: ["CB2_INITBATTLE", "CB2_HANDLESTARTBATTLE"],
+    GameState.BATTLE_ENDING: ["CB2_ENDWILDBATTLE"],
+    GameState.CHANGE_MAP: ["CB2_LOADMAP", "CB2_LOADMAP2", "CB2_DOCHANGEMAP", "SUB_810CC80"],
+    GameState.CHOOSE_STARTER: ["CB2_STARTERCHOOSE", "CB2_CHOOSESTARTER"],
+    GameState.TITLE_SCREEN: [
+        "CB2_INITCOPYRIGHTSCREENAFTERBOOTUP",
+        "CB2_WAITFADEBEFORESETUPINTRO",
+        "CB2_SETUPINTRO",
+        "CB2_INTRO",
+        "CB2_INITTITLESCREEN",
+        "CB2_TITLESCREENRUN",
+        "CB2_INITCOPYRIGHTSCREENAFTERTITLESCREEN",
+        "CB2_INITMAINMENU",
+        "MAINCB2",
+        "MAINCB2_INTRO",
+    ],
+    GameState.MAIN_MENU: ["CB2_MAINMENU"],
+    GameState.EVOLUTION: ["CB2_EVOLUTIONSCENEUPDATE"],
+}
+
+# Maps the address of a `gMain.callback2` function of the current ROM to the game state it indicates.
+# This is built whenever a ROM is loaded, so that `get_game_state()` does not need to look up symbol names.
+_game_state_by_callback_address: dict[int, GameState] | None = None
+
+_game_state_listeners: list[callable] = []
+
+
+def _build_game_state_lookup_table() -> None:
+    global _game_state_by_callback_address
+
+    _game_state_by_callback_address = {}
+    for game_state, callback_names in _game_state_callbacks.items():
+        for callback_name in callback_names:
+            try:
+                address, _ = get_symbol(callback_name)
+            except RuntimeError:
+                continue
+            _game_state_by_callback_address[address] = game_state
+
+
+on_rom_change(_build_game_state_lookup_table)
+
+
+def add_game_state_listener(listener: callable) -> None:
+    """
+    Registers a function that gets called whenever `get_game_state()` notices that the game state
+    has changed. It will be called from the main thread with the previous and the new game state
+    as arguments, so it should return quickly.
+
+    :param listener: Function that takes two arguments: `(previous_state: GameState | None, new_state: GameState)`
+    """
+    _game_state_listeners.append(listener)
+
+
+def remove_game_state_listener(listener: callable) -> None:
+    if listener in _game_state_listeners:
+        _game_state_listeners.remove(listener)
+
+
 def get_game_state_symbol() -> str:
     callback2 = read_symbol("gMain", 4, 4)  # gMain.callback2
     addr = unpack_uint32(callback2) - 1
-    callback_name = get_symbol_name(addr)
+    callback_name = get_symbol_name_with_offset(addr, True)
     state_cache.callback2 = callback_name
     return callback_name
 
@@ -152,35 +289,18 @@ def get_game_state() -> GameState:
     if state_cache.game_state.age_in_frames == 0:
         return state_cache.game_state.value
 
-    match get_game_state_symbol():
-        case "CB2_SETUPOVERWORLDFORQLPLAYBACKWITHWARPEXIT" | "CB2_SETUPOVERWORLDFORQLPLAYBACK" | "CB2_LOADMAPFORQLPLAYBACK" | "CB2_ENTERFIELDFROMQUESTLOG":
-            return GameState.QUEST_LOG
-        case "CB2_OVERWORLD":
-            result = GameState.OVERWORLD
-        case "BATTLEMAINCB2":
-            result = GameState.BATTLE
-        case "CB2_BAGMENURUN" | "SUB_80A3118":
-            result = GameState.BAG_MENU
-        case "CB2_UPDATEPARTYMENU" | "CB2_PARTYMENUMAIN":
-            result = GameState.PARTY_MENU
-        case "CB2_INITBATTLE" | "CB2_HANDLESTARTBATTLE":
-            result = GameState.BATTLE_STARTING
-        case "CB2_ENDWILDBATTLE":
-            result = GameState.BATTLE_ENDING
-        case "CB2_LOADMAP" | "CB2_LOADMAP2" | "CB2_DOCHANGEMAP" | "SUB_810CC80":
-            result = GameState.CHANGE_MAP
-        case "CB2_STARTERCHOOSE" | "CB2_CHOOSESTARTER":
-            result = GameState.CHOOSE_STARTER
-        case "CB2_INITCOPYRIGHTSCREENAFTERBOOTUP" | "CB2_WAITFADEBEFORESETUPINTRO" | "CB2_SETUPINTRO" | "CB2_INTRO" | "CB2_INITTITLESCREEN" | "CB2_TITLESCREENRUN" | "CB2_INITCOPYRIGHTSCREENAFTERTITLESCREEN" | "CB2_INITMAINMENU" | "MAINCB2" | "MAINCB2_INTRO":
-            result = GameState.TITLE_SCREEN
-        case "CB2_MAINMENU":
-            result = GameState.MAIN_MENU
-        case "CB2_EVOLUTIONSCENEUPDATE":
-            result = GameState.EVOLUTION
-        case _:
-            result = GameState.UNKNOWN
+    if _game_state_by_callback_address is None:
+        _build_game_state_lookup_table()
+
+    callback2 = unpack_uint32(read_symbol("gMain", 4, 4)) - 1  # gMain.callback2
+    result = _game_state_by_callback_address.get(callback2, GameState.UNKNOWN)
 
+    previous_state = state_cache.game_state.value
     state_cache.game_state = result
+    if result != previous_state:
+        for listener in _game_state_listeners:
+            listener(previous_state, result)
+
     return result
 
 
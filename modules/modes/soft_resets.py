@@ -3,8 +3,9 @@ from enum import Enum, auto
 
 from modules.context import context
 from modules.encounter import encounter_pokemon
-from modules.files import get_rng_state_history, save_rng_state_history
+from modules.files import get_rng_state_history
 from modules.memory import (
+    create_symbol_watcher,
     read_symbol,
     get_game_state,
     GameState,
@@ -13,6 +14,7 @@ from modules.memory import (
     pack_uint32,
 )
 from modules.pokemon import get_opponent, opponent_changed
+from modules.stats import total_stats
 from modules.tasks import task_is_active
 
 
@@ -23,36 +25,65 @@ class ModeStaticSoftResetsStates(Enum):
     OVERWORLD = auto()
     INJECT_RNG = auto()
     RNG_CHECK = auto()
+    CHECK_OPPONENT = auto()
     BATTLE = auto()
     OPPONENT_CRY_START = auto()
     OPPONENT_CRY_END = auto()
     LOG_OPPONENT = auto()
 
 
+# Snapshot of the emulator (see `LibmgbaEmulator.take_snapshot()`) at the last point of a soft
+# reset that does not depend on the RNG, i.e. after the title screen. Rather than resetting the
+# game and going through the intro again, subsequent attempts just restore this snapshot.
+_branch_point: int | None = None
+# Memory version of the emulator at the time the last encounter was logged. If the emulator has
+# been used for anything else since then (e.g. because the user switched to manual mode), the
+# branch point cannot be used anymore.
+_branch_point_memory_version: int | None = None
+
+
+def _set_branch_point() -> None:
+    global _branch_point
+    _discard_branch_point()
+    _branch_point = context.emulator.take_snapshot()
+
+
+def _keep_branch_point() -> None:
+    global _branch_point_memory_version
+    if _branch_point is not None:
+        _branch_point_memory_version = context.emulator.get_memory_version()
+
+
+def _discard_branch_point() -> None:
+    global _branch_point, _branch_point_memory_version
+    if _branch_point is not None:
+        context.emulator.release_snapshot(_branch_point)
+    _branch_point = None
+    _branch_point_memory_version = None
+
+
 class ModeStaticSoftResets:
     def __init__(self) -> None:
         if not context.config.cheats.random_soft_reset_rng:
-            self.rng_history: list = get_rng_state_history()
+            self.rng_history = get_rng_state_history()
 
-        self.frame_count = None
         self.state: ModeStaticSoftResetsStates = ModeStaticSoftResetsStates.RESET
 
+        if _branch_point is not None and _branch_point_memory_version != context.emulator.get_memory_version():
+            _discard_branch_point()
+
     def update_state(self, state: ModeStaticSoftResetsStates) -> None:
         self.state: ModeStaticSoftResetsStates = state
 
-    def wait_frames(self, frames: int) -> bool:
-        if not self.frame_count:
-            self.frame_count = context.emulator.get_frame_count()
-        elif context.emulator.get_frame_count() < self.frame_count + frames:
-            return False
-        else:
-            self.frame_count = 0
-            return True
-
     def step(self):
         while True:
             match self.state:
                 case ModeStaticSoftResetsStates.RESET:
+                    if _branch_point is not None:
+                        context.emulator.restore_snapshot(_branch_point)
+                        self.update_state(ModeStaticSoftResetsStates.RNG_CHECK)
+                        continue
+
                     context.emulator.reset()
                     self.update_state(ModeStaticSoftResetsStates.TITLE)
 
@@ -77,6 +108,8 @@ class ModeStaticSoftResets:
 
                 case ModeStaticSoftResetsStates.RNG_CHECK:
                     if context.config.cheats.random_soft_reset_rng:
+                        if _branch_point is None:
+                            _set_branch_point()
                         self.update_state(ModeStaticSoftResetsStates.WAIT_FRAMES)
                     else:
                         rng = unpack_uint32(read_symbol("gRngValue"))
@@ -87,16 +120,18 @@ class ModeStaticSoftResets:
                         ):
                             pass
                         else:
-                            self.rng_history.append(rng)
-                            save_rng_state_history(self.rng_history)
+                            self.rng_history.add(rng)
+                            # The branch point moves along with each new RNG value, so the next
+                            # attempt only has to wait a single frame for a value it has not seen.
+                            # This relies on the game advancing `gRngValue` on every frame, so that
+                            # the frames after `restore_snapshot()` keep producing new values.
+                            _set_branch_point()
                             self.update_state(ModeStaticSoftResetsStates.WAIT_FRAMES)
                             continue
 
                 case ModeStaticSoftResetsStates.WAIT_FRAMES:
-                    if self.wait_frames(5):
-                        self.update_state(ModeStaticSoftResetsStates.INJECT_RNG)
-                    else:
-                        pass
+                    context.emulator.run_frames(5)
+                    self.update_state(ModeStaticSoftResetsStates.INJECT_RNG)
 
                 case ModeStaticSoftResetsStates.INJECT_RNG:
                     if context.config.cheats.random_soft_reset_rng:
@@ -105,10 +140,33 @@ class ModeStaticSoftResets:
 
                 case ModeStaticSoftResetsStates.OVERWORLD:
                     if not opponent_changed():
-                        context.emulator.press_button("A")
+                        # Mashes A for up to a second before handing control back to the main loop. The
+                        # watcher stops the emulation as soon as the opponent's personality value has been
+                        # written, so `opponent_changed()` can look at it on the next step.
+                        opponent_written = create_symbol_watcher("gEnemyParty", size=4)
+                        for _ in range(30):
+                            context.emulator.press_button("A")
+                            context.emulator.run_frames(2, stop_when=opponent_written)
+                            if opponent_written():
+                                break
                     else:
+                        self.update_state(ModeStaticSoftResetsStates.CHECK_OPPONENT)
+                        continue
+
+                # The opponent is known as soon as it has been generated, so there is no need to watch
+                # the battle intro unless it is an encounter that the user wants to catch. All other
+                # encounters are logged right away, and the next attempt starts from the branch point.
+                case ModeStaticSoftResetsStates.CHECK_OPPONENT:
+                    opponent = get_opponent()
+                    if opponent is None or opponent.is_empty:
+                        pass
+                    elif opponent.is_shiny or isinstance(total_stats.custom_catch_filters(opponent), str):
                         self.update_state(ModeStaticSoftResetsStates.BATTLE)
                         continue
+                    else:
+                        encounter_pokemon(opponent, battle_has_started=False)
+                        _keep_branch_point()
+                        return
 
                 case ModeStaticSoftResetsStates.BATTLE:
                     if get_game_state() != GameState.BATTLE:
@@ -134,6 +192,7 @@ class ModeStaticSoftResets:
 
                 case ModeStaticSoftResetsStates.LOG_OPPONENT:
                     encounter_pokemon(get_opponent())
+                    _keep_branch_point()
                     return
 
             yield
@@ -6,7 +6,7 @@ from modules.console import console
 from modules.context import context
 from modules.data.map import MapRSE, MapFRLG
 from modules.encounter import encounter_pokemon
-from modules.files import get_rng_state_history, save_rng_state_history
+from modules.files import get_rng_state_history
 from modules.gui.multi_select_window import Selection, MultiSelector, MultiSelectWindow
 from modules.memory import read_symbol, get_game_state, GameState, write_symbol, unpack_uint32, pack_uint32
 from modules.navigation import follow_path
@@ -340,7 +340,7 @@ class ModeStarters:
             return
 
         if not context.config.cheats.random_soft_reset_rng:
-            self.rng_history: list = get_rng_state_history()
+            self.rng_history = get_rng_state_history()
 
         self.state: ModeStarterStates = ModeStarterStates.RESET
         self.navigator = None
@@ -369,8 +369,7 @@ class ModeStarters:
                         ):
                             pass
                         else:
-                            self.rng_history.append(rng)
-                            save_rng_state_history(self.rng_history)
+                            self.rng_history.add(rng)
                             self.update_state(ModeStarterStates.CONFIRM_STARTER)
                             continue
 
@@ -1,10 +1,12 @@
 from modules.context import context
 from modules.encounter import encounter_pokemon
+from modules.map import get_map_objects
 from modules.memory import get_game_state, GameState
+from modules.pathfinding import find_path
 from modules.pokemon import opponent_changed, get_opponent
 from modules.tasks import task_is_active
 from modules.temp import temp_run_from_battle
-from modules.player import get_player_avatar, TileTransitionState
+from modules.player import get_player_avatar, AvatarFlags, TileTransitionState
 
 
 def follow_path(coords: list, run: bool = True) -> bool:  # TODO needs a rework
@@ -63,3 +65,43 @@ def follow_path(coords: list, run: bool = True) -> bool:  # TODO needs a rework
         context.emulator.run_single_frame()  # TODO bad (needs to be refactored so main loop advances frame)
 
     return True
+
+
+def navigate_to(map_group_and_number: tuple[int, int], coordinates: tuple[int, int], run: bool = True) -> bool:
+    """
+    Finds a path from the player's current position to the given tile (see `modules.pathfinding`)
+    and walks it using `follow_path()`.
+
+    :param map_group_and_number: (group, number) of the map the destination tile is on
+    :param coordinates: Local coordinates of the destination tile
+    :param run: Trainer will hold B (run) if True, otherwise trainer will walk
+    :return: True if the player has arrived at the destination, False if not (or if there is no known path)
+    """
+    player = get_player_avatar()
+    avoid = frozenset(
+        ((map_object.map_group, map_object.map_num), map_object.current_coords)
+        for map_object in get_map_objects()
+        if map_object.current_coords != player.local_coordinates
+    )
+    path = find_path(
+        player.map_group_and_number,
+        player.local_coordinates,
+        map_group_and_number,
+        coordinates,
+        on_bike=AvatarFlags.OnMachBike in player.flags or AvatarFlags.OnAcroBike in player.flags,
+        surfing=AvatarFlags.Surfing in player.flags,
+        avoid=avoid,
+    )
+    if path is None:
+        return False
+
+    coords = []
+    for step in path:
+        if step.changes_map_to is not None:
+            coords.append((*step.coordinates, step.changes_map_to))
+        else:
+            coords.append(step.coordinates)
+    follow_path(coords, run)
+
+    player = get_player_avatar()
+    return player.map_group_and_number == map_group_and_number and player.local_coordinates == coordinates
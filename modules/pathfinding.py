@@ -0,0 +1,435 @@
+"""
+Pathfinding on the overworld.
+
+For each map, a `WalkabilityGrid` is derived from its tile data (collision, elevation, tile
+types such as water or ledges.) Paths within a map are found with A*, and routes spanning
+multiple maps are found by first searching the graph of map connections and warps (see
+`get_neighbouring_maps()`) and then searching the tiles of only those maps that are on the way.
+
+Both the grids and the resulting paths are cached, so a bot mode can ask for the same route
+over and over again without any overhead. None of this takes the positions of NPCs into
+account, as those change all the time -- pass them as `avoid` if they matter.
+"""
+
+import heapq
+from dataclasses import dataclass
+from functools import lru_cache
+
+from modules.game import on_rom_change
+from modules.map import MapLocation, get_map_data
+
+# Movement direction => (dx, dy)
+directions: dict[str, tuple[int, int]] = {
+    "North": (0, -1),
+    "South": (0, 1),
+    "West": (-1, 0),
+    "East": (1, 0),
+}
+
+# Tile types that cannot be left in a certain direction (and can't be entered from the opposite direction.)
+_impassable_directions: dict[str, set[str]] = {
+    "Impassable East": {"East"},
+    "Impassable West": {"West"},
+    "Impassable North": {"North"},
+    "Impassable South": {"South"},
+    "Impassable North/East": {"North", "East"},
+    "Impassable North/West": {"North", "West"},
+    "Impassable South/East": {"South", "East"},
+    "Impassable South/West": {"South", "West"},
+    "Impassable North and South": {"North", "South"},
+    "Impassable West and East": {"West", "East"},
+}
+
+# Ledges: Moving onto one of these tiles in the given direction makes the player jump over it,
+# moving in any other direction is not possible.
+_jump_directions: dict[str, str] = {
+    "Jump East": "East",
+    "Jump West": "West",
+    "Jump North": "North",
+    "Jump South": "South",
+}
+
+# Warp tiles that do not warp when stepped onto, but when trying to leave them in a certain direction
+# (such as the exit mats of buildings and caves.) All other warp tiles warp as soon as they are entered.
+_arrow_warp_directions: dict[str, str] = {
+    "East Arrow Warp": "East",
+    "West Arrow Warp": "West",
+    "North Arrow Warp": "North",
+    "South Arrow Warp": "South",
+    "Water South Arrow Warp": "South",
+    "Deep South Warp": "South",
+    "Stair Warp Up/Right": "East",
+    "Stair Warp Down/Right": "East",
+    "Stair Warp Up/Left": "West",
+    "Stair Warp Down/Left": "West",
+}
+
+
+class WalkabilityGrid:
+    """
+    Which tiles of a map can be entered, and in which direction. All lists are indexed by `[y][x]`.
+    """
+
+    def __init__(self, map_group_and_number: tuple[int, int], width: int, height: int):
+        """
+        Creates a grid in which no tile can be entered, see `from_map_data()` for a grid of an actual map.
+        """
+        self.map_group_and_number = map_group_and_number
+        self.width, self.height = width, height
+        self.passable: list[list[bool]] = [[False] * width for _ in range(height)]
+        self.elevation: list[list[int]] = [[0] * width for _ in range(height)]
+        self.impassable_directions: list[list[set[str]]] = [[set()] * width for _ in range(height)]
+        self.jump_direction: list[list[str | None]] = [[None] * width for _ in range(height)]
+        self.arrow_warp_direction: list[list[str | None]] = [[None] * width for _ in range(height)]
+
+    @classmethod
+    def from_map_data(cls, map_data: MapLocation, on_bike: bool, surfing: bool) -> "WalkabilityGrid":
+        grid = cls((map_data.map_group, map_data.map_number), *map_data.map_size)
+        for column in map_data.all_tiles():
+            for tile in column:
+                x, y = tile.local_position
+                tile_type = tile.tile_type
+                grid.elevation[y][x] = tile.elevation
+                grid.impassable_directions[y][x] = _impassable_directions.get(tile_type, set())
+                grid.jump_direction[y][x] = _jump_directions.get(tile_type)
+                grid.arrow_warp_direction[y][x] = _arrow_warp_directions.get(tile_type)
+
+                if tile.collision != 0:
+                    passable = False
+                elif surfing:
+                    passable = tile.is_surfable
+                else:
+                    passable = not tile.is_surfable and (not on_bike or tile.is_cycling_possible)
+                grid.passable[y][x] = passable
+        return grid
+
+    def is_inside(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def get_destination(self, x: int, y: int, direction: str) -> tuple[int, int] | None:
+        """
+        :param x: Local X coordinate to move from
+        :param y: Local Y coordinate to move from
+        :param direction: One of the keys of `directions`
+        :return: Coordinates that the player ends up at after moving in `direction`, or None if
+                 that is not possible. Moving off the edge of the map returns coordinates outside
+                 the map, which need to be handled by the caller.
+        """
+        dx, dy = directions[direction]
+        if direction in self.impassable_directions[y][x]:
+            return None
+
+        new_x, new_y = x + dx, y + dy
+        if not self.is_inside(new_x, new_y):
+            return new_x, new_y
+
+        if (
+            not self.passable[new_y][new_x]
+            or _opposite_direction(direction) in self.impassable_directions[new_y][new_x]
+        ):
+            return None
+
+        jump_direction = self.jump_direction[new_y][new_x]
+        if jump_direction is not None:
+            # Ledges can only be jumped down, and the player lands on the tile behind them.
+            if jump_direction != direction:
+                return None
+            new_x, new_y = new_x + dx, new_y + dy
+            if not self.is_inside(new_x, new_y) or not self.passable[new_y][new_x]:
+                return None
+            return new_x, new_y
+
+        # Tiles with an elevation of 0 or 15 connect to any elevation, others only to the same one.
+        from_elevation = self.elevation[y][x]
+        to_elevation = self.elevation[new_y][new_x]
+        if from_elevation != to_elevation and from_elevation not in (0, 15) and to_elevation not in (0, 15):
+            return None
+
+        return new_x, new_y
+
+
+def _opposite_direction(direction: str) -> str:
+    return {"North": "South", "South": "North", "West": "East", "East": "West"}[direction]
+
+
+@lru_cache(maxsize=64)
+def get_walkability_grid(
+    map_group: int, map_number: int, on_bike: bool = False, surfing: bool = False
+) -> WalkabilityGrid:
+    return WalkabilityGrid.from_map_data(get_map_data(map_group, map_number, (0, 0)), on_bike, surfing)
+
+
+def _get_edge_exit(
+    grid: WalkabilityGrid, x: int, y: int, direction: str
+) -> tuple[tuple[int, int], tuple[int, int]] | None:
+    """
+    :return: Tuple of (destination map, destination coordinates) when walking off the edge of a map
+             through one of its connections, or None if there is no connection in that direction.
+    """
+    map_data = get_map_data(*grid.map_group_and_number, (0, 0))
+    for connection in map_data.connections:
+        if connection.direction != direction:
+            continue
+
+        destination = (connection.destination_map_group, connection.destination_map_number)
+        destination_grid = get_walkability_grid(*destination)
+        match direction:
+            case "North":
+                coordinates = (x - connection.offset, destination_grid.height - 1)
+            case "South":
+                coordinates = (x - connection.offset, 0)
+            case "West":
+                coordinates = (destination_grid.width - 1, y - connection.offset)
+            case _:
+                coordinates = (0, y - connection.offset)
+
+        if destination_grid.is_inside(*coordinates):
+            return destination, coordinates
+    return None
+
+
+@lru_cache(maxsize=64)
+def _get_warp_exits(map_group: int, map_number: int) -> dict[tuple[int, int], tuple[tuple[int, int], tuple[int, int]]]:
+    """
+    :return: Warp tile coordinates => (destination map, destination coordinates)
+    """
+    result = {}
+    for warp in get_map_data(map_group, map_number, (0, 0)).warps:
+        if warp.destination_map_group == 127:
+            continue
+        destination = (warp.destination_map_group, warp.destination_map_number)
+        destination_warps = get_map_data(*destination, (0, 0)).warps
+        if warp.destination_warp_id < len(destination_warps):
+            result[warp.local_coordinates] = (
+                destination,
+                destination_warps[warp.destination_warp_id].local_coordinates,
+            )
+    return result
+
+
+@lru_cache(maxsize=512)
+def get_neighbouring_maps(map_group: int, map_number: int) -> frozenset[tuple[int, int]]:
+    """
+    This is one node of the graph of which maps can be reached from which other maps (through
+    connections at the map's edges or through warps.) It does not take tile walkability into
+    account, so it is only used to narrow down which maps a route could possibly go through.
+
+    :return: Set of (group, number) of all maps that can be reached directly from this map
+    """
+    map_data = get_map_data(map_group, map_number, (0, 0))
+    result = set()
+    for connection in map_data.connections:
+        if connection.direction in directions:
+            result.add((connection.destination_map_group, connection.destination_map_number))
+    for warp in map_data.warps:
+        # Warps to the 'dynamic' map (127.127) lead to wherever the player came from, so they
+        # cannot be planned for.
+        if warp.destination_map_group != 127:
+            result.add((warp.destination_map_group, warp.destination_map_number))
+    return frozenset(result)
+
+
+def _find_maps_on_route(start_map: tuple[int, int], goal_map: tuple[int, int]) -> set[tuple[int, int]] | None:
+    """
+    :return: All maps that are on a shortest (in number of maps) route between the two maps,
+             or None if the goal map cannot be reached at all.
+    """
+    distance_from_start = {start_map: 0}
+    queue = [start_map]
+    for current_map in queue:
+        if current_map == goal_map:
+            break
+        for neighbour in get_neighbouring_maps(*current_map):
+            if neighbour not in distance_from_start:
+                distance_from_start[neighbour] = distance_from_start[current_map] + 1
+                queue.append(neighbour)
+
+    if goal_map not in distance_from_start:
+        return None
+
+    # Walk back from the goal, keeping all maps that are one step closer to the start.
+    result = {goal_map}
+    current_layer = {goal_map}
+    for distance in range(distance_from_start[goal_map] - 1, -1, -1):
+        current_layer = {
+            map_group_and_number
+            for map_group_and_number in distance_from_start
+            if distance_from_start[map_group_and_number] == distance
+            and not get_neighbouring_maps(*map_group_and_number).isdisjoint(current_layer)
+        }
+        result.update(current_layer)
+    return result
+
+
+@dataclass(frozen=True)
+class PathStep:
+    """
+    A single step of a path: The map and local coordinates of the tile that the player should
+    move to, and whether doing so takes the player to another map (which might not be
+    adjacent in terms of coordinates, because of a warp or connection.)
+    """
+
+    map_group_and_number: tuple[int, int]
+    coordinates: tuple[int, int]
+    changes_map_to: tuple[int, int] | None = None
+
+
+def _get_move(
+    grid: WalkabilityGrid,
+    warp_exits: dict[tuple[int, int], tuple[tuple[int, int], tuple[int, int]]],
+    x: int,
+    y: int,
+    direction: str,
+    goal_node: tuple[tuple[int, int], tuple[int, int]],
+) -> tuple[tuple[int, int], tuple[int, int], PathStep] | None:
+    """
+    :return: Tuple of (map, coordinates, step) that moving in `direction` leads to, or None if that is not possible
+    """
+    current_map = grid.map_group_and_number
+
+    # Arrow warps (such as the exit mats of buildings) are triggered by trying to leave the tile in
+    # the arrow's direction, regardless of what is behind it.
+    if (x, y) in warp_exits and grid.arrow_warp_direction[y][x] == direction:
+        dx, dy = directions[direction]
+        next_map, next_coordinates = warp_exits[(x, y)]
+        return next_map, next_coordinates, PathStep(current_map, (x + dx, y + dy), next_map)
+
+    destination = grid.get_destination(x, y, direction)
+    if destination is None:
+        return None
+
+    if not grid.is_inside(*destination):
+        edge_exit = _get_edge_exit(grid, x, y, direction)
+        if edge_exit is None:
+            return None
+        next_map, next_coordinates = edge_exit
+        return next_map, next_coordinates, PathStep(current_map, destination, next_map)
+
+    # Other warps are triggered by stepping onto them, unless that tile is the goal itself.
+    destination_x, destination_y = destination
+    if (
+        destination in warp_exits
+        and grid.arrow_warp_direction[destination_y][destination_x] is None
+        and (current_map, destination) != goal_node
+    ):
+        next_map, next_coordinates = warp_exits[destination]
+        return next_map, next_coordinates, PathStep(current_map, destination, next_map)
+
+    return current_map, destination, PathStep(current_map, destination)
+
+
+def _search_path(
+    start_map: tuple[int, int],
+    start: tuple[int, int],
+    goal_map: tuple[int, int],
+    goal: tuple[int, int],
+    on_bike: bool,
+    surfing: bool,
+    avoid: frozenset[tuple[tuple[int, int], tuple[int, int]]],
+) -> tuple[PathStep, ...] | None:
+    """
+    The actual A* search, see `find_path()` for the parameters.
+    """
+    maps_on_route = _find_maps_on_route(start_map, goal_map)
+    if maps_on_route is None:
+        return None
+
+    def heuristic(map_group_and_number: tuple[int, int], x: int, y: int) -> int:
+        # The Manhattan distance is only a valid estimate within the same map, as coordinates
+        # of different maps are not related to each other.
+        if map_group_and_number == goal_map:
+            return abs(goal[0] - x) + abs(goal[1] - y)
+        return 0
+
+    start_node = (start_map, start)
+    goal_node = (goal_map, goal)
+    came_from: dict[tuple, tuple[tuple, PathStep]] = {}
+    cost_so_far = {start_node: 0}
+    open_list = [(heuristic(start_map, *start), 0, start_node)]
+    counter = 0
+
+    while open_list:
+        _, _, node = heapq.heappop(open_list)
+        if node == goal_node:
+            steps = []
+            while node in came_from:
+                node, step = came_from[node]
+                steps.append(step)
+            return tuple(reversed(steps))
+
+        current_map, (x, y) = node
+        grid = get_walkability_grid(*current_map, on_bike, surfing)
+        warp_exits = _get_warp_exits(*current_map)
+
+        for direction in directions:
+            move = _get_move(grid, warp_exits, x, y, direction, goal_node)
+            if move is None:
+                continue
+
+            next_map, next_coordinates, step = move
+            if next_map not in maps_on_route or (step.map_group_and_number, step.coordinates) in avoid:
+                continue
+
+            next_node = (next_map, next_coordinates)
+            new_cost = cost_so_far[node] + 1
+            if next_node not in cost_so_far or new_cost < cost_so_far[next_node]:
+                cost_so_far[next_node] = new_cost
+                came_from[next_node] = (node, step)
+                counter += 1
+                heapq.heappush(open_list, (new_cost + heuristic(next_map, *next_coordinates), counter, next_node))
+
+    return None
+
+
+@lru_cache(maxsize=256)
+def _find_path_ignoring_objects(
+    start_map: tuple[int, int],
+    start: tuple[int, int],
+    goal_map: tuple[int, int],
+    goal: tuple[int, int],
+    on_bike: bool,
+    surfing: bool,
+) -> tuple[PathStep, ...] | None:
+    return _search_path(start_map, start, goal_map, goal, on_bike, surfing, frozenset())
+
+
+def find_path(
+    start_map: tuple[int, int],
+    start: tuple[int, int],
+    goal_map: tuple[int, int],
+    goal: tuple[int, int],
+    on_bike: bool = False,
+    surfing: bool = False,
+    avoid: frozenset[tuple[tuple[int, int], tuple[int, int]]] = frozenset(),
+) -> tuple[PathStep, ...] | None:
+    """
+    Finds the shortest path between two tiles, which may be on different maps.
+
+    Paths are cached for each combination of start, goal and bike/surf state. Tiles in `avoid`
+    change all the time (as NPCs walk around), so they are not part of that: The cached path is
+    only checked against them, and a new path is only searched if one of them is in the way.
+
+    :param start_map: (group, number) of the map the path starts on
+    :param start: Local coordinates to start from
+    :param goal_map: (group, number) of the map the path should end on
+    :param goal: Local coordinates that the path should end at
+    :param on_bike: Whether the player is riding a bike (which is not possible on all tiles)
+    :param surfing: Whether the player is surfing (so only water tiles can be used)
+    :param avoid: Set of (map, coordinates) tuples of tiles that should not be entered, such as
+                  tiles that NPCs are standing on
+    :return: The steps to take (not including the starting tile), or None if there is no path
+    """
+    path = _find_path_ignoring_objects(start_map, start, goal_map, goal, on_bike, surfing)
+    if path is None or avoid.isdisjoint((step.map_group_and_number, step.coordinates) for step in path):
+        return path
+    return _search_path(start_map, start, goal_map, goal, on_bike, surfing, avoid)
+
+
+def _clear_caches() -> None:
+    get_walkability_grid.cache_clear()
+    _get_warp_exits.cache_clear()
+    get_neighbouring_maps.cache_clear()
+    _find_path_ignoring_objects.cache_clear()
+
+
+on_rom_change(_clear_caches)
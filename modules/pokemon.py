@@ -707,10 +707,15 @@ class Pokemon:
 
     So serialising or copying a Pokemon only requires to store/copy this property and nothing else.
     The class will calculate everything else on-the-fly.
+
+    If the Pokemon has been decoded as part of a batch (see `decode_pokemon_batch()`), the
+    respective entry of that batch can be passed as `decoded` so it doesn't need to be decrypted
+    again.
     """
 
-    def __init__(self, data: bytes):
+    def __init__(self, data: bytes, decoded: numpy.void | None = None):
         self.data = data
+        self._decoded = decoded
 
     def __eq__(self, other):
         if isinstance(other, Pokemon):
@@ -739,6 +744,9 @@ class Pokemon:
 
         :return: The decrypted and re-ordered data for this Pokemon.
         """
+        if self._decoded is not None:
+            return self._decoded["decrypted_data"].tobytes()
+
         order = POKEMON_DATA_SUBSTRUCTS_ORDER[self.personality_value % 24]
         u32le = numpy.dtype("<u4")
 
@@ -772,6 +780,8 @@ class Pokemon:
 
     @property
     def is_valid(self) -> bool:
+        if self._decoded is not None:
+            return bool(self._decoded["is_valid"])
         return self.get_data_checksum() == self.calculate_checksum()
 
     @property
@@ -1318,6 +1328,69 @@ class Pokemon:
         }
 
 
+_substructs_order_array = numpy.array(POKEMON_DATA_SUBSTRUCTS_ORDER, dtype=numpy.uint8)
+
+
+def decode_pokemon_batch(data: bytes | bytearray | memoryview, struct_size: int = 100) -> numpy.ndarray:
+    """
+    Decrypts and validates a whole array of Pokémon structs (such as `gPlayerParty` or the boxes
+    in `gPokemonStorage`) in one go, which is a lot faster than doing it for each slot individually.
+
+    Each entry of the returned array can be passed to `Pokemon()` as its `decoded` parameter, in
+    which case the Pokémon won't need to decrypt its data again.
+
+    :param data: Raw data of consecutive Pokémon structs
+    :param struct_size: Size of a single struct, 100 for party Pokémon and 80 for boxed Pokémon
+    :return: A structured array with one entry per slot, containing the fields `personality_value`,
+             `is_empty`, `is_valid`, `species_id`, `shiny_value`, `ivs`, `iv_sum`, `evs` and
+             `decrypted_data` (the same data that `Pokemon._decrypted_data` would return.)
+             IVs and EVs are in the order HP, Attack, Defence, Speed, Sp. Attack, Sp. Defence.
+    """
+    count = len(data) // struct_size
+    raw = numpy.frombuffer(data, dtype=numpy.uint8, count=count * struct_size).reshape(count, struct_size)
+    words = raw.view("<u4")
+    half_words = raw.view("<u2")
+
+    # Decrypt the 4 substructures (12 bytes, i.e. 3 words each) and put them in a consistent order.
+    personality_value = words[:, 0]
+    key = personality_value ^ words[:, 1]
+    encrypted = (words[:, 8:20] ^ key[:, numpy.newaxis]).reshape(count, 4, 3)
+    order = _substructs_order_array[personality_value % 24]
+    decrypted_substructs = numpy.take_along_axis(encrypted, order[:, :, numpy.newaxis].astype(numpy.intp), axis=1)
+
+    decrypted_data = raw.copy()
+    decrypted_data.view("<u4")[:, 8:20] = decrypted_substructs.reshape(count, 12)
+    decrypted_half_words = decrypted_data.view("<u2")
+
+    packed_ivs = decrypted_data.view("<u4")[:, 18]
+    ivs = numpy.stack([(packed_ivs >> shift) & 0b11111 for shift in (0, 5, 10, 15, 20, 25)], axis=1)
+
+    result = numpy.empty(
+        count,
+        dtype=[
+            ("personality_value", "<u4"),
+            ("is_empty", "?"),
+            ("is_valid", "?"),
+            ("species_id", "<u2"),
+            ("shiny_value", "<u2"),
+            ("ivs", "u1", (6,)),
+            ("iv_sum", "<u2"),
+            ("evs", "u1", (6,)),
+            ("decrypted_data", "u1", (struct_size,)),
+        ],
+    )
+    result["personality_value"] = personality_value
+    result["is_empty"] = raw[:, 19] & 0x02 == 0
+    result["is_valid"] = (decrypted_half_words[:, 16:40].sum(axis=1, dtype=numpy.uint32) & 0xFFFF) == half_words[:, 14]
+    result["species_id"] = decrypted_half_words[:, 16]
+    result["shiny_value"] = half_words[:, 2] ^ half_words[:, 3] ^ half_words[:, 0] ^ half_words[:, 1]
+    result["ivs"] = ivs
+    result["iv_sum"] = ivs.sum(axis=1)
+    result["evs"] = decrypted_data[:, 56:62]
+    result["decrypted_data"] = decrypted_data
+    return result
+
+
 def parse_pokemon(data: bytes) -> Pokemon | None:
     pokemon = Pokemon(data)
     if not pokemon.is_empty and pokemon.is_valid:
@@ -1463,17 +1536,19 @@ def get_party() -> list[Pokemon]:
 
     party = []
     party_count = read_symbol("gPlayerPartyCount", size=1)[0]
+    party_data = read_symbol("gPlayerParty", size=party_count * 100)
+    decoded_party = decode_pokemon_batch(party_data)
     for p in range(party_count):
         o = p * 100
-        mon = parse_pokemon(read_symbol("gPlayerParty", o, 100))
+        mon = Pokemon(party_data[o : o + 100], decoded_party[p])
 
         # It's possible for party data to be written while we are trying to read it, in which case
-        # the checksum would be wrong and `parse_pokemon()` returns `None`.
+        # the checksum would be wrong.
         #
         # In order to still get a valid result, we will 'peek' into next frame's memory by
         # (1) advancing the emulation by one frame, (2) reading the memory, (3) restoring the previous
         # frame's state so we don't mess with frame accuracy.
-        if mon is None:
+        if mon.is_empty or not mon.is_valid:
             mon = context.emulator.peek_frame(lambda: parse_pokemon(read_symbol("gPlayerParty", o, 100)))
             if mon is None:
                 raise RuntimeError(f"Party Pokemon #{p + 1} was invalid for two frames in a row.")
@@ -4,7 +4,7 @@ from functools import cached_property
 from modules.context import context
 from modules.game import get_symbol, decode_string
 from modules.memory import read_symbol, unpack_uint32
-from modules.pokemon import Pokemon, Species
+from modules.pokemon import Pokemon, Species, decode_pokemon_batch
 from modules.state_cache import state_cache
 
 
@@ -62,10 +62,26 @@ class PokemonStorageBox:
 
 
 class PokemonStorage:
-    def __init__(self, offset: int, data: bytes):
+    def __init__(self, offset: int, data: bytes, previous_storage: "PokemonStorage | None" = None):
+        """
+        :param offset: Memory address of the storage data
+        :param data: Raw storage data
+        :param previous_storage: An earlier version of the same storage. If its boxes have already
+                                 been decoded, all boxes and slots that have not changed since
+                                 will be reused rather than decoded again.
+        """
         self._offset = offset
         self._data = data
 
+        # Only keep the previous storage's data and boxes rather than the object itself, so that
+        # this does not end up as an ever-growing chain of old storage objects.
+        if previous_storage is not None and "boxes" in previous_storage.__dict__:
+            self._previous_data = previous_storage._data
+            self._previous_boxes = previous_storage.boxes
+        else:
+            self._previous_data = None
+            self._previous_boxes = None
+
     def __eq__(self, other):
         if isinstance(other, PokemonStorage):
             return other._data == self._data
@@ -88,25 +104,58 @@ class PokemonStorage:
 
     @cached_property
     def boxes(self) -> list[PokemonStorageBox]:
+        data = self._data
+        previous_data = self._previous_data
+        previous_boxes = self._previous_boxes
+        self._previous_data = None
+        self._previous_boxes = None
+
         boxes = []
         for box_index in range(14):
             name_offset = 0x8344 + (box_index * 9)
-            name = decode_string(self._data[name_offset : name_offset + 9])
-
             wallpaper_id_index = 0x83C2 + box_index
-            wallpaper_id = self._data[wallpaper_id_index]
-
             pokemon_offset = 0x4 + (box_index * 30 * 80)
+            pokemon_end = pokemon_offset + (30 * 80)
+
+            # If nothing in this box has changed, just keep using the box from the previous version.
+            if (
+                previous_boxes is not None
+                and data[pokemon_offset:pokemon_end] == previous_data[pokemon_offset:pokemon_end]
+                and data[name_offset : name_offset + 9] == previous_data[name_offset : name_offset + 9]
+                and data[wallpaper_id_index] == previous_data[wallpaper_id_index]
+            ):
+                boxes.append(previous_boxes[box_index])
+                continue
+
+            name = decode_string(data[name_offset : name_offset + 9])
+            wallpaper_id = data[wallpaper_id_index]
+
+            previous_slots = {}
+            if previous_boxes is not None:
+                previous_slots = {slot.slot_index: slot for slot in previous_boxes[box_index].slots}
+
+            decoded_slots = decode_pokemon_batch(data[pokemon_offset:pokemon_end], struct_size=80)
             slots = []
             for slot_index in range(30):
+                decoded = decoded_slots[slot_index]
+                if decoded["is_empty"]:
+                    continue
+
                 offset = pokemon_offset + (slot_index * 80)
-                pokemon = Pokemon(self._data[offset : offset + 80])
-                if not pokemon.is_empty:
-                    slots.append(PokemonStorageSlot(slot_index, pokemon))
+                pokemon_data = data[offset : offset + 80]
+                previous_slot = previous_slots.get(slot_index)
+                if previous_slot is not None and previous_slot.pokemon.data == pokemon_data:
+                    slots.append(previous_slot)
+                else:
+                    slots.append(PokemonStorageSlot(slot_index, Pokemon(pokemon_data, decoded)))
 
             boxes.append(PokemonStorageBox(box_index, name, wallpaper_id, slots))
         return boxes
 
+    @cached_property
+    def _personality_values(self) -> set[int]:
+        return {slot.pokemon.personality_value for box in self.boxes for slot in box.slots}
+
     @property
     def pokemon_count(self) -> int:
         count = 0
@@ -122,11 +171,7 @@ class PokemonStorage:
         return False
 
     def contains_pokemon(self, pokemon: Pokemon) -> bool:
-        for box in self.boxes:
-            for slot in box.slots:
-                if slot.pokemon.data[0:4] == pokemon.data[0:4]:
-                    return True
-        return False
+        return pokemon.personality_value in self._personality_values
 
     def dangerous_import_into_storage(self, pokemon: Pokemon) -> tuple[int, str] | None:
         # Check whether PC storage is completely full.
@@ -172,6 +217,17 @@ def get_pokemon_storage() -> PokemonStorage:
     else:
         offset, length = get_symbol("gPokemonStorage")
 
-    pokemon_storage = PokemonStorage(offset, context.emulator.read_bytes(offset, length))
+    # The storage system is ~33 KB and rarely changes, so compare it to the cached copy directly
+    # in emulator memory and only make a new copy if something has actually changed.
+    cached_storage = state_cache.pokemon_storage.value
+    if cached_storage is not None and cached_storage._offset == offset:
+        if cached_storage._data == context.emulator.get_memory_view(offset, length):
+            state_cache.pokemon_storage.checked()
+            return cached_storage
+
+    if cached_storage is not None and cached_storage._offset != offset:
+        cached_storage = None
+
+    pokemon_storage = PokemonStorage(offset, context.emulator.read_bytes(offset, length), cached_storage)
     state_cache.pokemon_storage = pokemon_storage
     return pokemon_storage
@@ -0,0 +1,172 @@
+"""
+Predicts the Pokémon that the game's random number generator is going to produce.
+
+Gen 3 uses a linear congruential RNG (`gRngValue`), and wild/static Pokémon are generated from
+consecutive values of it: two calls for the personality value, and two more for the IVs (with an
+unused call in between for 'method 2' and 'method 4', which some encounters use.)
+
+Everything here works on NumPy arrays, so it can predict thousands of RNG advances in one go --
+which makes it possible to pick a target frame without having to emulate every possibility.
+
+See: https://bulbapedia.bulbagarden.net/wiki/Pseudorandom_number_generation_in_Pok%C3%A9mon
+"""
+
+from typing import Literal
+
+import numpy
+
+rng_multiplier = 0x41C64E6D
+rng_increment = 0x6073
+
+# Number of RNG calls to skip after generating the personality value (index 0) and after the first
+# half of the IVs (index 1), for each generation method.
+_method_skips: dict[int, tuple[int, int]] = {
+    1: (0, 0),
+    2: (1, 0),
+    4: (0, 1),
+}
+
+
+def get_rng_jump(steps: int) -> tuple[int, int]:
+    """
+    Advancing the RNG by any number of steps is itself a linear congruential function, so it
+    can be done in a single calculation: `state * multiplier + increment`.
+
+    :param steps: Number of times the RNG should be advanced
+    :return: Tuple of (multiplier, increment) that advances the RNG by `steps`
+    """
+    multiplier, increment = 1, 0
+    step_multiplier, step_increment = rng_multiplier, rng_increment
+    while steps > 0:
+        if steps & 1:
+            multiplier, increment = (multiplier * step_multiplier) & 0xFFFF_FFFF, (
+                increment * step_multiplier + step_increment
+            ) & 0xFFFF_FFFF
+        step_multiplier, step_increment = (step_multiplier * step_multiplier) & 0xFFFF_FFFF, (
+            step_increment * (step_multiplier + 1)
+        ) & 0xFFFF_FFFF
+        steps >>= 1
+    return multiplier, increment
+
+
+def advance_rng(rng_value: int, steps: int = 1) -> int:
+    """
+    :param rng_value: Current value of `gRngValue`
+    :param steps: Number of times the RNG should be advanced
+    :return: Value of `gRngValue` after `steps` more calls to `Random()`
+    """
+    multiplier, increment = get_rng_jump(steps)
+    return (rng_value * multiplier + increment) & 0xFFFF_FFFF
+
+
+def get_rng_values(rng_value: int, count: int) -> numpy.ndarray:
+    """
+    :param rng_value: Current value of `gRngValue`
+    :param count: Number of values to return
+    :return: Array of `count` consecutive RNG states, starting with `rng_value` itself
+    """
+    result = numpy.empty(count, dtype=numpy.uint32)
+    if count == 0:
+        return result
+
+    # Fills the array by doubling the number of known values each time: If the first `n` states are
+    # known, the next `n` are just those advanced by `n` steps.
+    result[0] = rng_value
+    known = 1
+    while known < count:
+        block = min(known, count - known)
+        multiplier, increment = get_rng_jump(known)
+        result[known : known + block] = result[:block] * numpy.uint32(multiplier) + numpy.uint32(increment)
+        known += block
+    return result
+
+
+def _advance(values: numpy.ndarray) -> numpy.ndarray:
+    # `uint32` arithmetic wraps around, which is exactly the `& 0xFFFFFFFF` that the game does.
+    return values * numpy.uint32(rng_multiplier) + numpy.uint32(rng_increment)
+
+
+def predict_pokemon(
+    rng_value: int, trainer_id: int, secret_id: int, advances: int, method: Literal[1, 2, 4] = 1
+) -> numpy.ndarray:
+    """
+    Predicts the Pokémon generated after each of the next `advances` RNG advances.
+
+    Entry `n` of the result is the Pokémon that would be generated if the game started generating
+    it after the RNG had been advanced `n` times from `rng_value`.
+
+    :param rng_value: Current value of `gRngValue`
+    :param trainer_id: The player's (public) trainer ID
+    :param secret_id: The player's secret ID
+    :param advances: Number of RNG advances to predict
+    :param method: PID/IV generation method (1 for most static and wild encounters)
+    :return: A structured array with one entry per advance, containing the fields `advance`,
+             `rng_value` (the state before generation starts), `personality_value`, `shiny_value`,
+             `is_shiny`, `nature` (index, see `get_nature_by_index()`), `ivs` and `iv_sum`.
+             IVs are in the order HP, Attack, Defence, Speed, Sp. Attack, Sp. Defence.
+    """
+    if method not in _method_skips:
+        raise RuntimeError(f"Unsupported PID/IV generation method: {method}")
+    skip_after_personality_value, skip_after_first_ivs = _method_skips[method]
+
+    states = get_rng_values(rng_value, advances)
+
+    values = _advance(states)
+    personality_value_low = values >> 16
+    values = _advance(values)
+    personality_value_high = values >> 16
+    for _ in range(skip_after_personality_value):
+        values = _advance(values)
+    values = _advance(values)
+    first_ivs = values >> 16
+    for _ in range(skip_after_first_ivs):
+        values = _advance(values)
+    values = _advance(values)
+    second_ivs = values >> 16
+
+    ivs = numpy.stack(
+        [(first_ivs >> shift) & 0b11111 for shift in (0, 5, 10)]
+        + [(second_ivs >> shift) & 0b11111 for shift in (0, 5, 10)],
+        axis=1,
+    )
+    shiny_value = (trainer_id ^ secret_id) ^ personality_value_high ^ personality_value_low
+
+    result = numpy.empty(
+        advances,
+        dtype=[
+            ("advance", "<u4"),
+            ("rng_value", "<u4"),
+            ("personality_value", "<u4"),
+            ("shiny_value", "<u2"),
+            ("is_shiny", "?"),
+            ("nature", "u1"),
+            ("ivs", "u1", (6,)),
+            ("iv_sum", "<u2"),
+        ],
+    )
+    result["advance"] = numpy.arange(advances, dtype=numpy.uint32)
+    result["rng_value"] = states
+    result["personality_value"] = (personality_value_high << 16) | personality_value_low
+    result["shiny_value"] = shiny_value
+    result["is_shiny"] = shiny_value < 8
+    result["nature"] = result["personality_value"] % 25
+    result["ivs"] = ivs
+    result["iv_sum"] = ivs.sum(axis=1)
+    return result
+
+
+def predict_pokemon_from_current_rng(advances: int, method: Literal[1, 2, 4] = 1) -> numpy.ndarray:
+    """
+    Like `predict_pokemon()`, but uses the emulator's current `gRngValue` and the player's trainer ID.
+
+    :param advances: Number of RNG advances to predict
+    :param method: PID/IV generation method (1 for most static and wild encounters)
+    :return: See `predict_pokemon()`
+    """
+    from modules.memory import read_symbol, unpack_uint32
+    from modules.player import get_player
+
+    player = get_player()
+    return predict_pokemon(
+        unpack_uint32(read_symbol("gRngValue")), player.trainer_id, player.secret_id, advances, method
+    )
@@ -0,0 +1,231 @@
+"""
+Searches many RNG seeds in parallel, using one emulator per CPU core.
+
+Modes like `ModeStaticSoftResets` try one seed at a time on the main emulator. Instead, this
+takes a save state of the point right before the RNG-dependent part of an encounter, hands it
+to a pool of worker processes, and lets each of them try a range of seeds: Inject the seed into
+`gRngValue`, run forward until `gEnemyParty` has been populated, and decode the opponent.
+
+Only opponents that are shiny or match the profile's `custom_catch_filters` are sent back, along
+with a save state from right after the seed has been injected, so that the main bot can load it
+and play the encounter for real.
+
+Workers run their own `LibmgbaEmulator`, but on a temporary copy of the profile directory so
+that they never touch the profile's save game or `current_state.ss1`.
+"""
+
+import importlib
+import multiprocessing
+import shutil
+import signal
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, TYPE_CHECKING
+
+from modules.console import console
+
+if TYPE_CHECKING:
+    from modules.pokemon import Pokemon
+
+# Number of seeds that a worker tries before reporting back. Smaller chunks spread the work more
+# evenly, larger ones mean less communication overhead.
+seeds_per_chunk = 64
+
+
+@dataclass
+class SeedSearchMatch:
+    seed: int
+    # 100 bytes of party Pokémon data, see `modules.pokemon.Pokemon`
+    pokemon_data: bytes
+    # Either 'shiny' or the return value of `custom_catch_filters()`
+    reason: str
+    # Emulator state from right after the seed has been injected
+    save_state: bytes
+
+    @property
+    def pokemon(self) -> "Pokemon":
+        from modules.pokemon import Pokemon
+
+        return Pokemon(self.pokemon_data)
+
+
+# State of the current worker process, set up by `_initialise_worker()`.
+_worker_snapshot: int | None = None
+_worker_custom_catch_filters: callable = None
+_worker_buttons: tuple[str, ...] = ()
+_worker_max_frames: int = 0
+
+
+def _initialise_worker(
+    profile_name: str, temporary_path: Path, save_state: bytes, buttons: tuple[str, ...], max_frames: int
+) -> None:
+    """
+    Entry point of a worker process. Loads the profile's ROM into a new emulator and restores
+    the save state that all seeds are being tried from.
+
+    Workers are terminated rather than shut down cleanly (see `SeedSearchPool.close()`), so they
+    cannot clean up after themselves. Their files are put into a subdirectory of `temporary_path`
+    instead, which is deleted by the main process.
+
+    This needs to be a module-level function so that it can be pickled on platforms that use the
+    `spawn` start method (i.e. Windows.)
+    """
+    global _worker_snapshot, _worker_custom_catch_filters, _worker_buttons, _worker_max_frames
+
+    # Ctrl+C is handled by the main process, which will then terminate the pool.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    console.quiet = True
+
+    from modules.context import context
+    from modules.game import set_rom
+    from modules.libmgba import LibmgbaEmulator
+    from modules.profiles import Profile, load_profile_by_name
+
+    profile = load_profile_by_name(profile_name)
+    context.config.load(profile.path, strict=False)
+    set_rom(profile.rom)
+
+    # The emulator writes its save game and state into the profile directory, so it gets a
+    # throw-away directory instead.
+    context.profile = Profile(profile.rom, Path(tempfile.mkdtemp(dir=temporary_path)), None)
+
+    context.emulator = LibmgbaEmulator(context.profile, lambda: None)
+    context.audio = False
+    context.video = False
+    context.emulator.set_throttle(False)
+    context.emulator.load_save_state(save_state)
+    _worker_snapshot = context.emulator.take_snapshot()
+
+    if (profile.path / "customcatchfilters.py").is_file():
+        _worker_custom_catch_filters = importlib.import_module(
+            ".customcatchfilters", f"profiles.{profile.path.name}"
+        ).custom_catch_filters
+    else:
+        from profiles.customcatchfilters import custom_catch_filters
+
+        _worker_custom_catch_filters = custom_catch_filters
+
+    _worker_buttons = buttons
+    _worker_max_frames = max_frames
+
+
+def _try_seed(seed: int) -> SeedSearchMatch | None:
+    from modules.context import context
+    from modules.memory import get_symbol, pack_uint32, read_symbol, write_symbol
+    from modules.pokemon import Pokemon
+
+    emulator = context.emulator
+    emulator.restore_snapshot(_worker_snapshot)
+    write_symbol("gRngValue", pack_uint32(seed))
+
+    enemy_party_address, _ = get_symbol("gEnemyParty")
+    has_changed = emulator.create_memory_watcher(enemy_party_address, 100)
+    for frame in range(_worker_max_frames):
+        # Buttons are pressed every other frame, because holding one would not register as a new press.
+        if frame % 2 == 0:
+            button = _worker_buttons[(frame // 2) % len(_worker_buttons)]
+            emulator.press_button(button)
+        emulator.run_frames(1)
+
+        if has_changed():
+            pokemon = Pokemon(read_symbol("gEnemyParty", size=100))
+            if pokemon.is_empty or not pokemon.is_valid:
+                # The game might have been in the middle of writing the opponent's data, in which case
+                # it should be complete on one of the next frames.
+                has_changed = emulator.create_memory_watcher(enemy_party_address, 100)
+                continue
+
+            if pokemon.is_shiny:
+                reason = "shiny"
+            else:
+                reason = _worker_custom_catch_filters(pokemon)
+                if not reason:
+                    return None
+
+            emulator.restore_snapshot(_worker_snapshot)
+            write_symbol("gRngValue", pack_uint32(seed))
+            return SeedSearchMatch(seed, pokemon.data, str(reason), emulator.get_save_state())
+
+    return None
+
+
+def _try_seeds(seeds: range) -> tuple[int, list[SeedSearchMatch]]:
+    """
+    :return: Tuple of (number of seeds tried, matches)
+    """
+    matches = []
+    for seed in seeds:
+        match = _try_seed(seed)
+        if match is not None:
+            matches.append(match)
+    return len(seeds), matches
+
+
+class SeedSearchPool:
+    """
+    A pool of worker processes, each running their own emulator, that try out RNG seeds.
+
+    Example:
+
+        with SeedSearchPool(context.profile.path.name, context.emulator.get_save_state()) as pool:
+            for match in pool.search(range(0, 0x10000)):
+                context.emulator.load_save_state(match.save_state)
+                break
+    """
+
+    def __init__(
+        self,
+        profile_name: str,
+        save_state: bytes,
+        buttons: tuple[str, ...] = ("A",),
+        max_frames: int = 3600,
+        processes: int | None = None,
+    ):
+        """
+        :param profile_name: Name of the profile whose ROM and `custom_catch_filters` should be used
+        :param save_state: Emulator state to try each seed from, taken right before the RNG-dependent
+                           part of the encounter (e.g. in front of a static Pokémon)
+        :param buttons: Buttons to press (in turn, every other frame) until the encounter starts
+        :param max_frames: Number of frames after which a seed is given up on if there has not been
+                           an encounter
+        :param processes: Number of worker processes, defaults to the number of CPU cores
+        """
+        if len(buttons) == 0:
+            raise RuntimeError("At least one button needs to be pressed for the encounter to start.")
+
+        self.seeds_tried: int = 0
+        self._temporary_path = Path(tempfile.mkdtemp(prefix=f"pokebot-rng-search-{profile_name}-"))
+        self._pool = multiprocessing.get_context("spawn").Pool(
+            processes,
+            initializer=_initialise_worker,
+            initargs=(profile_name, self._temporary_path, save_state, tuple(buttons), max_frames),
+        )
+
+    def search(self, seeds: range | Iterable[int]) -> Iterator[SeedSearchMatch]:
+        """
+        Tries all the given seeds and yields matches as soon as they have been found. These are not
+        necessarily in the same order as `seeds`.
+
+        :param seeds: RNG seeds (values for `gRngValue`) to try
+        :return: Iterator of all seeds that led to a shiny or a Pokémon matching the custom catch filters
+        """
+        if not isinstance(seeds, range):
+            seeds = list(seeds)
+        chunks = (seeds[index : index + seeds_per_chunk] for index in range(0, len(seeds), seeds_per_chunk))
+        for number_of_seeds, matches in self._pool.imap_unordered(_try_seeds, chunks):
+            self.seeds_tried += number_of_seeds
+            yield from matches
+
+    def close(self) -> None:
+        # Waiting for the workers to finish their remaining chunks could take ages if the search
+        # has been abandoned early (e.g. after the first match), so they are killed instead.
+        self._pool.terminate()
+        self._pool.join()
+        shutil.rmtree(self._temporary_path, ignore_errors=True)
+
+    def __enter__(self) -> "SeedSearchPool":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
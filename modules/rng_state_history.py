@@ -0,0 +1,73 @@
+"""
+Keeps track of the RNG states (`gRngValue`) that soft resetting modes have already used, so that
+they do not encounter the same Pokémon twice.
+
+The history is stored in `soft_reset_frames.bin` in the profile directory, which is just a list of
+little-endian 32-bit integers. New states are appended to the file as soon as they are added, so
+neither adding a state nor a crash ever requires rewriting the whole file.
+"""
+
+import json
+from pathlib import Path
+
+import numpy
+
+
+class RngStateHistory:
+    def __init__(self, file: Path, legacy_json_file: Path | None = None):
+        """
+        :param file: Path to the binary history file (will be created if it does not exist)
+        :param legacy_json_file: Path to a `soft_reset_frames.json` file, which will be imported if
+                                 the binary file does not exist yet
+        """
+        self.file = file
+        if not file.exists() and legacy_json_file is not None and legacy_json_file.exists():
+            self._import_legacy_json_file(legacy_json_file)
+
+        if file.exists():
+            data = file.read_bytes()
+            # If the bot crashed while appending, the last entry might be incomplete.
+            complete_length = len(data) - len(data) % 4
+            self._loaded_states = numpy.unique(numpy.frombuffer(data, dtype="<u4", count=complete_length // 4))
+            if complete_length != len(data):
+                with open(file, "r+b") as open_file:
+                    open_file.truncate(complete_length)
+        else:
+            self._loaded_states = numpy.empty(0, dtype="<u4")
+
+        # States that have been added since the file was loaded. Those that had been there before are
+        # kept in a sorted NumPy array instead, which takes a lot less memory than a set.
+        self._new_states: set[int] = set()
+        self._file_handle = open(file, "ab", buffering=0)
+
+    def _import_legacy_json_file(self, legacy_json_file: Path) -> None:
+        try:
+            states = json.loads(legacy_json_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+
+        temporary_file = self.file.with_name(f"{self.file.name}.tmp")
+        temporary_file.write_bytes(numpy.array(states, dtype="<u4").tobytes())
+        temporary_file.replace(self.file)
+
+    def __contains__(self, rng_state: int) -> bool:
+        if rng_state in self._new_states:
+            return True
+        index = numpy.searchsorted(self._loaded_states, rng_state)
+        return index < len(self._loaded_states) and self._loaded_states[index] == rng_state
+
+    def __len__(self) -> int:
+        return len(self._loaded_states) + len(self._new_states)
+
+    def add(self, rng_state: int) -> None:
+        """
+        Adds an RNG state to the history and immediately appends it to the history file.
+        :param rng_state: Value of `gRngValue`
+        """
+        if rng_state in self:
+            return
+        self._new_states.add(rng_state)
+        self._file_handle.write(rng_state.to_bytes(4, "little"))
+
+    def close(self) -> None:
+        self._file_handle.close()
@@ -35,6 +35,14 @@ def get_data_path() -> Path:
     return Path(__file__).parent / "data"
 
 
+def get_cache_path() -> Path:
+    """
+    :return: A `Path` object to the directory where data derived from other files (that can be
+             regenerated at any time) is stored, such as the compiled symbol tables.
+    """
+    return get_base_path() / ".cache"
+
+
 def get_sprites_path() -> Path:
     """
     :return: A `Path` object to the `sprites` directory. Not that in pyinstaller distributions, this
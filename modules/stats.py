@@ -12,13 +12,15 @@ from collections import Counter
 
 from modules.console import console, print_stats
 from modules.context import context
-from modules.csv import log_encounter_to_csv
+from modules.csv import log_encounter_to_file
 from modules.discord import discord_message
+from modules.encounter_database import EncounterDatabase
 from modules.files import read_file, write_file
 from modules.memory import get_game_state, GameState
 from modules.pokemon import Pokemon
 from modules.runtime import get_sprites_path
 from modules.state_cache import state_cache
+from modules.stats_journal import StatsJournal
 
 
 class TotalStats:
@@ -40,6 +42,7 @@ class TotalStats:
             self.files = {
                 "shiny_log": self.stats_dir_path / "shiny_log.json",
                 "totals": self.stats_dir_path / "totals.json",
+                "totals_journal": self.stats_dir_path / "totals.journal",
             }
 
             if (self.config_dir_path / "customcatchfilters.py").is_file():
@@ -60,11 +63,20 @@ class TotalStats:
 
                 self.custom_hooks = custom_hooks
 
-            f_total_stats = read_file(self.files["totals"])
-            self.total_stats = json.loads(f_total_stats) if f_total_stats else {}
+            self.journal = StatsJournal(self.files["totals"], self.files["totals_journal"])
+            self.total_stats = self.journal.load()
 
             f_shiny_log = read_file(self.files["shiny_log"])
             self.shiny_log = json.loads(f_shiny_log) if f_shiny_log else {"shiny_log": []}
+
+            self.encounter_database = EncounterDatabase(self.stats_dir_path / "encounters.db")
+            if self.encounter_database.is_new_database:
+                # Shinies are the only encounters of which a history existed before the database.
+                skipped_entries = self.encounter_database.add_encounters(
+                    self.shiny_log["shiny_log"], skip_invalid_entries=True
+                )
+                if skipped_entries > 0:
+                    console.print(f"[yellow]Could not import {skipped_entries:,} incomplete shiny log entries.[/]")
         except SystemExit:
             raise
         except:
@@ -327,11 +339,18 @@ class TotalStats:
         self.update_iv_records(pokemon)
 
         if context.config.logging.log_encounters:
-            log_encounter_to_csv(self.total_stats, pokemon.to_legacy_dict(), self.stats_dir_path)
+            log_encounter_to_file(
+                self.total_stats,
+                pokemon.to_legacy_dict(),
+                self.stats_dir_path,
+                context.config.logging.log_encounters_format,
+            )
 
         self.update_shiny_averages(pokemon)
         self.append_encounter_timestamps()
         self.append_encounter_log(pokemon)
+        if context.config.logging.log_encounters or pokemon.is_shiny:
+            self.encounter_database.add_encounter(self.encounter_log[-1])
         self.update_same_pokemon_streak_record(pokemon)
 
         if pokemon.is_shiny:
@@ -339,8 +358,8 @@ class TotalStats:
             self.update_shiny_incremental_stats(pokemon)
 
             #  TODO fix all this OBS crap
-            for i in range(context.config.obs.shiny_delay):
-                context.emulator.run_single_frame()  # TODO bad (needs to be refactored so main loop advances frame)
+            # TODO bad (needs to be refactored so main loop advances frame)
+            context.emulator.run_frames(context.config.obs.shiny_delay)
 
             if context.config.obs.screenshot:
                 from modules.obs import obs_hot_key
@@ -348,8 +367,7 @@ class TotalStats:
                 while get_game_state() != GameState.BATTLE:
                     context.emulator.press_button("B")  # Throw out Pokémon for screenshot
                     context.emulator.run_single_frame()  # TODO bad (needs to be refactored so main loop advances frame)
-                for i in range(180):
-                    context.emulator.run_single_frame()  # TODO bad (needs to be refactored so main loop advances frame)
+                context.emulator.run_frames(180)  # TODO bad (needs to be refactored so main loop advances frame)
                 obs_hot_key("OBS_KEY_F11", pressCtrl=True)
 
         print_stats(self.total_stats, pokemon, self.session_pokemon, self.get_encounter_rate())
@@ -367,8 +385,14 @@ class TotalStats:
             self.update_phase_records(pokemon)
             self.reset_phase_stats()
 
-        # Save stats file
-        write_file(self.files["totals"], json.dumps(self.total_stats, indent=4, sort_keys=True))
+        # Save stats file. Resetting the phase stats affects all species, which is why this needs
+        # a full snapshot rather than just a journal entry.
+        if pokemon.is_shiny or self.journal.is_snapshot_due():
+            self.journal.snapshot(self.total_stats)
+        else:
+            self.journal.append(
+                self.total_stats["totals"], {pokemon.species.name: self.total_stats["pokemon"][pokemon.species.name]}
+            )
 
     def update_pickup_items(self, picked_up_items) -> None:
         self.total_stats["totals"]["pickup"] = self.total_stats["totals"].get("pickup", {})
@@ -386,7 +410,7 @@ class TotalStats:
         self.total_stats["totals"]["pickup"] = Counter(self.total_stats["totals"]["pickup"]) + Counter(pickup_stats)
 
         # Save stats file
-        write_file(self.files["totals"], json.dumps(self.total_stats, indent=4, sort_keys=True))
+        self.journal.append(self.total_stats["totals"])
 
         if context.config.discord.pickup.enable:
             self.discord_picked_up_items = Counter(self.discord_picked_up_items) + Counter(item_count)
@@ -0,0 +1,163 @@
+"""
+Append-only journal for the bot's total stats (`stats/totals.json`.)
+
+Rewriting the whole totals file after every encounter gets more and more expensive the more
+species have been encountered. So instead, every change is appended to a journal file (one
+JSON object per line) by a background thread, and the full totals file is only rewritten every
+`snapshot_interval` journal entries (or when explicitly requested, e.g. after a shiny encounter.)
+
+If the bot crashes or gets killed, the journal entries that have been written since the last
+snapshot are replayed on the next startup.
+"""
+
+import atexit
+import json
+import queue
+from pathlib import Path
+from threading import Thread
+
+from modules.console import console
+from modules.files import read_file, write_file
+
+# Number of journal entries after which the totals file gets rewritten and the journal truncated.
+snapshot_interval = 1000
+
+# Key in the snapshot file that stores the sequence number of the last journal entry that is
+# included in that snapshot. This is needed so that a journal that could not be truncated
+# (because the bot crashed right after writing a snapshot) does not get replayed twice.
+_sequence_key = "journal_sequence"
+
+
+class StatsJournal:
+    def __init__(self, snapshot_file: Path, journal_file: Path):
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file
+        self._sequence: int = 0
+        self._entries_since_snapshot: int = 0
+        self._queue: queue.Queue[tuple[str, str] | None] = queue.Queue()
+        self._thread: Thread | None = None
+        atexit.register(self.close)
+
+    def load(self) -> dict:
+        """
+        Loads the latest snapshot of the stats and replays any journal entries that have been
+        written after it. If there were any, a new snapshot is written right away.
+
+        :return: The current total stats
+        """
+        snapshot = read_file(self.snapshot_file)
+        stats = json.loads(snapshot) if snapshot else {}
+        self._sequence = stats.pop(_sequence_key, 0)
+
+        replayed_entries = 0
+        journal = read_file(self.journal_file)
+        if journal:
+            for line in journal.splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line might be incomplete if the bot got killed while writing it.
+                    break
+
+                if entry["sequence"] <= self._sequence:
+                    continue
+
+                self._sequence = entry["sequence"]
+                if "totals" in entry:
+                    stats["totals"] = entry["totals"]
+                for species_name, species_stats in entry.get("pokemon", {}).items():
+                    stats.setdefault("pokemon", {})[species_name] = species_stats
+                replayed_entries += 1
+
+        if replayed_entries > 0:
+            console.print(f"[yellow]Recovered {replayed_entries:,} stats update(s) from the journal.[/]")
+            self._write_snapshot(self._serialise_snapshot(stats))
+            self._truncate_journal()
+
+        return stats
+
+    def append(self, totals: dict, pokemon: dict[str, dict] | None = None) -> None:
+        """
+        Queues a journal entry. Entries _replace_ the `totals` section and the given Pokémon's
+        entries in the `pokemon` section of the stats, so they always need to contain the full
+        data for these.
+
+        :param totals: The current `totals` section of the stats
+        :param pokemon: The current stats for all species that have been changed, by name
+        """
+        self._sequence += 1
+        entry = {"sequence": self._sequence, "totals": totals}
+        if pokemon:
+            entry["pokemon"] = pokemon
+
+        # This is serialised right away (rather than in the writer thread) because the caller is
+        # going to keep modifying these dicts.
+        self._put("entry", json.dumps(entry))
+        self._entries_since_snapshot += 1
+
+    def snapshot(self, stats: dict) -> None:
+        """
+        Queues writing a full snapshot of the stats, after which the journal is emptied.
+        This is needed after changes that affect more than the data that a journal entry
+        can hold (such as resetting the phase stats of all species.)
+
+        :param stats: The full total stats
+        """
+        self._entries_since_snapshot = 0
+        self._put("snapshot", self._serialise_snapshot(stats))
+
+    def is_snapshot_due(self) -> bool:
+        """
+        :return: Whether enough entries have been written to the journal since the last snapshot
+                 that it is worth compacting it
+        """
+        return self._entries_since_snapshot >= snapshot_interval
+
+    def close(self) -> None:
+        """
+        Waits until all queued entries have been written to disk.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+    def _serialise_snapshot(self, stats: dict) -> str:
+        return json.dumps(stats | {_sequence_key: self._sequence}, indent=4, sort_keys=True)
+
+    def _put(self, kind: str, data: str) -> None:
+        if self._thread is None:
+            self._thread = Thread(target=self._writer_thread, daemon=True, name="StatsJournal")
+            self._thread.start()
+        self._queue.put((kind, data))
+
+    def _writer_thread(self) -> None:
+        try:
+            with open(self.journal_file, "a", encoding="utf-8") as journal:
+                while True:
+                    item = self._queue.get()
+                    if item is None:
+                        break
+
+                    kind, data = item
+                    if kind == "entry":
+                        journal.write(f"{data}\n")
+                    else:
+                        journal.flush()
+                        self._write_snapshot(data)
+                        journal.seek(0)
+                        journal.truncate()
+
+                    # Only flush once everything that has been queued up in the meantime is written.
+                    if self._queue.empty():
+                        journal.flush()
+        except Exception:
+            console.print_exception()
+
+    def _write_snapshot(self, data: str) -> None:
+        if not write_file(self.snapshot_file, data):
+            console.print(f"[red]Could not write stats to `{self.snapshot_file}`.[/]")
+
+    def _truncate_journal(self) -> None:
+        with open(self.journal_file, "w", encoding="utf-8"):
+            pass
@@ -0,0 +1,254 @@
+"""
+Compiled (binary) symbol tables.
+
+The `.sym` files in `modules/data/symbols/` contain tens of thousands of lines, which takes a
+while to parse. So after parsing them once, the result is stored in a binary format that can be
+memory-mapped and queried directly, without having to load all symbols into a dict first.
+
+Layout of a compiled symbol table (all numbers are little-endian 32-bit unsigned integers):
+
+    Header (see `_header`)
+    Symbol name offsets       (symbols_count + 1 entries, relative to the start of the names block)
+    Symbol addresses          (symbols_count entries)
+    Symbol lengths            (symbols_count entries)
+    Reverse name offsets      (reverse_count + 1 entries)
+    Reverse addresses         (reverse_count entries)
+    Reverse lengths           (reverse_count entries)
+    Symbol names              (upper-case, sorted)
+    Reverse names             (original spelling, sorted by address)
+"""
+
+import mmap
+import struct
+from pathlib import Path
+from typing import Iterator, Mapping
+
+import numpy
+
+# This needs to be changed whenever the format changes, so that existing files are recompiled.
+_format_version = b"PBSYM\x00\x00\x02"
+_header = struct.Struct("<8s20sII")
+
+
+class CompiledSymbols:
+    def __init__(self, data: bytes | mmap.mmap):
+        self._data = data
+        format_version, self.source_hash, self.symbols_count, self.reverse_count = _header.unpack_from(data)
+        if format_version != _format_version:
+            raise ValueError("Unsupported symbol table format.")
+
+        offset = _header.size
+
+        def read_array(count: int) -> numpy.ndarray:
+            nonlocal offset
+            array = numpy.frombuffer(data, dtype="<u4", count=count, offset=offset)
+            offset += 4 * count
+            return array
+
+        self._name_offsets = read_array(self.symbols_count + 1)
+        self._addresses = read_array(self.symbols_count)
+        self._lengths = read_array(self.symbols_count)
+        self._reverse_name_offsets = read_array(self.reverse_count + 1)
+        self.reverse_addresses = read_array(self.reverse_count)
+        self._reverse_lengths = read_array(self.reverse_count)
+        self._names_offset = offset
+        self._reverse_names_offset = offset + int(self._name_offsets[-1])
+
+    def _name(self, index: int) -> bytes:
+        start = self._names_offset + int(self._name_offsets[index])
+        end = self._names_offset + int(self._name_offsets[index + 1])
+        return self._data[start:end]
+
+    def _reverse_name(self, index: int) -> str:
+        start = self._reverse_names_offset + int(self._reverse_name_offsets[index])
+        end = self._reverse_names_offset + int(self._reverse_name_offsets[index + 1])
+        return self._data[start:end].decode("utf-8")
+
+    def find_symbol(self, name: str) -> tuple[int, int] | None:
+        """
+        :param name: Upper-case name of a symbol
+        :return: Tuple of (address, length) or None if there is no symbol with that name
+        """
+        encoded_name = name.encode("utf-8")
+        low, high = 0, self.symbols_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle) < encoded_name:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low < self.symbols_count and self._name(low) == encoded_name:
+            return int(self._addresses[low]), int(self._lengths[low])
+        return None
+
+    def reverse_entry(self, index: int) -> tuple[str, str, int]:
+        """
+        :param index: Index into `reverse_addresses`
+        :return: Tuple of (upper-case name, name, length) of the symbol at that index
+        """
+        name = self._reverse_name(index)
+        return name.upper(), name, int(self._reverse_lengths[index])
+
+    def symbol_names(self) -> Iterator[str]:
+        for index in range(self.symbols_count):
+            yield self._name(index).decode("utf-8")
+
+
+def compile_symbols(
+    symbols: dict[str, tuple[int, int]], reverse_symbols: dict[int, tuple[str, str, int]], source_hash: bytes
+) -> bytes:
+    """
+    :param symbols: Upper-case symbol name => (address, length)
+    :param reverse_symbols: Address => (upper-case symbol name, symbol name, length)
+    :param source_hash: SHA1 hash of the files that the symbols have been loaded from
+    :return: The compiled symbol table
+    """
+    sorted_symbols = sorted((name.encode("utf-8"), values) for name, values in symbols.items())
+    sorted_reverse_symbols = sorted(reverse_symbols.items())
+
+    def offsets(names: list[bytes]) -> list[int]:
+        result = [0]
+        for name in names:
+            result.append(result[-1] + len(name))
+        return result
+
+    names = [name for name, _ in sorted_symbols]
+    reverse_names = [pretty_name.encode("utf-8") for _, (_, pretty_name, _) in sorted_reverse_symbols]
+    numbers = numpy.array(
+        offsets(names)
+        + [address for _, (address, _) in sorted_symbols]
+        + [length for _, (_, length) in sorted_symbols]
+        + offsets(reverse_names)
+        + [address for address, _ in sorted_reverse_symbols]
+        + [length for _, (_, _, length) in sorted_reverse_symbols],
+        dtype="<u4",
+    )
+
+    header = _header.pack(_format_version, source_hash, len(sorted_symbols), len(sorted_reverse_symbols))
+    return header + numbers.tobytes() + b"".join(names) + b"".join(reverse_names)
+
+
+def open_compiled_symbols(file: Path, source_hash: bytes) -> CompiledSymbols | None:
+    """
+    Memory-maps a compiled symbol table file.
+
+    :param file: Path to the compiled symbol table
+    :param source_hash: SHA1 hash of the files that the symbols should have been loaded from
+    :return: The compiled symbols, or None if the file does not exist or is outdated
+    """
+    try:
+        with open(file, "rb") as open_file:
+            data = mmap.mmap(open_file.fileno(), 0, access=mmap.ACCESS_READ)
+        compiled_symbols = CompiledSymbols(data)
+    except (OSError, ValueError, struct.error):
+        return None
+
+    if compiled_symbols.source_hash != source_hash:
+        return None
+    return compiled_symbols
+
+
+class SymbolTable(Mapping[str, tuple[int, int]]):
+    """
+    Maps upper-case symbol names to a tuple of (address, length).
+
+    Symbols are looked up in the compiled symbol table and then cached, so only the symbols that
+    are actually being used end up in a dict.
+    """
+
+    def __init__(self):
+        self._compiled: CompiledSymbols | None = None
+        self._cache: dict[str, tuple[int, int]] = {}
+
+    def set_compiled_symbols(self, compiled_symbols: CompiledSymbols | None) -> None:
+        self._compiled = compiled_symbols
+        self._cache.clear()
+
+    def __getitem__(self, name: str) -> tuple[int, int]:
+        if name in self._cache:
+            return self._cache[name]
+
+        result = self._compiled.find_symbol(name) if self._compiled is not None else None
+        if result is None:
+            raise KeyError(name)
+
+        self._cache[name] = result
+        return result
+
+    def __contains__(self, name: object) -> bool:
+        try:
+            self[name]
+            return True
+        except KeyError:
+            return False
+
+    def __iter__(self) -> Iterator[str]:
+        if self._compiled is not None:
+            yield from self._compiled.symbol_names()
+
+    def __len__(self) -> int:
+        return self._compiled.symbols_count if self._compiled is not None else 0
+
+
+class ReverseSymbolTable(Mapping[int, tuple[str, str, int]]):
+    """
+    Maps the start address of a symbol to a tuple of (upper-case name, name, length).
+    """
+
+    def __init__(self):
+        self._compiled: CompiledSymbols | None = None
+        self._cache: dict[int, tuple[str, str, int]] = {}
+
+    def set_compiled_symbols(self, compiled_symbols: CompiledSymbols | None) -> None:
+        self._compiled = compiled_symbols
+        self._cache.clear()
+
+    def __getitem__(self, address: int) -> tuple[str, str, int]:
+        if address in self._cache:
+            return self._cache[address]
+
+        if self._compiled is not None:
+            index = int(numpy.searchsorted(self._compiled.reverse_addresses, address))
+            if index < self._compiled.reverse_count and self._compiled.reverse_addresses[index] == address:
+                result = self._compiled.reverse_entry(index)
+                self._cache[address] = result
+                return result
+
+        raise KeyError(address)
+
+    def __contains__(self, address: object) -> bool:
+        try:
+            self[address]
+            return True
+        except KeyError:
+            return False
+
+    def find_containing_symbol(self, address: int) -> tuple[int, tuple[str, str, int]] | None:
+        """
+        Finds the symbol that an address points into, i.e. the last symbol that starts at or before
+        that address, provided that the address is within its length.
+
+        :param address: Any memory address
+        :return: Tuple of (start address of the symbol, (upper-case name, name, length)), or None
+                 if the address is not part of any symbol
+        """
+        if self._compiled is None or address < 0 or address > 0xFFFF_FFFF:
+            return None
+
+        index = int(numpy.searchsorted(self._compiled.reverse_addresses, address, side="right")) - 1
+        if index < 0:
+            return None
+
+        start_address = int(self._compiled.reverse_addresses[index])
+        entry = self._compiled.reverse_entry(index)
+        if start_address != address and address >= start_address + entry[2]:
+            return None
+        return start_address, entry
+
+    def __iter__(self) -> Iterator[int]:
+        if self._compiled is not None:
+            yield from self._compiled.reverse_addresses.tolist()
+
+    def __len__(self) -> int:
+        return self._compiled.reverse_count if self._compiled is not None else 0
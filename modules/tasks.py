@@ -5,7 +5,7 @@ abstractions and utilities for working with them.
 from functools import cached_property
 from typing import Iterator
 
-from modules.memory import unpack_uint32, read_symbol, get_symbol_name
+from modules.memory import unpack_uint32, read_symbol, get_symbol_view, get_symbol_name_with_offset
 from modules.state_cache import state_cache
 
 
@@ -31,11 +31,7 @@ class Task:
 
     @cached_property
     def symbol(self) -> str:
-        symbol = get_symbol_name(self.function_pointer, True)
-        if symbol == "":
-            return hex(self.function_pointer)
-        else:
-            return symbol
+        return get_symbol_name_with_offset(self.function_pointer, True)
 
     @property
     def priority(self) -> int:
@@ -88,6 +84,11 @@ def get_tasks() -> TaskList:
     if state_cache.tasks.age_in_frames == 0:
         return state_cache.tasks.value
 
+    cached_task_list = state_cache.tasks.value
+    if cached_task_list is not None and cached_task_list._data == get_symbol_view("gTasks"):
+        state_cache.tasks.checked()
+        return cached_task_list
+
     task_list = TaskList(read_symbol("gTasks"))
     state_cache.tasks = task_list
     return task_list
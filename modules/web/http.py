@@ -1,4 +1,4 @@
-import io
+import concurrent.futures
 import json
 import time
 from pathlib import Path
@@ -17,8 +17,9 @@ from modules.data.map import MapRSE, MapFRLG
 from modules.files import read_file
 from modules.game import _event_flags
 from modules.web.http_stream import add_subscriber, DataSubscription
+from modules.web.http_video import is_format_supported, multipart_boundary, stream_raw_video, stream_video
 from modules.items import get_item_bag, get_item_storage
-from modules.main import work_queue
+from modules.main import run_in_main_thread
 from modules.map import get_map_data
 from modules.memory import get_event_flag, get_game_state, GameState
 from modules.pokemon import get_party
@@ -29,6 +30,9 @@ from modules.player import get_player, get_player_avatar
 from modules.pokedex import get_pokedex
 from modules.version import pokebot_name, pokebot_version
 
+# Maximum number of seconds that a request waits for the main thread to refresh data.
+request_timeout = 10
+
 
 def http_server() -> None:
     """
@@ -64,6 +68,22 @@ def http_server() -> None:
 
     swaggerui_blueprint = get_swaggerui_blueprint(swagger_url, api_url, config={"app_name": f"{pokebot_name} API"})
 
+    def update_in_main_thread(*callbacks: callable) -> None:
+        """
+        Has the main thread run some functions (usually to refresh the state cache) and waits
+        until it has done so. Concurrent requests that need the same function share a single
+        call to it, see `run_in_main_thread()`.
+
+        :param callbacks: Functions to run on the main thread
+        """
+        deadline = time.time() + request_timeout
+        for future in [run_in_main_thread(callback) for callback in callbacks]:
+            future.result(timeout=max(0.0, deadline - time.time()))
+
+    @server.errorhandler(concurrent.futures.TimeoutError)
+    def handle_timeout(error):
+        return Response("Timed out waiting for the emulator to respond.", status=503)
+
     @server.route("/player", methods=["GET"])
     def http_get_player():
         """
@@ -81,9 +101,7 @@ def http_server() -> None:
 
         cached_player = state_cache.player
         if cached_player.age_in_frames > 5:
-            work_queue.put_nowait(get_player)
-            while cached_player.age_in_frames > 5:
-                time.sleep(0.05)
+            update_in_main_thread(get_player)
 
         if cached_player.value is not None:
             data = cached_player.value.to_dict()
@@ -107,9 +125,7 @@ def http_server() -> None:
 
         cached_avatar = state_cache.player_avatar
         if cached_avatar.age_in_frames > 5:
-            work_queue.put_nowait(get_player_avatar)
-            while cached_avatar.age_in_frames > 5:
-                time.sleep(0.05)
+            update_in_main_thread(get_player_avatar)
 
         if cached_avatar.value is not None:
             data = cached_avatar.value.to_dict()
@@ -133,12 +149,12 @@ def http_server() -> None:
 
         cached_bag = state_cache.item_bag
         cached_storage = state_cache.item_storage
+        callbacks = []
         if cached_bag.age_in_seconds > 1:
-            work_queue.put_nowait(get_item_bag)
+            callbacks.append(get_item_bag)
         if cached_storage.age_in_seconds > 1:
-            work_queue.put_nowait(get_item_storage)
-        while cached_bag.age_in_seconds > 1 or cached_storage.age_in_seconds > 1:
-            time.sleep(0.05)
+            callbacks.append(get_item_storage)
+        update_in_main_thread(*callbacks)
 
         return jsonify(
             {
@@ -163,9 +179,7 @@ def http_server() -> None:
 
         cached_party = state_cache.party
         if cached_party.age_in_frames > 5:
-            work_queue.put_nowait(get_party)
-            while cached_party.age_in_frames > 5:
-                time.sleep(0.05)
+            update_in_main_thread(get_party)
 
         return jsonify([p.to_dict() for p in cached_party.value])
 
@@ -185,9 +199,7 @@ def http_server() -> None:
 
         cached_pokedex = state_cache.pokedex
         if cached_pokedex.age_in_seconds > 1:
-            work_queue.put_nowait(get_pokedex)
-            while cached_pokedex.age_in_seconds > 1:
-                time.sleep(0.05)
+            update_in_main_thread(get_pokedex)
 
         return jsonify(cached_pokedex.value.to_dict())
 
@@ -207,9 +219,7 @@ def http_server() -> None:
 
         cached_storage = state_cache.pokemon_storage
         if cached_storage.age_in_frames > 5:
-            work_queue.put_nowait(get_pokemon_storage)
-            while cached_storage.age_in_frames > 5:
-                time.sleep(0.05)
+            update_in_main_thread(get_pokemon_storage)
 
         return jsonify(cached_storage.value.to_dict())
 
@@ -254,9 +264,7 @@ def http_server() -> None:
 
         cached_avatar = state_cache.player_avatar
         if cached_avatar.age_in_frames > 5:
-            work_queue.put_nowait(get_player_avatar)
-            while cached_avatar.age_in_frames > 5:
-                time.sleep(0.05)
+            update_in_main_thread(get_player_avatar)
 
         if cached_avatar.value is not None:
             map_data = cached_avatar.value.map_location
@@ -366,12 +374,53 @@ def http_server() -> None:
 
             return result
 
+    def _query_encounter_log(default_limit: int, **filters) -> list[dict]:
+        limit = min(max(0, request.args.get("limit", default_limit, type=int)), 1000)
+        offset = max(0, request.args.get("offset", 0, type=int))
+
+        if not filters.get("is_shiny") and not context.config.logging.log_encounters:
+            # Without `log_encounters`, only shinies are stored in the database, so only the last
+            # couple of encounters (that are kept in memory) are available.
+            species = filters.get("species")
+            encounters = [
+                encounter
+                for encounter in total_stats.get_encounter_log()
+                if species is None or encounter["pokemon"]["name"] == species
+            ]
+            end = max(0, len(encounters) - offset)
+            return encounters[max(0, end - limit) : end]
+
+        # Pages are counted from the most recent encounter backwards, but the entries within a page
+        # are returned in chronological order (which is what this endpoint has always done.)
+        encounters = total_stats.encounter_database.query_encounters(limit=limit, offset=offset, **filters)
+        encounters.reverse()
+        return encounters
+
     @server.route("/encounter_log", methods=["GET"])
     def http_get_encounter_log():
         """
         ---
         get:
-          description: Returns a detailed list of the recent 10 Pokémon encounters.
+          description: |
+            Returns a detailed list of the most recent Pokémon encounters (oldest first.)
+
+            Unless `log_encounters` is enabled in `logging.yml`, only the last 10 encounters are available.
+          parameters:
+            - in: query
+              name: limit
+              schema:
+                type: integer
+              description: Maximum number of encounters to return (defaults to 10, max. 1000)
+            - in: query
+              name: offset
+              schema:
+                type: integer
+              description: Number of most recent encounters to skip, for paging back through the log
+            - in: query
+              name: species
+              schema:
+                type: string
+              description: Only return encounters of this species (e.g. `Ralts`)
           responses:
             200:
               content:
@@ -380,14 +429,25 @@ def http_server() -> None:
             - stats
         """
 
-        return jsonify(total_stats.get_encounter_log())
+        return jsonify(_query_encounter_log(default_limit=10, species=request.args.get("species")))
 
     @server.route("/shiny_log", methods=["GET"])
     def http_get_shiny_log():
         """
         ---
         get:
-          description: Returns a detailed list of all shiny Pokémon encounters.
+          description: Returns a detailed list of shiny Pokémon encounters (oldest first.)
+          parameters:
+            - in: query
+              name: limit
+              schema:
+                type: integer
+              description: Maximum number of encounters to return (defaults to 100, max. 1000)
+            - in: query
+              name: offset
+              schema:
+                type: integer
+              description: Number of most recent shiny encounters to skip, for paging back through the log
           responses:
             200:
               content:
@@ -396,7 +456,7 @@ def http_server() -> None:
             - stats
         """
 
-        return jsonify(total_stats.get_shiny_log())
+        return jsonify(_query_encounter_log(default_limit=100, is_shiny=True))
 
     @server.route("/encounter_rate", methods=["GET"])
     def http_get_encounter_rate():
@@ -563,10 +623,9 @@ def http_server() -> None:
 
         def stream():
             try:
-                yield "retry: 2500\n\n"
+                yield b"retry: 2500\n\n"
                 while True:
                     yield queue.get()
-                    yield "\n\n"
             except GeneratorExit:
                 unsubscribe()
 
@@ -617,6 +676,21 @@ def http_server() -> None:
               required: true
               description: fps
               default: 30
+            - in: query
+              name: format
+              schema:
+                type: string
+                enum: [png, jpeg, webp]
+              required: false
+              description: Image format of the individual frames
+              default: png
+            - in: query
+              name: quality
+              schema:
+                type: integer
+              required: false
+              description: Image quality (1-100) for JPEG and WebP
+              default: 80
           responses:
             200:
               content:
@@ -631,23 +705,61 @@ def http_server() -> None:
             fps = 30
         else:
             fps = int(fps)
-        fps = min(fps, 60)
+        fps = min(max(fps, 1), 60)
 
-        def stream():
-            sleep_after_frame = 1 / fps
-            png_data = io.BytesIO()
-            yield "--frame\r\n"
-            while True:
-                if context.video:
-                    png_data.seek(0)
-                    context.emulator.get_current_screen_image().convert("RGB").save(png_data, format="PNG")
-                    png_data.seek(0)
-                    yield "Content-Type: image/png\r\n\r\n"
-                    yield png_data.read()
-                    yield "\r\n--frame\r\n"
-                time.sleep(sleep_after_frame)
-
-        return Response(stream(), mimetype="multipart/x-mixed-replace; boundary=frame")
+        image_format = request.args.get("format", "png").lower()
+        if not is_format_supported(image_format):
+            return Response(f"Unsupported video format: '{image_format}'.", status=422)
+
+        quality = request.args.get("quality", "80")
+        if not quality.isdigit():
+            quality = 80
+        else:
+            quality = min(max(int(quality), 1), 100)
+
+        return Response(
+            stream_video(image_format, quality, fps),
+            mimetype=f"multipart/x-mixed-replace; boundary={multipart_boundary}",
+        )
+
+    @server.route("/stream_video_raw", methods=["GET"])
+    def http_get_raw_video_stream():
+        """
+        ---
+        get:
+          description: |
+            Stream emulator video as raw RGB565 pixels, only sending the 8×8 tiles that have changed
+            since the previous frame. This is meant for custom overlays that draw the video onto a canvas.
+
+            The stream consists of one message per frame, each starting with an 11-byte header:
+            the magic number `PBVF`, the frame number (uint32), flags (uint8, bit 0 = key frame) and
+            the number of tiles (uint16). Each tile then consists of its index (uint16, 30 tiles per row)
+            and 64 pixels (uint16 each, row by row.) All numbers are little-endian.
+
+            If nothing has changed for a second, a message without any tiles is sent as a keep-alive.
+          parameters:
+            - in: query
+              name: fps
+              schema:
+                type: integer
+              required: true
+              description: fps
+              default: 60
+          responses:
+            200:
+              content:
+                application/octet-stream: {}
+          tags:
+            - streams
+        """
+        fps = request.args.get("fps", "60")
+        if not fps.isdigit():
+            fps = 60
+        else:
+            fps = int(fps)
+        fps = min(max(fps, 1), 60)
+
+        return Response(stream_raw_video(fps), mimetype="application/octet-stream")
 
     @server.route("/", methods=["GET"])
     def http_index():
@@ -680,6 +792,7 @@ def http_server() -> None:
         spec.path(view=http_post_emulator)
         spec.path(view=http_get_events_stream)
         spec.path(view=http_get_video_stream)
+        spec.path(view=http_get_raw_video_stream)
 
     server.register_blueprint(swaggerui_blueprint)
     server.run(
@@ -1,22 +1,17 @@
 import json
-import queue
+from collections import OrderedDict
 from enum import IntFlag, auto
-from threading import Thread
-from time import sleep, time
+from threading import Condition, Lock
+from time import time
 
-from modules.console import console
 from modules.context import context
-from modules.main import work_queue
-from modules.memory import get_game_state, GameState
-from modules.player import get_player, get_player_avatar
-from modules.pokemon import get_party, get_opponent
+from modules.frame_events import FrameEvent, subscribe
+from modules.memory import GameState
+from modules.player import get_player
 from modules.pokedex import get_pokedex
 from modules.state_cache import state_cache
 from modules.stats import total_stats
 
-update_interval_in_ms = 1000 / 30
-queue_size = 10
-
 
 class DataSubscription(IntFlag):
     Player = auto()
@@ -38,15 +33,40 @@ class DataSubscription(IntFlag):
         return cls.__members__.keys()
 
 
-timer_thread: Thread
-subscribers: list[tuple[int, queue.Queue, int, callable]] = []
+class MessageQueue:
+    """
+    Queue of encoded messages waiting to be sent to a single client.
+
+    If a client cannot keep up, a new message replaces any message of the same event type that
+    is still waiting, as the client would only be receiving outdated data. So the queue can never
+    contain more than one message per event type, and slow clients do not need to be disconnected.
+    """
+
+    def __init__(self):
+        self._messages: OrderedDict[str | None, bytes] = OrderedDict()
+        self._condition = Condition()
+
+    def put(self, event_type: str | None, message: bytes) -> None:
+        with self._condition:
+            self._messages.pop(event_type, None)
+            self._messages[event_type] = message
+            self._condition.notify()
+
+    def get(self) -> bytes:
+        with self._condition:
+            while len(self._messages) == 0:
+                self._condition.wait()
+            return self._messages.popitem(last=False)[1]
+
+
+subscribers: list[tuple[int, MessageQueue, int, callable]] = []
 subscriptions = {}
 for name in DataSubscription.all_names():
     subscriptions[name] = 0
 max_client_id: int = 0
 
 
-def add_subscriber(subscribed_topics: list[str]) -> tuple[queue.Queue :, callable]:
+def add_subscriber(subscribed_topics: list[str]) -> tuple[MessageQueue, callable]:
     for topic in subscribed_topics:
         if topic not in DataSubscription.all_names():
             raise ValueError(f"Topic '{topic}' does not exist.")
@@ -63,6 +83,7 @@ def add_subscriber(subscribed_topics: list[str]) -> tuple[queue.Queue :, callabl
                 for topic in subscribed_topics:
                     subscriptions[topic] -= 1
                 del subscribers[index]
+                _update_frame_event_subscriptions()
                 return
 
     global subscriptions
@@ -71,53 +92,105 @@ def add_subscriber(subscribed_topics: list[str]) -> tuple[queue.Queue :, callabl
         subscription_flags |= getattr(DataSubscription, topic)
         subscriptions[topic] += 1
 
-    message_queue = queue.Queue(maxsize=queue_size)
+    message_queue = MessageQueue()
     subscribers.append((client_id, message_queue, subscription_flags, unsubscribe))
-
-    if len(subscribers) == 1:
-        global timer_thread
-        timer_thread = Thread(target=run_watcher)
-        timer_thread.start()
+    _update_frame_event_subscriptions()
 
     return message_queue, unsubscribe
 
 
-def run_watcher():
-    update_interval = update_interval_in_ms / 1000
-    previous_second = int(time())
-
-    if state_cache.player_avatar.value is not None:
-        map_group_and_number = state_cache.player_avatar.value.map_group_and_number
-        map_local_coordinates = state_cache.player_avatar.value.local_coordinates
-    else:
-        map_group_and_number = (-1, -1)
-        map_local_coordinates = (-1, -1)
-
-    previous_game_state = {
-        "party": state_cache.party.frame,
-        "pokedex": state_cache.pokedex.frame,
-        "opponent": state_cache.opponent.frame,
-        "player": state_cache.player.frame,
-        "player_avatar": state_cache.player_avatar.frame,
-        "map_group_and_number": map_group_and_number,
-        "map_local_coordinates": map_local_coordinates,
-        "game_state": get_game_state(),
-        "last_shiny_log": state_cache.last_shiny_log.frame,
-        "last_encounter_log": state_cache.last_encounter_log.frame,
-    }
-    previous_emulator_state = {
-        "bot_mode": context.bot_mode,
-        "emulation_speed": context.emulation_speed,
-        "audio_enabled": context.audio,
-        "video_enabled": context.video,
-        "message": context.message,
-    }
-
-    while len(subscribers) > 0:
-        current_second = int(time())
-        current_game_state = get_game_state()
-
-        if current_second != previous_second and subscriptions["PerformanceData"] > 0:
+# Frame events that this module is currently subscribed to, along with the function that cancels
+# the respective subscription.
+_frame_event_subscriptions: dict[tuple[FrameEvent, callable], callable] = {}
+_frame_event_subscriptions_lock = Lock()
+
+
+def _update_frame_event_subscriptions() -> None:
+    """
+    Rather than polling for changes, this module gets notified by the main thread (see
+    `modules.frame_events`) whenever something has changed. A frame event is only subscribed
+    to while at least one client is interested in a topic that depends on it, so that nothing
+    gets checked that nobody would receive anyway.
+    """
+    wanted_events = set()
+    if len(subscribers) > 0:
+        wanted_events.add((FrameEvent.Frame, _on_frame))
+    if subscriptions["GameState"] > 0:
+        wanted_events.add((FrameEvent.GameStateChanged, _on_game_state_changed))
+    if subscriptions["Party"] > 0:
+        wanted_events.add((FrameEvent.PartyChanged, _on_party_changed))
+    if subscriptions["Opponent"] > 0:
+        wanted_events.add((FrameEvent.OpponentChanged, _on_opponent_changed))
+    if subscriptions["Map"] > 0 or subscriptions["MapTile"] > 0:
+        wanted_events.add((FrameEvent.MapChanged, _on_map_changed))
+        wanted_events.add((FrameEvent.MapTileChanged, _on_map_tile_changed))
+
+    with _frame_event_subscriptions_lock:
+        for event_and_callback in list(_frame_event_subscriptions):
+            if event_and_callback not in wanted_events:
+                _frame_event_subscriptions.pop(event_and_callback)()
+        for event_and_callback in wanted_events:
+            if event_and_callback not in _frame_event_subscriptions:
+                _frame_event_subscriptions[event_and_callback] = subscribe(*event_and_callback)
+
+
+def _on_game_state_changed(game_state: GameState) -> None:
+    if subscriptions["GameState"] > 0:
+        send_message(DataSubscription.GameState, data=game_state.name, event_type="GameState")
+
+
+def _on_party_changed(party: list) -> None:
+    if subscriptions["Party"] > 0:
+        data = list(map(lambda x: x.to_dict() if x is not None else None, party))
+        send_message(DataSubscription.Party, data=data, event_type="Party")
+
+
+def _on_opponent_changed(opponent) -> None:
+    if subscriptions["Opponent"] > 0:
+        send_message(
+            DataSubscription.Opponent,
+            data=opponent.to_dict() if opponent is not None else None,
+            event_type="Opponent",
+        )
+
+
+def _on_map_changed(player_avatar) -> None:
+    if subscriptions["Map"] > 0 or subscriptions["MapTile"] > 0:
+        map_data = player_avatar.map_location
+        data = {
+            "map": map_data.dict_for_map(),
+            "player_position": map_data.local_position,
+            "tiles": map_data.dicts_for_all_tiles(),
+        }
+        send_message(DataSubscription.Map, data=data, event_type="MapChange")
+
+
+def _on_map_tile_changed(player_avatar) -> None:
+    if subscriptions["Map"] > 0 or subscriptions["MapTile"] > 0:
+        send_message(DataSubscription.Map, data=player_avatar.local_coordinates, event_type="MapTileChange")
+
+
+# Values that have last been sent to clients, for data that is not covered by frame events and so
+# has to be compared once per frame in `_on_frame()`.
+_previous_state = {
+    "second": 0,
+    "player": 0,
+    "pokedex": 0,
+    "last_encounter_log": 0,
+    "last_shiny_log": 0,
+    "bot_mode": None,
+    "emulation_speed": None,
+    "audio_enabled": None,
+    "video_enabled": None,
+    "message": None,
+}
+
+
+def _on_frame() -> None:
+    current_second = int(time())
+    if current_second != _previous_state["second"]:
+        _previous_state["second"] = current_second
+        if subscriptions["PerformanceData"] > 0:
             send_message(
                 DataSubscription.PerformanceData,
                 data={
@@ -129,133 +202,51 @@ def run_watcher():
                 event_type="PerformanceData",
             )
 
-        if subscriptions["Player"] > 0:
-            if state_cache.player.age_in_frames >= 60:
-                # If the cached party data is too old, tell the main thread to update it at the next
-                # possible opportunity.
-                work_queue.put_nowait(get_player)
-            if state_cache.player.frame > previous_game_state["player"]:
-                previous_game_state["player"] = state_cache.player.frame
-                send_message(DataSubscription.Player, data=state_cache.player.value.to_dict(), event_type="Player")
-
-        if subscriptions["Party"] > 0:
-            if state_cache.party.age_in_frames >= 60:
-                # If the cached party data is too old, tell the main thread to update it at the next
-                # possible opportunity.
-                work_queue.put_nowait(get_party)
-            if state_cache.party.frame > previous_game_state["party"]:
-                previous_game_state["party"] = state_cache.party.frame
-                data = list(map(lambda x: x.to_dict() if x is not None else None, state_cache.party.value))
-                send_message(DataSubscription.Party, data=data, event_type="Party")
-
-        if subscriptions["Pokedex"] > 0:
-            if state_cache.pokedex.age_in_seconds > 0:
-                # If the cached Pokedex data is too old, tell the main thread to update it at the next
-                # possible opportunity.
-                work_queue.put_nowait(get_pokedex)
-            if state_cache.pokedex.frame > previous_game_state["pokedex"]:
-                previous_game_state["pokedex"] = state_cache.pokedex.frame
-                send_message(DataSubscription.Pokedex, data=state_cache.pokedex.value.to_dict(), event_type="Pokedex")
-
-        if subscriptions["Opponent"] > 0:
-            if current_game_state == GameState.BATTLE:
-                if state_cache.opponent.age_in_frames >= 60:
-                    # If the cached opponent data is too old, tell the main thread to update it at the next
-                    # possible opportunity.
-                    work_queue.put_nowait(get_opponent)
-                if state_cache.opponent.frame > previous_game_state["opponent"]:
-                    previous_game_state["opponent"] = state_cache.opponent.frame
-                    data = state_cache.opponent.value
-                    if data is not None:
-                        data = data.to_dict()
-                    send_message(DataSubscription.Opponent, data=data, event_type="Opponent")
-            elif previous_game_state["game_state"] == GameState.BATTLE:
-                send_message(DataSubscription.Opponent, data=None, event_type="Opponent")
-
-        if subscriptions["GameState"] > 0:
-            if current_game_state != previous_game_state["game_state"]:
-                send_message(DataSubscription.GameState, data=current_game_state.name, event_type="GameState")
-
-        if subscriptions["Map"] > 0 or subscriptions["MapTile"] > 0:
-            if current_game_state == GameState.OVERWORLD:
-                if state_cache.player_avatar.age_in_frames > 4:
-                    # If the cached player avatar data is too old, tell the main thread to update it at the next
-                    # possible opportunity.
-                    work_queue.put_nowait(get_player_avatar)
-                elif state_cache.player_avatar.value is not None:
-                    previous_game_state["player_avatar"] = state_cache.player_avatar.frame
-                    current_map = state_cache.player_avatar.value.map_group_and_number
-                    current_coords = state_cache.player_avatar.value.local_coordinates
-                    if current_map != previous_game_state["map_group_and_number"]:
-                        map_data = state_cache.player_avatar.value.map_location
-                        data = {
-                            "map": map_data.dict_for_map(),
-                            "player_position": map_data.local_position,
-                            "tiles": map_data.dicts_for_all_tiles(),
-                        }
-
-                        send_message(DataSubscription.Map, data=data, event_type="MapChange")
-                        previous_game_state["map_group_and_number"] = current_map
-                    if current_coords != previous_game_state["map_local_coordinates"]:
-                        send_message(DataSubscription.Map, data=current_coords, event_type="MapTileChange")
-                        previous_game_state["map_local_coordinates"] = current_coords
-
-        if subscriptions["LastEncounterLog"] > 0:
-            if state_cache.last_encounter_log.age_in_seconds > 0:
-                # If the cached encounter log data is too old, tell the main thread to update it at the next
-                # possible opportunity.
-                work_queue.put_nowait(total_stats.get_encounter_log)
-            if state_cache.last_encounter_log.frame > previous_game_state["last_encounter_log"]:
-                previous_game_state["last_encounter_log"] = state_cache.last_encounter_log.frame
-                send_message(
-                    DataSubscription.LastEncounterLog,
-                    data=state_cache.last_encounter_log.value,
-                    event_type="EncounterLog",
-                )
-
-        if subscriptions["LastShinyLog"] > 0:
-            if state_cache.last_shiny_log.age_in_seconds > 0:
-                # If the cached shiny log is too old, tell the main thread to update it at the next
-                # possible opportunity.
-                work_queue.put_nowait(total_stats.get_shiny_log)
-            if state_cache.last_shiny_log.frame > previous_game_state["last_shiny_log"]:
-                previous_game_state["last_shiny_log"] = state_cache.last_shiny_log.frame
-                send_message(
-                    DataSubscription.LastShinyLog, data=state_cache.last_shiny_log.value, event_type="ShinyLog"
-                )
-
-        if subscriptions["BotMode"] > 0:
-            if context.bot_mode != previous_emulator_state["bot_mode"]:
-                previous_emulator_state["bot_mode"] = context.bot_mode
-                send_message(DataSubscription.BotMode, data=context.bot_mode, event_type="BotMode")
-
-        if subscriptions["Message"] > 0:
-            if context.message != previous_emulator_state["message"]:
-                previous_emulator_state["message"] = context.message
-                send_message(DataSubscription.Message, data=context.message, event_type="Message")
-
-        if subscriptions["EmulatorSettings"] > 0:
-            if context.emulation_speed != previous_emulator_state["emulation_speed"]:
-                previous_emulator_state["emulation_speed"] = context.emulation_speed
-                send_message(
-                    DataSubscription.EmulatorSettings, data=context.emulation_speed, event_type="EmulationSpeed"
-                )
-
-            if context.audio != previous_emulator_state["audio_enabled"]:
-                previous_emulator_state["audio_enabled"] = context.audio
-                send_message(DataSubscription.EmulatorSettings, data=context.audio, event_type="AudioEnabled")
-
-            if context.video != previous_emulator_state["video_enabled"]:
-                previous_emulator_state["video_enabled"] = context.video
-                send_message(DataSubscription.EmulatorSettings, data=context.video, event_type="VideoEnabled")
-
-        if current_game_state != previous_game_state["game_state"]:
-            previous_game_state["game_state"] = current_game_state
-
-        if current_second != previous_second:
-            previous_second = current_second
-
-        sleep(update_interval)
+    if subscriptions["Player"] > 0:
+        if state_cache.player.age_in_frames >= 60:
+            get_player()
+        if state_cache.player.frame > _previous_state["player"]:
+            _previous_state["player"] = state_cache.player.frame
+            send_message(DataSubscription.Player, data=state_cache.player.value.to_dict(), event_type="Player")
+
+    if subscriptions["Pokedex"] > 0:
+        if state_cache.pokedex.age_in_seconds >= 1:
+            get_pokedex()
+        if state_cache.pokedex.frame > _previous_state["pokedex"]:
+            _previous_state["pokedex"] = state_cache.pokedex.frame
+            send_message(DataSubscription.Pokedex, data=state_cache.pokedex.value.to_dict(), event_type="Pokedex")
+
+    if subscriptions["LastEncounterLog"] > 0:
+        if state_cache.last_encounter_log.age_in_seconds >= 1:
+            total_stats.get_encounter_log()
+        if state_cache.last_encounter_log.frame > _previous_state["last_encounter_log"]:
+            _previous_state["last_encounter_log"] = state_cache.last_encounter_log.frame
+            send_message(
+                DataSubscription.LastEncounterLog,
+                data=state_cache.last_encounter_log.value,
+                event_type="EncounterLog",
+            )
+
+    if subscriptions["LastShinyLog"] > 0:
+        if state_cache.last_shiny_log.age_in_seconds >= 1:
+            total_stats.get_shiny_log()
+        if state_cache.last_shiny_log.frame > _previous_state["last_shiny_log"]:
+            _previous_state["last_shiny_log"] = state_cache.last_shiny_log.frame
+            send_message(DataSubscription.LastShinyLog, data=state_cache.last_shiny_log.value, event_type="ShinyLog")
+
+    for key, value, subscription, event_type in (
+        ("bot_mode", context.bot_mode, "BotMode", "BotMode"),
+        ("message", context.message, "Message", "Message"),
+        ("emulation_speed", context.emulation_speed, "EmulatorSettings", "EmulationSpeed"),
+        ("audio_enabled", context.audio, "EmulatorSettings", "AudioEnabled"),
+        ("video_enabled", context.video, "EmulatorSettings", "VideoEnabled"),
+    ):
+        if _previous_state[key] is None:
+            _previous_state[key] = value
+        elif value != _previous_state[key]:
+            _previous_state[key] = value
+            if subscriptions[subscription] > 0:
+                send_message(getattr(DataSubscription, subscription), data=value, event_type=event_type)
 
 
 def send_message(
@@ -263,15 +254,14 @@ def send_message(
     data: str | list | tuple | dict | int | float | None,
     event_type: str | None = None,
 ) -> None:
-    if event_type is not None:
-        message = f"event: {event_type}\ndata: {json.dumps(data)}"
-    else:
-        message = f"data: {json.dumps(data)}"
-
-    for index in reversed(range(len(subscribers))):
-        if subscribers[index][2] & subscription_flag:
-            try:
-                subscribers[index][1].put_nowait(message)
-            except queue.Full:
-                console.print(f"[yellow]Queue for client [bold]{subscribers[index][0]}[/] was full. Disconnecting.[/]")
-                subscribers[index][3]()
+    # The message is only serialised and encoded once, and the same `bytes` object is then
+    # handed to all clients that are subscribed to this topic.
+    message = None
+    for _, message_queue, subscription_flags, _ in list(subscribers):
+        if subscription_flags & subscription_flag:
+            if message is None:
+                if event_type is not None:
+                    message = f"event: {event_type}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+                else:
+                    message = f"data: {json.dumps(data)}\n\n".encode("utf-8")
+            message_queue.put(event_type, message)
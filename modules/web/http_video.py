@@ -0,0 +1,284 @@
+"""
+Shared video encoders for the `/stream_video` endpoint.
+
+Rather than every client encoding the screen by itself, there is one encoder thread per
+combination of image format, quality and frame rate. It encodes each frame at most once (and
+not at all if the screen has not changed since the previous frame), and all clients that have
+requested the same format share the resulting bytes.
+
+This also provides the raw video stream for `/stream_video_raw`, see `RawVideoEncoder`.
+"""
+
+import io
+import struct
+import time
+from threading import Condition, Lock, Thread
+from typing import Iterator
+
+import numpy
+from PIL import Image, features
+
+from modules.context import context
+
+# Pillow format names for each supported `format` parameter, and their MIME type.
+video_formats: dict[str, tuple[str, str]] = {
+    "png": ("PNG", "image/png"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+}
+
+multipart_boundary = "frame"
+
+# Header of each message of the raw video stream, see `RawVideoEncoder`.
+raw_message_header = struct.Struct("<4sIBH")
+
+
+def is_format_supported(image_format: str) -> bool:
+    if image_format not in video_formats:
+        return False
+    if image_format == "webp":
+        return features.check("webp")
+    return True
+
+
+class VideoEncoder:
+    def __init__(self, image_format: str, quality: int, fps: int):
+        self.image_format = image_format
+        self.quality = quality
+        self.fps = fps
+        self.subscribers: int = 0
+
+        self._condition = Condition()
+        self._frame: bytes | None = None
+        self._frame_number: int = 0
+        self._thread = Thread(target=self._run, daemon=True, name=f"VideoEncoder-{image_format}-{quality}-{fps}")
+
+    def _encode(self, image: Image.Image) -> bytes:
+        pillow_format, mime_type = video_formats[self.image_format]
+        data = io.BytesIO()
+        if pillow_format == "PNG":
+            image.save(data, format=pillow_format)
+        else:
+            image.save(data, format=pillow_format, quality=self.quality)
+
+        # The whole multipart chunk is prepared here, so that sending a frame to a client is
+        # nothing more than writing these bytes.
+        return (
+            f"Content-Type: {mime_type}\r\n\r\n".encode("ascii")
+            + data.getvalue()
+            + f"\r\n--{multipart_boundary}\r\n".encode("ascii")
+        )
+
+    def _run(self) -> None:
+        frame_duration = 1 / self.fps
+        previous_pixels = None
+        while self.subscribers > 0:
+            frame_start = time.time()
+            # Even with video disabled, the first frame is encoded so that clients have something
+            # to show (and to re-send, see `frames()`.)
+            if context.video or self._frame is None:
+                image = context.emulator.get_current_screen_image().convert("RGB")
+                pixels = image.tobytes()
+                if pixels != previous_pixels:
+                    previous_pixels = pixels
+                    encoded_frame = self._encode(image)
+                    with self._condition:
+                        self._frame = encoded_frame
+                        self._frame_number += 1
+                        self._condition.notify_all()
+
+            time.sleep(max(0.0, frame_duration - (time.time() - frame_start)))
+
+    def frames(self) -> Iterator[bytes]:
+        """
+        :return: Iterator yielding each newly encoded frame (as a multipart chunk), starting with
+                 the most recent one. If there has not been a new frame for a second, the current
+                 one is yielded again.
+        """
+        last_frame_number = 0
+        while True:
+            with self._condition:
+                if self._frame is None or self._frame_number == last_frame_number:
+                    self._condition.wait(timeout=1)
+                if not self._thread.is_alive():
+                    return
+                if self._frame is None:
+                    continue
+                # On a static screen (or with video disabled) this re-sends the previous frame,
+                # because writing to the socket is the only way of noticing that the client has
+                # disconnected -- otherwise this generator would wait forever.
+                last_frame_number = self._frame_number
+                frame = self._frame
+            yield frame
+
+
+class RawVideoEncoder:
+    """
+    Encodes the screen as raw RGB565 pixels (2 bytes per pixel, little-endian), split into 8×8
+    tiles. Each message only contains the tiles that have changed since the previous frame, so a
+    static screen costs nothing at all, and a client can apply a message by just copying the
+    tiles into its own framebuffer.
+
+    Each message consists of a header (see `raw_message_header`):
+
+        4 bytes  Magic number `PBVF`
+        4 bytes  Frame number (uint32)
+        1 byte   Flags: bit 0 is set if this is a key frame, i.e. it contains all tiles
+        2 bytes  Number of tiles that follow (uint16)
+
+    followed by that many tiles, each consisting of the tile index (uint16, counting from the
+    top-left in rows of `screen_width / 8` tiles) and 128 bytes of pixel data (8 rows of 8 pixels.)
+
+    Clients receive a key frame when they connect and whenever they have missed a frame (because
+    they could not keep up), so that they never end up with an inconsistent picture.
+
+    If the screen has not changed for a second (or video is disabled), a keep-alive message is
+    sent, which is a message without any tiles and with the frame number of the current frame.
+    """
+
+    tile_size = 8
+
+    def __init__(self, fps: int):
+        self.fps = fps
+        self.subscribers: int = 0
+
+        self._condition = Condition()
+        self._tiles: numpy.ndarray | None = None
+        self._delta_message: bytes | None = None
+        self._key_frame_message: bytes | None = None
+        self._frame_number: int = 0
+        self._thread = Thread(target=self._run, daemon=True, name=f"RawVideoEncoder-{fps}")
+
+    def _get_tiles(self) -> numpy.ndarray:
+        """
+        :return: Array of shape (number of tiles, 64) containing the RGB565 pixels of each tile
+        """
+        image = context.emulator.get_current_screen_image().convert("RGB")
+        pixels = numpy.asarray(image, dtype=numpy.uint16)
+        rgb565 = ((pixels[:, :, 0] >> 3) << 11) | ((pixels[:, :, 1] >> 2) << 5) | (pixels[:, :, 2] >> 3)
+
+        height, width = rgb565.shape
+        tile_size = self.tile_size
+        return (
+            rgb565.reshape(height // tile_size, tile_size, width // tile_size, tile_size)
+            .swapaxes(1, 2)
+            .reshape(-1, tile_size * tile_size)
+            .astype("<u2")
+        )
+
+    def _encode(
+        self, frame_number: int, tiles: numpy.ndarray, tile_indices: numpy.ndarray, is_key_frame: bool
+    ) -> bytes:
+        records = numpy.empty(len(tile_indices), dtype=[("index", "<u2"), ("pixels", "<u2", (tiles.shape[1],))])
+        records["index"] = tile_indices
+        records["pixels"] = tiles[tile_indices]
+        header = raw_message_header.pack(b"PBVF", frame_number, 1 if is_key_frame else 0, len(tile_indices))
+        return header + records.tobytes()
+
+    def _run(self) -> None:
+        frame_duration = 1 / self.fps
+        while self.subscribers > 0:
+            frame_start = time.time()
+            if context.video:
+                tiles = self._get_tiles()
+                if self._tiles is None or tiles.shape != self._tiles.shape:
+                    changed_tiles = numpy.arange(len(tiles))
+                else:
+                    changed_tiles = numpy.flatnonzero((tiles != self._tiles).any(axis=1))
+
+                if len(changed_tiles) > 0:
+                    with self._condition:
+                        self._frame_number += 1
+                        self._delta_message = self._encode(
+                            self._frame_number, tiles, changed_tiles, len(changed_tiles) == len(tiles)
+                        )
+                        self._key_frame_message = None
+                        self._tiles = tiles
+                        self._condition.notify_all()
+
+            time.sleep(max(0.0, frame_duration - (time.time() - frame_start)))
+
+    def frames(self) -> Iterator[bytes]:
+        last_frame_number = None
+        while True:
+            with self._condition:
+                if self._tiles is None or self._frame_number == last_frame_number:
+                    self._condition.wait(timeout=1)
+                if not self._thread.is_alive():
+                    return
+
+                if self._tiles is None or self._frame_number == last_frame_number:
+                    # Writing to the socket is the only way of noticing that the client has
+                    # disconnected, so something needs to be sent even if nothing has changed.
+                    message = raw_message_header.pack(b"PBVF", self._frame_number, 0, 0)
+                elif last_frame_number is not None and self._frame_number == last_frame_number + 1:
+                    message = self._delta_message
+                else:
+                    # Key frames are only needed by clients that have just connected or fallen
+                    # behind, so they are built on demand (and then shared until the next frame.)
+                    if self._key_frame_message is None:
+                        self._key_frame_message = self._encode(
+                            self._frame_number, self._tiles, numpy.arange(len(self._tiles)), True
+                        )
+                    message = self._key_frame_message
+                last_frame_number = self._frame_number
+            yield message
+
+
+_encoders: dict[tuple[str, int, int], VideoEncoder | RawVideoEncoder] = {}
+_encoders_lock = Lock()
+
+
+def _subscribe_to_encoder(key: tuple[str, int, int]) -> VideoEncoder | RawVideoEncoder:
+    with _encoders_lock:
+        encoder = _encoders.get(key)
+        if encoder is None or not encoder._thread.is_alive():
+            image_format, quality, fps = key
+            encoder = RawVideoEncoder(fps) if image_format == "raw" else VideoEncoder(image_format, quality, fps)
+            _encoders[key] = encoder
+            encoder.subscribers += 1
+            encoder._thread.start()
+        else:
+            encoder.subscribers += 1
+    return encoder
+
+
+def _unsubscribe_from_encoder(key: tuple[str, int, int], encoder: VideoEncoder | RawVideoEncoder) -> None:
+    with _encoders_lock:
+        encoder.subscribers -= 1
+        if encoder.subscribers == 0 and _encoders.get(key) is encoder:
+            del _encoders[key]
+
+
+def stream_video(image_format: str, quality: int, fps: int) -> Iterator[bytes]:
+    """
+    Generates the body of a `multipart/x-mixed-replace` response containing the emulator video.
+
+    :param image_format: One of the keys of `video_formats`
+    :param quality: Image quality (1-100) for lossy formats, ignored for PNG
+    :param fps: Maximum number of frames per second
+    :return: Iterator yielding the chunks of the response
+    """
+    key = (image_format, quality if image_format != "png" else 0, fps)
+    encoder = _subscribe_to_encoder(key)
+    try:
+        yield f"--{multipart_boundary}\r\n".encode("ascii")
+        yield from encoder.frames()
+    finally:
+        _unsubscribe_from_encoder(key, encoder)
+
+
+def stream_raw_video(fps: int) -> Iterator[bytes]:
+    """
+    Generates the body of a binary response containing the emulator video, in the format
+    described in `RawVideoEncoder`.
+
+    :param fps: Maximum number of frames per second
+    :return: Iterator yielding one message per frame
+    """
+    key = ("raw", 0, fps)
+    encoder = _subscribe_to_encoder(key)
+    try:
+        yield from encoder.frames()
+    finally:
+        _unsubscribe_from_encoder(key, encoder)
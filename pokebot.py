@@ -4,6 +4,7 @@ import argparse
 import atexit
 import pathlib
 import platform
+import sys
 from dataclasses import dataclass
 
 from modules.modes import available_bot_modes
@@ -44,8 +45,10 @@ class StartupSettings:
     no_video: bool
     no_audio: bool
     emulation_speed: int
+    render_interval: int
     always_on_top: bool
     config_path: str
+    farm_profiles: list[str]
 
 
 def directory_arg(value: str) -> pathlib.Path:
@@ -74,12 +77,27 @@ def parse_arguments() -> StartupSettings:
         choices=["0", "1", "2", "3", "4"],
         help="Initial emulation speed (0 for unthrottled; default: 1)",
     )
+    parser.add_argument(
+        "-r",
+        "--render-interval",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Only render every N-th frame, which speeds up the emulation while video is on (default: 1).",
+    )
     parser.add_argument("-nv", "--no-video", action="store_true", help="Turn off video output by default.")
     parser.add_argument("-na", "--no-audio", action="store_true", help="Turn off audio output by default.")
     parser.add_argument(
         "-t", "--always-on-top", action="store_true", help="Keep the bot window always on top of other windows."
     )
     parser.add_argument("-d", "--debug", action="store_true", help="Enable extra debug options and a debug menu.")
+    parser.add_argument(
+        "-f",
+        "--farm",
+        nargs="+",
+        metavar="PROFILE",
+        help="Run several profiles in parallel without a GUI, using one process per profile (default speed: 0).",
+    )
     parser.add_argument("-c", "--config", type=directory_arg, dest="config_path", help=argparse.SUPPRESS)
     args = parser.parse_args()
 
@@ -93,9 +111,11 @@ def parse_arguments() -> StartupSettings:
         bot_mode=args.bot_mode or "Manual",
         no_video=bool(args.no_video),
         no_audio=bool(args.no_audio),
-        emulation_speed=int(args.emulation_speed or "1"),
+        emulation_speed=int(args.emulation_speed or ("0" if args.farm else "1")),
+        render_interval=max(1, args.render_interval),
         always_on_top=bool(args.always_on_top),
         config_path=args.config_path,
+        farm_profiles=args.farm or [],
     )
 
 
@@ -120,6 +140,9 @@ if __name__ == "__main__":
 
         def win32_signal_handler(signal_type):
             if signal_type == 2:
+                from modules.csv import close_encounter_log
+
+                close_encounter_log()
                 if context.emulator is not None:
                     context.emulator.shutdown()
 
@@ -131,6 +154,19 @@ if __name__ == "__main__":
     if not is_bundled_app() and not (get_base_path() / ".git").is_dir():
         run_updater()
 
+    if startup_settings.farm_profiles:
+        from modules.farm import FarmSettings, run_farm
+
+        run_farm(
+            FarmSettings(
+                profile_names=startup_settings.farm_profiles,
+                bot_mode=startup_settings.bot_mode,
+                emulation_speed=startup_settings.emulation_speed,
+                no_video=True,
+            )
+        )
+        sys.exit(0)
+
     gui = PokebotGui(main_loop, on_exit)
     context.gui = gui
 
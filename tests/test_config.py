@@ -88,6 +88,7 @@ DEFAULT_CONFIG = {
         },
         "import_pk3": False,
         "log_encounters": False,
+        "log_encounters_format": "csv",
         "save_pk3": {"all": False, "custom": False, "shiny": False},
     },
     "obs": {
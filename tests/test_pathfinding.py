@@ -0,0 +1,146 @@
+"""Unit tests for the pathfinding on synthetic maps."""
+
+import pytest
+
+from modules import exceptions  # Import base module first to avoid a circular import.
+from modules import pathfinding
+from modules.pathfinding import WalkabilityGrid, _find_maps_on_route, _get_move
+
+
+def _create_grid(rows: list[str], map_group_and_number: tuple[int, int] = (0, 0)) -> WalkabilityGrid:
+    """
+    Creates a grid from a list of strings, where `.` is a walkable tile, `#` is blocked, a digit is a walkable
+    tile of that elevation, and `>`, `<`, `^` and `v` are ledges that can be jumped down in that direction.
+    """
+    ledges = {">": "East", "<": "West", "^": "North", "v": "South"}
+    grid = WalkabilityGrid(map_group_and_number, len(rows[0]), len(rows))
+    for y, row in enumerate(rows):
+        for x, tile in enumerate(row):
+            grid.passable[y][x] = tile != "#"
+            if tile.isdigit():
+                grid.elevation[y][x] = int(tile)
+            grid.jump_direction[y][x] = ledges.get(tile)
+    return grid
+
+
+def test_walking_and_map_edges() -> None:
+    """Ensures that blocked tiles cannot be entered, and that walking off the map is reported to the caller."""
+    grid = _create_grid(
+        [
+            "..",
+            ".#",
+        ]
+    )
+    assert grid.get_destination(0, 0, "East") == (1, 0)
+    assert grid.get_destination(0, 1, "East") is None
+    assert grid.get_destination(1, 0, "South") is None
+    assert grid.get_destination(0, 0, "North") == (0, -1)
+
+
+def test_ledges() -> None:
+    """Ensures that ledges can only be jumped down, and that the player lands behind them."""
+    grid = _create_grid(
+        [
+            "...",
+            "v.#",
+            "..>",
+        ]
+    )
+    assert grid.get_destination(0, 0, "South") == (0, 2)
+    assert grid.get_destination(0, 2, "North") is None
+    assert grid.get_destination(1, 1, "West") is None
+
+    # There is no tile to land on behind this ledge.
+    assert grid.get_destination(1, 2, "East") is None
+
+
+def test_one_way_tiles() -> None:
+    """Ensures that 'impassable' tiles cannot be left or entered in the blocked direction."""
+    grid = _create_grid(["..."])
+    grid.impassable_directions[0][1] = {"East"}
+    assert grid.get_destination(1, 0, "East") is None
+    assert grid.get_destination(2, 0, "West") is None
+    assert grid.get_destination(1, 0, "West") == (0, 0)
+    assert grid.get_destination(0, 0, "East") == (1, 0)
+
+
+def test_elevation() -> None:
+    """Ensures that tiles of different elevations only connect through elevation 0 or 15."""
+    grid = _create_grid(["3403"])
+    grid.elevation[0][2] = 15
+    assert grid.get_destination(0, 0, "East") is None
+    assert grid.get_destination(1, 0, "East") == (2, 0)
+    assert grid.get_destination(2, 0, "East") == (3, 0)
+
+
+def test_arrow_warps() -> None:
+    """Ensures that arrow warps only warp when leaving them in the arrow's direction, not when entering them."""
+    grid = _create_grid(
+        [
+            "###",
+            "...",
+        ]
+    )
+    grid.arrow_warp_direction[1][1] = "North"
+    warp_exits = {(1, 1): ((1, 2), (5, 6))}
+    goal_node = ((9, 9), (0, 0))
+
+    assert _get_move(grid, warp_exits, 0, 1, "East", goal_node)[:2] == ((0, 0), (1, 1))
+    next_map, next_coordinates, step = _get_move(grid, warp_exits, 1, 1, "North", goal_node)
+    assert (next_map, next_coordinates) == ((1, 2), (5, 6))
+    assert step.coordinates == (1, 0)
+    assert step.changes_map_to == (1, 2)
+
+
+def test_door_warps() -> None:
+    """Ensures that other warps are triggered by stepping onto them, unless they are the goal."""
+    grid = _create_grid([".."])
+    warp_exits = {(1, 0): ((1, 2), (5, 6))}
+
+    assert _get_move(grid, warp_exits, 0, 0, "East", ((9, 9), (0, 0)))[:2] == ((1, 2), (5, 6))
+    assert _get_move(grid, warp_exits, 0, 0, "East", ((0, 0), (1, 0)))[:2] == ((0, 0), (1, 0))
+
+
+def test_maps_on_route(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Ensures that only maps on a shortest route are considered, and unreachable maps are detected."""
+    graph = {
+        (0, 0): {(0, 1), (0, 2)},
+        (0, 1): {(0, 0), (0, 3)},
+        (0, 2): {(0, 0), (0, 3), (0, 4)},
+        (0, 3): {(0, 1), (0, 2)},
+        (0, 4): {(0, 2), (0, 5)},
+        (0, 5): {(0, 4)},
+        (1, 0): set(),
+    }
+    monkeypatch.setattr(pathfinding, "get_neighbouring_maps", lambda group, number: frozenset(graph[group, number]))
+
+    assert _find_maps_on_route((0, 0), (0, 3)) == {(0, 0), (0, 1), (0, 2), (0, 3)}
+    assert _find_maps_on_route((0, 0), (0, 5)) == {(0, 0), (0, 2), (0, 4), (0, 5)}
+    assert _find_maps_on_route((0, 0), (0, 0)) == {(0, 0)}
+    assert _find_maps_on_route((0, 0), (1, 0)) is None
+
+
+def test_avoided_tiles_do_not_invalidate_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Ensures that the path is only searched again if an avoided tile is actually in the way."""
+    grid = _create_grid(
+        [
+            "...",
+            "...",
+        ]
+    )
+    monkeypatch.setattr(pathfinding, "get_walkability_grid", lambda group, number, on_bike, surfing: grid)
+    monkeypatch.setattr(pathfinding, "_get_warp_exits", lambda group, number: {})
+    monkeypatch.setattr(pathfinding, "_get_edge_exit", lambda grid, x, y, direction: None)
+    monkeypatch.setattr(pathfinding, "get_neighbouring_maps", lambda group, number: frozenset())
+    pathfinding._find_path_ignoring_objects.cache_clear()
+
+    path = pathfinding.find_path((0, 0), (0, 0), (0, 0), (2, 0))
+    assert [step.coordinates for step in path] == [(1, 0), (2, 0)]
+
+    # An NPC that is not in the way does not require a new search.
+    assert pathfinding.find_path((0, 0), (0, 0), (0, 0), (2, 0), avoid=frozenset({((0, 0), (1, 1))})) is path
+
+    path = pathfinding.find_path((0, 0), (0, 0), (0, 0), (2, 0), avoid=frozenset({((0, 0), (1, 0))}))
+    assert [step.coordinates for step in path] == [(0, 1), (1, 1), (2, 1), (2, 0)]
+    assert pathfinding._find_path_ignoring_objects.cache_info().misses == 1
+    pathfinding._find_path_ignoring_objects.cache_clear()
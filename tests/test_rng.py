@@ -0,0 +1,56 @@
+"""Unit tests for the RNG prediction."""
+
+from modules.rng import advance_rng, get_rng_values, predict_pokemon
+
+
+def _random(rng_value: int) -> tuple[int, int]:
+    rng_value = (rng_value * 0x41C64E6D + 0x6073) & 0xFFFF_FFFF
+    return rng_value, rng_value >> 16
+
+
+def _generate_pokemon(rng_value: int, method: int) -> tuple[int, list[int]]:
+    """Straightforward, non-vectorised version of what the game does."""
+    rng_value, personality_value_low = _random(rng_value)
+    rng_value, personality_value_high = _random(rng_value)
+    if method == 2:
+        rng_value, _ = _random(rng_value)
+    rng_value, first_ivs = _random(rng_value)
+    if method == 4:
+        rng_value, _ = _random(rng_value)
+    rng_value, second_ivs = _random(rng_value)
+    ivs = [(first_ivs >> shift) & 31 for shift in (0, 5, 10)] + [(second_ivs >> shift) & 31 for shift in (0, 5, 10)]
+    return (personality_value_high << 16) | personality_value_low, ivs
+
+
+def test_rng_values_match_single_steps() -> None:
+    """Ensures that jumping ahead gives the same results as advancing the RNG one step at a time."""
+    rng_value = 0x1234_5678
+    values = get_rng_values(rng_value, 1000)
+    for index in range(1000):
+        assert values[index] == rng_value
+        assert advance_rng(values[0], index) == rng_value
+        rng_value, _ = _random(rng_value)
+
+
+def test_known_seed() -> None:
+    """Ensures that the first Pokémon generated from seed 0 (e.g. on a dry battery) is correct."""
+    prediction = predict_pokemon(0, 0, 0, 1)[0]
+    assert prediction["personality_value"] == 0xE97E0000
+    assert prediction["nature"] == 14
+    assert list(prediction["ivs"]) == [17, 19, 20, 16, 13, 12]
+
+
+def test_predictions_match_reference_implementation() -> None:
+    """Ensures that the vectorised prediction matches a step-by-step implementation for all methods."""
+    trainer_id, secret_id = 12345, 54321
+    for method in (1, 2, 4):
+        predictions = predict_pokemon(0xDEAD_BEEF, trainer_id, secret_id, 200, method)
+        for prediction in predictions:
+            personality_value, ivs = _generate_pokemon(int(prediction["rng_value"]), method)
+            shiny_value = trainer_id ^ secret_id ^ (personality_value >> 16) ^ (personality_value & 0xFFFF)
+            assert prediction["personality_value"] == personality_value
+            assert list(prediction["ivs"]) == ivs
+            assert prediction["iv_sum"] == sum(ivs)
+            assert prediction["nature"] == personality_value % 25
+            assert prediction["shiny_value"] == shiny_value
+            assert prediction["is_shiny"] == (shiny_value < 8)
@@ -0,0 +1,69 @@
+"""Unit tests for the parallel RNG seed search, using threads instead of emulator processes."""
+
+import multiprocessing.dummy
+from types import SimpleNamespace
+
+import pytest
+
+from modules import exceptions  # Import base module first to avoid a circular import.
+from modules import rng_search
+from modules.rng_search import SeedSearchMatch, SeedSearchPool
+
+
+@pytest.fixture
+def thread_pool(monkeypatch: pytest.MonkeyPatch) -> list[range]:
+    """
+    Replaces the worker processes with threads, and `_try_seeds()` with a function that reports
+    every seed divisible by 100 as a match.
+
+    :return: List that all the chunks that have been searched are added to
+    """
+    searched_chunks = []
+
+    def try_seeds(seeds: range) -> tuple[int, list[SeedSearchMatch]]:
+        searched_chunks.append(seeds)
+        matches = [SeedSearchMatch(seed, b"", "shiny", seed.to_bytes(4, "little")) for seed in seeds if seed % 100 == 0]
+        return len(seeds), matches
+
+    monkeypatch.setattr(
+        rng_search, "multiprocessing", SimpleNamespace(get_context=lambda method: multiprocessing.dummy)
+    )
+    monkeypatch.setattr(rng_search, "_initialise_worker", lambda *args: None)
+    monkeypatch.setattr(rng_search, "_try_seeds", try_seeds)
+    return searched_chunks
+
+
+def test_search_finds_all_matches(thread_pool: list[range]) -> None:
+    """Ensures that all seeds are tried exactly once, in chunks, and that all matches are returned."""
+    with SeedSearchPool("test", b"", processes=4) as pool:
+        matches = list(pool.search(range(1000)))
+
+    assert sorted(match.seed for match in matches) == list(range(0, 1000, 100))
+    assert pool.seeds_tried == 1000
+    assert all(len(chunk) <= rng_search.seeds_per_chunk for chunk in thread_pool)
+    assert sorted(seed for chunk in thread_pool for seed in chunk) == list(range(1000))
+
+
+def test_search_accepts_any_iterable(thread_pool: list[range]) -> None:
+    """Ensures that seeds that are not given as a `range` are searched as well."""
+    with SeedSearchPool("test", b"", processes=2) as pool:
+        matches = list(pool.search(seed * 50 for seed in range(10)))
+
+    assert sorted(match.seed for match in matches) == [0, 100, 200, 300, 400]
+    assert pool.seeds_tried == 10
+
+
+def test_close_removes_temporary_directory(thread_pool: list[range]) -> None:
+    """Ensures that closing the pool removes the workers' files, even if a search has been abandoned."""
+    with SeedSearchPool("test", b"", processes=2) as pool:
+        temporary_path = pool._temporary_path
+        assert temporary_path.is_dir()
+        next(pool.search(range(0x10000)))
+
+    assert not temporary_path.exists()
+
+
+def test_buttons_are_required(thread_pool: list[range]) -> None:
+    """Ensures that a pool cannot be created without any buttons to press."""
+    with pytest.raises(RuntimeError):
+        SeedSearchPool("test", b"", buttons=())
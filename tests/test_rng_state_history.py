@@ -0,0 +1,46 @@
+"""Unit tests for the soft reset RNG state history."""
+
+import json
+from pathlib import Path
+
+from modules.rng_state_history import RngStateHistory
+
+
+def test_states_are_persisted(tmp_path: Path) -> None:
+    """Ensures that states are written to disk immediately and can be found again after reloading."""
+    history = RngStateHistory(tmp_path / "soft_reset_frames.bin")
+    history.add(0xDEADBEEF)
+    history.add(5)
+    history.add(5)
+    assert 5 in history
+    assert 6 not in history
+    assert len(history) == 2
+
+    reloaded_history = RngStateHistory(tmp_path / "soft_reset_frames.bin")
+    assert 0xDEADBEEF in reloaded_history
+    assert 5 in reloaded_history
+    assert len(reloaded_history) == 2
+    history.close()
+    reloaded_history.close()
+
+
+def test_legacy_json_file_is_imported(tmp_path: Path) -> None:
+    """Ensures that the history from `soft_reset_frames.json` is not lost."""
+    (tmp_path / "soft_reset_frames.json").write_text(json.dumps([1, 2, 0xFFFFFFFF]))
+    history = RngStateHistory(tmp_path / "soft_reset_frames.bin", tmp_path / "soft_reset_frames.json")
+    assert 1 in history
+    assert 0xFFFFFFFF in history
+    assert 3 not in history
+    history.close()
+
+
+def test_incomplete_entry_is_ignored(tmp_path: Path) -> None:
+    """Ensures that an entry that has only been partially written does not prevent loading the history."""
+    (tmp_path / "soft_reset_frames.bin").write_bytes((7).to_bytes(4, "little") + b"\x01\x02")
+    history = RngStateHistory(tmp_path / "soft_reset_frames.bin")
+    assert 7 in history
+    assert len(history) == 1
+    history.add(8)
+    history.close()
+
+    assert 8 in RngStateHistory(tmp_path / "soft_reset_frames.bin")
@@ -0,0 +1,57 @@
+"""Unit tests to ensure stats can be recovered from the stats journal."""
+
+import json
+from pathlib import Path
+
+from modules import exceptions  # Import base module first to avoid a circular import.
+from modules.stats_journal import StatsJournal
+
+
+def _create_journal(directory: Path) -> StatsJournal:
+    return StatsJournal(directory / "totals.json", directory / "totals.journal")
+
+
+def test_journal_is_replayed(tmp_path: Path) -> None:
+    """Ensures that entries that have not made it into a snapshot are recovered on the next start."""
+    journal = _create_journal(tmp_path)
+    assert journal.load() == {}
+    journal.append({"encounters": 1}, {"Zigzagoon": {"encounters": 1}})
+    journal.append({"encounters": 2}, {"Wurmple": {"encounters": 1}})
+    journal.close()
+
+    stats = _create_journal(tmp_path).load()
+    assert stats == {
+        "totals": {"encounters": 2},
+        "pokemon": {"Zigzagoon": {"encounters": 1}, "Wurmple": {"encounters": 1}},
+    }
+    assert (tmp_path / "totals.journal").read_text() == ""
+
+
+def test_incomplete_journal_entry_is_ignored(tmp_path: Path) -> None:
+    """Ensures that a journal entry that has only been partially written does not prevent loading the stats."""
+    journal = _create_journal(tmp_path)
+    journal.load()
+    journal.append({"encounters": 1})
+    journal.close()
+    with open(tmp_path / "totals.journal", "a") as file:
+        file.write('{"sequence": 2, "tot')
+
+    assert _create_journal(tmp_path).load() == {"totals": {"encounters": 1}}
+
+
+def test_snapshot_entries_are_not_replayed_twice(tmp_path: Path) -> None:
+    """Ensures that journal entries that are already part of the snapshot are skipped."""
+    journal = _create_journal(tmp_path)
+    journal.load()
+    journal.append({"encounters": 1})
+    journal.close()
+    old_journal = (tmp_path / "totals.journal").read_text()
+
+    journal.snapshot({"totals": {"encounters": 1, "phase_encounters": 0}})
+    journal.close()
+
+    # Simulates the bot crashing after writing the snapshot, but before truncating the journal.
+    (tmp_path / "totals.journal").write_text(old_journal)
+
+    assert _create_journal(tmp_path).load() == {"totals": {"encounters": 1, "phase_encounters": 0}}
+    assert json.loads((tmp_path / "totals.json").read_text())["journal_sequence"] == 1